@@ -0,0 +1,273 @@
+"""Backtest vektor untuk aturan swing trading (scanner.py) dan sinyal beli + TP/SL (trading_bot.py)
+
+Aturan yang sama dengan scoring live (rules/*.json) dievaluasi untuk semua
+bar sekaligus sebagai array boolean tanggal × simbol, lalu exit TP/SL dicari
+dengan first-hit search pada jendela bar berikutnya.
+Setiap sinyal dihitung sebagai trade independen (entry di close bar sinyal).
+
+    python backtest.py scan --universe scanner --period 5y
+    python backtest.py bot --universe trading_bot --period 10y --max-hold 30
+    python backtest.py bot --panel .cache/panel
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicator_panel import IndicatorPanel
+from rule_engine import load_rules
+
+
+def swing_net_score(panel, rsi_window=14, macd_spans=(12, 26, 9), rules=None):
+    """Net score aturan swing (rules/swing.json) untuk setiap bar dan simbol"""
+    rules = rules or load_rules('swing')
+    evaluation = rules.evaluate_panel(panel, rsi_window=rsi_window, macd_spans=macd_spans)
+    return pd.DataFrame(evaluation['net_score'], index=panel.close.index, columns=panel.close.columns)
+
+
+def buy_signal_mask(panel, rsi_window=14, macd_spans=(12, 26, 9), bb=(20, 2), rules=None):
+    """Entry aturan sinyal beli (rules/buy_signal.json) untuk setiap bar dan simbol"""
+    rules = rules or load_rules('buy_signal')
+    evaluation = rules.evaluate_panel(panel, rsi_window=rsi_window, macd_spans=macd_spans, bb=bb)
+    return pd.DataFrame(evaluation['entry'], index=panel.close.index, columns=panel.close.columns)
+
+
+def trend_labels(panel, rules=None):
+    """Label tren ('bullish' / 'bearish' / 'neutral', rules/trend.json) untuk setiap bar"""
+    rules = rules or load_rules('trend')
+    return rules.evaluate_panel(panel)['labels']['trend']
+
+
+def tp_sl_levels(buy_price, trend, atr, volatility_factor=1.5):
+    """Versi vektor calculate_tp_sl"""
+    take_profit = np.select(
+        [trend == 'bullish', trend == 'bearish'],
+        [buy_price + atr * volatility_factor * 2, buy_price + atr * volatility_factor * 1.5],
+        buy_price * 1.10,
+    )
+    stop_loss = np.where(
+        trend == 'neutral', buy_price * 0.95, buy_price - atr * volatility_factor
+    )
+    return take_profit, stop_loss
+
+
+def _own_bars(close):
+    """Bar tiap simbol dirapatkan ke atas: (posisi bar tiap sel, baris asal tiap posisi)
+
+    Kalender gabungan berisi NaN pada tanggal ketika simbol tidak punya bar;
+    jendela max_hold dihitung atas bar simbol itu sendiri, seperti _GapLayout
+    di IndicatorPanel. Posisi tanpa bar bernilai -1 di baris asal.
+    """
+    valid = close.notna().to_numpy()
+    position = valid.cumsum(axis=0) - 1
+    rows, cols = np.nonzero(valid)
+    source = np.full(valid.shape, -1)
+    source[position[rows, cols], cols] = rows
+    return position, source
+
+
+def _compact(values, source):
+    out = np.take_along_axis(values.astype(float), np.maximum(source, 0), axis=0)
+    out[source < 0] = np.nan
+    return out
+
+
+def _future_windows(values, max_hold):
+    """View (T, S, max_hold) berisi bar t+1..t+max_hold, tanpa menyalin data"""
+    pad = np.full((max_hold, values.shape[1]), np.nan)
+    return sliding_window_view(np.vstack([values[1:], pad]), max_hold, axis=0)
+
+
+def simulate_exits(panel, entries, take_profit, stop_loss, max_hold=20):
+    """Mencari exit pertama (TP / SL / timeout) untuk setiap entry secara vektor
+
+    Jika TP dan SL tersentuh di bar yang sama, SL dianggap lebih dulu. Gap
+    open melewati level dieksekusi di harga open. `max_hold` dihitung dalam
+    bar simbol itu sendiri, tanggal tanpa bar (suspensi) dilewati.
+    """
+    close = panel.close.to_numpy()
+    entries = np.asarray(entries) & np.isfinite(close) & np.isfinite(take_profit) & np.isfinite(stop_loss)
+    t_idx, s_idx = np.nonzero(entries)
+
+    # Jendela bar berikutnya atas bar milik simbol sendiri, bukan baris kalender gabungan
+    position, source = _own_bars(panel.close)
+    k_idx = position[t_idx, s_idx]
+    fut_open, fut_high, fut_low, fut_close = (
+        _future_windows(_compact(frame.to_numpy(), source), max_hold)[k_idx, s_idx]
+        for frame in (panel.open, panel.high, panel.low, panel.close)
+    )
+
+    # Entry di bar terakhir tidak punya bar lanjutan untuk dievaluasi
+    valid = np.isfinite(fut_close)
+    keep = valid.any(axis=1)
+    t_idx, s_idx, k_idx = t_idx[keep], s_idx[keep], k_idx[keep]
+    fut_open, fut_high, fut_low, fut_close = fut_open[keep], fut_high[keep], fut_low[keep], fut_close[keep]
+    valid = valid[keep]
+
+    entry_price = close[t_idx, s_idx]
+    tp = take_profit[t_idx, s_idx]
+    sl = stop_loss[t_idx, s_idx]
+
+    hit_tp = fut_high >= tp[:, None]
+    hit_sl = fut_low <= sl[:, None]
+    first_tp = np.where(hit_tp.any(axis=1), hit_tp.argmax(axis=1), max_hold)
+    first_sl = np.where(hit_sl.any(axis=1), hit_sl.argmax(axis=1), max_hold)
+    last_valid = max_hold - 1 - valid[:, ::-1].argmax(axis=1)
+
+    is_sl = (first_sl < max_hold) & (first_sl <= first_tp)
+    is_tp = (first_tp < max_hold) & ~is_sl
+    offset = np.select([is_sl, is_tp], [first_sl, first_tp], last_valid)
+
+    rows = np.arange(len(t_idx))
+    exit_open = fut_open[rows, offset]
+    exit_price = np.select(
+        [is_sl, is_tp],
+        [np.fmin(sl, exit_open), np.fmax(tp, exit_open)],
+        fut_close[rows, offset],
+    )
+
+    dates = panel.close.index
+    symbols = np.asarray(panel.symbols)
+    return pd.DataFrame({
+        'symbol': symbols[s_idx],
+        'entry_date': dates[t_idx],
+        'exit_date': dates[source[k_idx + offset + 1, s_idx]],
+        'entry_price': entry_price,
+        'take_profit': tp,
+        'stop_loss': sl,
+        'exit_price': exit_price,
+        'outcome': np.select([is_sl, is_tp], ['sl', 'tp'], 'timeout'),
+        'bars_held': offset + 1,
+        'return_pct': (exit_price / entry_price - 1) * 100,
+    })
+
+
+def _max_drawdown(returns_pct):
+    equity = np.cumprod(1 + np.asarray(returns_pct) / 100)
+    peak = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    return ((equity / peak - 1) * 100).min() if len(equity) else np.nan
+
+
+def summarize(trades):
+    """Hit rate, expectancy dan drawdown per simbol dan agregat"""
+    if trades.empty:
+        return pd.DataFrame(), {}
+
+    trades = trades.sort_values(['symbol', 'exit_date'])
+    grouped = trades.groupby('symbol')
+    per_symbol = pd.DataFrame({
+        'trades': grouped.size(),
+        'hit_rate': grouped['outcome'].apply(lambda o: (o == 'tp').mean() * 100),
+        'win_rate': grouped['return_pct'].apply(lambda r: (r > 0).mean() * 100),
+        'expectancy_pct': grouped['return_pct'].mean(),
+        'max_drawdown_pct': grouped['return_pct'].apply(_max_drawdown),
+    }).sort_values('expectancy_pct', ascending=False)
+
+    # Drawdown agregat: rata-rata return trade yang exit di tanggal yang sama
+    daily = trades.groupby('exit_date')['return_pct'].mean().sort_index()
+    aggregate = {
+        'trades': len(trades),
+        'hit_rate': (trades['outcome'] == 'tp').mean() * 100,
+        'win_rate': (trades['return_pct'] > 0).mean() * 100,
+        'expectancy_pct': trades['return_pct'].mean(),
+        'max_drawdown_pct': _max_drawdown(daily),
+    }
+    return per_symbol, aggregate
+
+
+def _warmed_up(panel, min_bars):
+    """Bar dianggap valid setelah simbol punya minimal `min_bars` data"""
+    return (panel.close.notna().cumsum() >= min_bars).to_numpy() & panel.close.notna().to_numpy()
+
+
+def _as_panel(data):
+    if isinstance(data, IndicatorPanel):
+        return data
+    if hasattr(data, 'indicator_panel'):
+        return data.indicator_panel()
+    return IndicatorPanel(data)
+
+
+def backtest_swing(data, min_score=1, take_profit=0.10, stop_loss=0.05, max_hold=20,
+                   rsi_window=14, macd_spans=(12, 26, 9)):
+    """Backtest swing_trading_criteria dengan TP/SL persentase tetap
+
+    `data` boleh dict DataFrame per simbol, PricePanel atau IndicatorPanel yang sudah ada.
+    """
+    panel = _as_panel(data)
+    score = swing_net_score(panel, rsi_window, macd_spans)
+    entries = (score >= min_score).to_numpy() & _warmed_up(panel, 50)
+    close = panel.close.to_numpy()
+    trades = simulate_exits(
+        panel, entries, close * (1 + take_profit), close * (1 - stop_loss), max_hold
+    )
+    return trades, *summarize(trades)
+
+
+def backtest_buy_signal(data, volatility_factor=1.5, max_hold=20,
+                        rsi_window=14, macd_spans=(12, 26, 9), bb=(20, 2)):
+    """Backtest get_buy_signal + calculate_tp_sl
+
+    `data` boleh dict DataFrame per simbol, PricePanel atau IndicatorPanel yang sudah ada.
+    """
+    panel = _as_panel(data)
+    entries = buy_signal_mask(panel, rsi_window, macd_spans, bb).to_numpy() & _warmed_up(panel, 100)
+    take_profit, stop_loss = tp_sl_levels(
+        panel.close.to_numpy(), trend_labels(panel), panel.atr().to_numpy(), volatility_factor
+    )
+    trades = simulate_exits(panel, entries, take_profit, stop_loss, max_hold)
+    return trades, *summarize(trades)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('kind', choices=['scan', 'bot'])
+    parser.add_argument('--universe', default=None, help='Default: watchlist scanner / trading_bot')
+    parser.add_argument('--period', default='5y')
+    parser.add_argument('--max-hold', type=int, default=20, help='Maksimal bar per trade')
+    parser.add_argument('--min-score', type=int, default=1)
+    parser.add_argument('--take-profit', type=float, default=0.10, help='TP swing (fraksi)')
+    parser.add_argument('--stop-loss', type=float, default=0.05, help='SL swing (fraksi)')
+    parser.add_argument('--volatility-factor', type=float, default=1.5)
+    parser.add_argument('--trades-csv', help='Simpan daftar trade ke CSV')
+    parser.add_argument('--panel', help='Pakai panel memmap (price_panel.py) alih-alih cache')
+    args = parser.parse_args()
+
+    if args.panel:
+        from price_panel import PricePanel
+        data = PricePanel(args.panel)
+        print(f"Backtest {args.kind}: {len(data.symbols)} saham dari panel {args.panel}")
+    else:
+        from price_cache import CachedDataProvider
+        from universe import load_universe
+
+        universe = args.universe or ('scanner' if args.kind == 'scan' else 'trading_bot')
+        data = CachedDataProvider().fetch(load_universe(universe), period=args.period)
+        print(f"Backtest {args.kind}: {len(data)} saham, period {args.period}")
+
+    if args.kind == 'scan':
+        trades, per_symbol, aggregate = backtest_swing(
+            data, args.min_score, args.take_profit, args.stop_loss, args.max_hold
+        )
+    else:
+        trades, per_symbol, aggregate = backtest_buy_signal(
+            data, args.volatility_factor, args.max_hold
+        )
+
+    if trades.empty:
+        print("Tidak ada trade.")
+        return
+
+    print("\n" + per_symbol.round(2).to_string())
+    print("\nAgregat:")
+    for key, value in aggregate.items():
+        print(f"   {key}: {value:,.2f}" if isinstance(value, float) else f"   {key}: {value}")
+
+    if args.trades_csv:
+        trades.to_csv(args.trades_csv, index=False)
+        print(f"\nDaftar trade disimpan ke: {args.trades_csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Benchmark skalabilitas scanner dengan data OHLCV sintetis
+
+Mengukur waktu tiap tahap secara terpisah (load data, tiap calculate_*,
+swing_trading_criteria, analyze_stock, sorting, compose_message,
+export_to_csv), throughput (simbol/detik) dan peak memory, lalu
+membandingkannya dengan baseline run sebelumnya.
+
+    python benchmark.py --symbols 10,100,1000 --bars 60,250,2500
+    python benchmark.py --symbols 1000 --bars 250 --save-baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from data_provider import FakeDataProvider
+from indicator_panel import IndicatorPanel
+from price_cache import CachedDataProvider, PriceCache
+from scanner import IndonesiaStockScreener
+from synthetic import generate_ohlcv
+from trading_bot import IndonesiaStockTradingBot
+
+DEFAULT_BASELINE_PATH = os.path.join(".cache", "benchmark_baseline.json")
+
+
+def build_stages(data, workdir):
+    """Menyiapkan callable per tahap; persiapan input tidak ikut diukur"""
+    symbols = list(data)
+    fake = FakeDataProvider(data)
+    screener = IndonesiaStockScreener(provider=fake, stock_list=symbols)
+    bot = IndonesiaStockTradingBot(provider=fake, stock_list=symbols)
+
+    warm_cache = CachedDataProvider(fake, PriceCache(os.path.join(workdir, 'warm.sqlite')))
+    warm_cache.fetch(symbols, period='max')
+    cold_runs = iter(range(10 ** 6))
+
+    def load_cold():
+        path = os.path.join(workdir, f"cold-{next(cold_runs)}.sqlite")
+        CachedDataProvider(fake, PriceCache(path)).fetch(symbols, period='max')
+
+    closes = [hist['Close'] for hist in data.values()]
+    frames = list(data.items())
+
+    swing_results = [
+        {'symbol': symbol, 'company': symbol.replace('.JK', ''), **screener.swing_trading_criteria(hist)}
+        for symbol, hist in frames
+    ]
+    ranked = screener.rank_results(swing_results)
+    csv_path = os.path.join(workdir, 'export.csv')
+
+    return {
+        'load_cold': load_cold,
+        'load_warm': lambda: warm_cache.fetch(symbols, period='max'),
+        'calculate_rsi': lambda: [screener.calculate_rsi(close) for close in closes],
+        'calculate_macd': lambda: [screener.calculate_macd(close) for close in closes],
+        'calculate_bollinger_bands': lambda: [screener.calculate_bollinger_bands(close) for close in closes],
+        'calculate_stochastic': lambda: [
+            screener.calculate_stochastic(hist['High'], hist['Low'], hist['Close']) for _, hist in frames
+        ],
+        'calculate_atr': lambda: [
+            bot.calculate_atr(hist['High'], hist['Low'], hist['Close']) for _, hist in frames
+        ],
+        'indicator_panel': lambda: IndicatorPanel(data).snapshot(),
+        'swing_trading_criteria': lambda: [screener.swing_trading_criteria(hist) for _, hist in frames],
+        'analyze_stock': lambda: [bot.analyze_stock(symbol, data=hist) for symbol, hist in frames],
+        'screen_stocks': lambda: screener.screen_stocks(min_score=1),
+        'sort': lambda: screener.rank_results(swing_results),
+        'compose_message': lambda: screener.compose_message(ranked),
+        'export_to_csv': lambda: screener.export_to_csv(ranked, filename=csv_path),
+    }
+
+
+def measure(func, repeat):
+    """Waktu terbaik dari `repeat` kali jalan, lalu satu kali jalan untuk peak memory"""
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return min(timings), peak
+
+
+def run_benchmark(num_symbols, num_bars, repeat=3, stages=None, seed=42):
+    """Menjalankan semua tahap untuk satu ukuran data"""
+    data = generate_ohlcv(num_symbols, num_bars, seed=seed)
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    rows = []
+    try:
+        for stage, func in build_stages(data, workdir).items():
+            if stages and stage not in stages:
+                continue
+            seconds, peak = measure(func, repeat)
+            rows.append({
+                'case': f"{num_symbols}x{num_bars}",
+                'stage': stage,
+                'seconds': seconds,
+                'symbols_per_sec': num_symbols / seconds if seconds else float('inf'),
+                'peak_mb': peak / 2 ** 20,
+            })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return rows
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    baseline = load_baseline(path)
+    for row in results.itertuples():
+        baseline.setdefault(row.case, {})[row.stage] = row.seconds
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def compare_baseline(results, baseline, tolerance, min_delta=0.005):
+    """Menambahkan kolom perubahan terhadap baseline dan menandai regresi
+
+    Tahap yang sangat cepat mudah berfluktuasi, jadi regresi juga harus
+    lebih lambat minimal `min_delta` detik.
+    """
+    base = [baseline.get(row.case, {}).get(row.stage) for row in results.itertuples()]
+    results['baseline_s'] = pd.to_numeric(pd.Series(base, dtype=object), errors='coerce')
+    results['change_pct'] = (results['seconds'] / results['baseline_s'] - 1) * 100
+    results['regression'] = (
+        (results['change_pct'] > tolerance * 100)
+        & (results['seconds'] - results['baseline_s'] > min_delta)
+    )
+    return results
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=_int_list, default=[10, 100], help='mis. 10,100,1000,10000')
+    parser.add_argument('--bars', type=_int_list, default=[60, 250], help='mis. 60,250,2500')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', type=lambda v: v.split(','), default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Batas regresi (fraksi)')
+    parser.add_argument('--min-delta', type=float, default=0.005, help='Selisih minimal (detik)')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--output', help='Simpan hasil ke CSV')
+    args = parser.parse_args()
+
+    rows = []
+    for num_symbols in args.symbols:
+        for num_bars in args.bars:
+            print(f"Benchmark {num_symbols} simbol × {num_bars} bar...")
+            rows.extend(run_benchmark(num_symbols, num_bars, args.repeat, args.stages, args.seed))
+
+    results = compare_baseline(
+        pd.DataFrame(rows), load_baseline(args.baseline), args.tolerance, args.min_delta
+    )
+    print("\n" + results.round(4).to_string(index=False))
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline disimpan ke: {args.baseline}")
+
+    regressions = results[results['regression']]
+    if not regressions.empty:
+        print(f"\n⚠️ Regresi (> {args.tolerance:.0%}): "
+              + ', '.join(f"{r.case}/{r.stage} ({r.change_pct:+.0f}%)" for r in regressions.itertuples()))
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Satu entry point untuk semua perintah
+
+Dependensi berat (pandas, yfinance, requests, python-telegram-bot) hanya
+diimpor oleh subcommand yang membutuhkannya, sehingga perintah ringan seperti
+`universe` dan `cache` selesai hampir seketika.
+
+    python cli.py scan                       # = python scanner.py
+    python cli.py bot                        # = python trading_bot.py
+    python cli.py backtest bot --panel .cache/panel
+    python cli.py serve --no-schedule        # = python daemon.py
+    python cli.py replay run --repeat 3      # = python replay.py
+    python cli.py precompute build           # = python precompute.py
+    python cli.py universe idx
+    python cli.py cache
+    python cli.py startup --repeat 5         # ukur cold start tiap subcommand
+"""
+import argparse
+import importlib
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Subcommand -> modul yang diimpor (dan main()-nya dipanggil untuk scan/bot/backtest/serve)
+COMMAND_MODULES = {
+    'scan': 'scanner',
+    'bot': 'trading_bot',
+    'backtest': 'backtest',
+    'serve': 'daemon',
+    'replay': 'replay',
+    'precompute': 'precompute',
+    'universe': 'universe',
+    'cache': 'sqlite3',
+}
+
+# Modul yang dilaporkan oleh `startup` bila ikut terimpor
+HEAVY_MODULES = ('numpy', 'pandas', 'yfinance', 'requests', 'telegram')
+
+# Sama dengan price_cache.DEFAULT_CACHE_PATH; price_cache tidak diimpor karena butuh pandas
+CACHE_PATH = os.getenv("OHLCV_CACHE_PATH", os.path.join(".cache", "ohlcv.sqlite"))
+
+
+def import_command(name):
+    return importlib.import_module(COMMAND_MODULES[name])
+
+
+def run_module(name, argv):
+    """Menjalankan main() modul subcommand dengan argumen sisanya"""
+    module = import_command(name)
+    sys.argv = [f"{module.__name__}.py", *argv]
+    module.main()
+
+
+def list_universe(name=None):
+    universe = import_command('universe')
+    if name is None:
+        for filename in sorted(os.listdir(universe.UNIVERSE_DIR)):
+            if filename.endswith('.txt'):
+                symbols = universe.load_universe(filename)
+                print(f"{filename[:-4]}: {len(symbols)} saham")
+        return
+    symbols = universe.load_universe(name)
+    print(' '.join(symbols))
+    print(f"{len(symbols)} saham")
+
+
+def cache_summary(path=CACHE_PATH):
+    """Ringkasan cache OHLCV per interval langsung dari SQLite (tanpa pandas)"""
+    sqlite3 = import_command('cache')
+    if not os.path.exists(path):
+        print(f"Cache belum ada: {path}")
+        return
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT interval, COUNT(DISTINCT symbol), COUNT(*), MIN(ts), MAX(ts)"
+            " FROM bars GROUP BY interval ORDER BY interval"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    print(f"{path} ({os.path.getsize(path) / 2 ** 20:.1f} MB)")
+    for interval, symbols, bars, first, last in rows:
+        print(f"   {interval}: {symbols} saham, {bars:,} bar, "
+              f"{time.strftime('%Y-%m-%d', time.gmtime(first / 1e9))} .. "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.gmtime(last / 1e9))} UTC")
+
+
+def measure_startup(commands, repeat=3):
+    """Waktu cold start (proses Python baru sampai modul subcommand siap) per subcommand"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    rows = []
+    for name in ['python', *commands]:
+        code = "pass" if name == 'python' else (
+            f"import sys, cli; cli.import_command({name!r}); "
+            f"print(','.join(m for m in cli.HEAVY_MODULES if m in sys.modules))"
+        )
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, '-c', code], cwd=directory, capture_output=True, text=True
+            )
+            timings.append(time.perf_counter() - started)
+            if result.returncode != 0:
+                print(f"{name}: gagal diimpor\n{result.stderr.strip()}")
+                break
+        else:
+            rows.append((name, statistics.median(timings), result.stdout.strip() or '-'))
+
+    print(f"{'command':<10} {'cold start':>11}  heavy imports")
+    for name, seconds, heavy in rows:
+        print(f"{name:<10} {seconds * 1000:>8.0f} ms  {heavy}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for name, help_text in (
+        ('scan', 'Screening swing trading + kirim ke Telegram'),
+        ('bot', 'Rekomendasi trading bot + kirim ke Telegram'),
+        ('backtest', 'Backtest vektor (argumen diteruskan ke backtest.py)'),
+        ('serve', 'Mode daemon (argumen diteruskan ke daemon.py)'),
+        ('replay', 'Rekam / putar ulang data OHLCV (argumen diteruskan ke replay.py)'),
+        ('precompute', 'Snapshot indikator semalam (argumen diteruskan ke precompute.py)'),
+    ):
+        sub = subparsers.add_parser(name, help=help_text, add_help=False)
+        sub.add_argument('args', nargs=argparse.REMAINDER)
+
+    universe_parser = subparsers.add_parser('universe', help='Daftar universe / simbol dalam universe')
+    universe_parser.add_argument('name', nargs='?', default=None)
+
+    cache_parser = subparsers.add_parser('cache', help='Ringkasan cache OHLCV')
+    cache_parser.add_argument('--path', default=CACHE_PATH)
+
+    startup_parser = subparsers.add_parser('startup', help='Ukur cold start tiap subcommand')
+    startup_parser.add_argument('commands', nargs='*', default=list(COMMAND_MODULES),
+                                help=', '.join(COMMAND_MODULES))
+    startup_parser.add_argument('--repeat', type=int, default=3)
+
+    args, extra = parser.parse_known_args()
+
+    if args.command in ('scan', 'bot', 'backtest', 'serve', 'replay', 'precompute'):
+        run_module(args.command, extra + args.args)
+    elif extra:
+        parser.error(f"argumen tidak dikenal: {' '.join(extra)}")
+    elif args.command == 'startup' and set(args.commands) - set(COMMAND_MODULES):
+        parser.error(f"subcommand tidak dikenal: {' '.join(sorted(set(args.commands) - set(COMMAND_MODULES)))}")
+    elif args.command == 'universe':
+        list_universe(args.name)
+    elif args.command == 'cache':
+        cache_summary(args.path)
+    else:
+        measure_startup(args.commands, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+CORRELATION_DIR = os.getenv("CORRELATION_DIR", os.path.join(".cache", "correlation"))
+# Jumlah bar return untuk korelasi rolling
+CORRELATION_WINDOW = int(os.getenv("CORRELATION_WINDOW", "60"))
+# Dua saham satu klaster bila korelasinya >= ambang ini (langsung atau lewat saham lain)
+CORRELATION_THRESHOLD = float(os.getenv("CORRELATION_THRESHOLD", "0.7"))
+# Maksimal pick teratas dari satu klaster (0 = tanpa batas, tahap korelasi mati)
+MAX_PER_CLUSTER = int(os.getenv("MAX_PER_CLUSTER", "2"))
+
+
+class RollingCorrelation:
+    """Matriks korelasi return rolling yang diperbarui inkremental
+
+    Menyimpan jumlah return dan jumlah perkalian silang (X^T X) atas `window`
+    bar terakhir. Bar baru cukup menambah outer product bar itu dan
+    mengurangi outer product bar yang keluar jendela: O(N²) per bar, bukan
+    O(N²·T). Setiap `window` update jumlahnya dihitung ulang dari buffer agar
+    error floating point tidak menumpuk.
+    """
+
+    def __init__(self, symbols, window=CORRELATION_WINDOW):
+        self.symbols = list(symbols)
+        self.window = window
+        self.returns = np.zeros((0, len(self.symbols)))
+        self.total = np.zeros(len(self.symbols))
+        self.cross = np.zeros((len(self.symbols), len(self.symbols)))
+        self.last_ns = None
+        self.updates = 0
+
+    def rebuild(self):
+        """Menghitung ulang jumlah dari buffer (satu perkalian matriks)"""
+        self.total = self.returns.sum(axis=0)
+        self.cross = self.returns.T @ self.returns
+        self.updates = 0
+
+    def push(self, row):
+        if len(self.returns) == self.window:
+            old = self.returns[0]
+            self.total -= old
+            self.cross -= np.outer(old, old)
+            self.returns = self.returns[1:]
+        self.returns = np.vstack([self.returns, row])
+        self.total += row
+        self.cross += np.outer(row, row)
+        self.updates += 1
+        if self.updates >= self.window:
+            self.rebuild()
+
+    def replace_last(self, row):
+        """Mengganti bar terakhir (bar harian yang diambil saat market masih buka)"""
+        old = self.returns[-1]
+        self.total += row - old
+        self.cross += np.outer(row, row) - np.outer(old, old)
+        self.returns[-1] = row
+
+    def update(self, closes):
+        """Mendorong return bar yang lebih baru dari update terakhir
+
+        `closes` adalah panel tanggal × simbol dengan kolom = self.symbols.
+        Return yang hilang (simbol tidak trading) dianggap 0. Bar terakhir
+        update sebelumnya diganti dengan nilai terbarunya.
+        """
+        returns = closes[self.symbols].ffill().pct_change(fill_method=None).iloc[1:].fillna(0.0)
+        dates = returns.index.as_unit('ns').asi8
+        values = returns.to_numpy(copy=True)
+        if self.last_ns is None:
+            self.returns = values[-self.window:]
+            self.rebuild()
+        else:
+            if len(self.returns) and (dates == self.last_ns).any():
+                self.replace_last(values[dates == self.last_ns][-1])
+            for row in values[dates > self.last_ns]:
+                self.push(row)
+        if len(dates):
+            self.last_ns = int(max(dates[-1], self.last_ns or dates[-1]))
+
+    def corr(self):
+        n = len(self.returns)
+        if n < 2:
+            return np.eye(len(self.symbols))
+        cov = self.cross - np.outer(self.total, self.total) / n
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        # Simbol tanpa pergerakan (std 0) tidak berkorelasi dengan siapa pun
+        corr = np.nan_to_num(corr, nan=0.0, posinf=0.0, neginf=0.0)
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+    def to_arrays(self):
+        return {
+            'symbols': np.array(self.symbols),
+            'window': self.window,
+            'returns': self.returns,
+            'total': self.total,
+            'cross': self.cross,
+            'last_ns': -1 if self.last_ns is None else self.last_ns,
+            'updates': self.updates,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        state = cls([str(s) for s in arrays['symbols']], int(arrays['window']))
+        state.returns = arrays['returns']
+        state.total = arrays['total']
+        state.cross = arrays['cross']
+        state.last_ns = int(arrays['last_ns']) if int(arrays['last_ns']) >= 0 else None
+        state.updates = int(arrays['updates'])
+        return state
+
+
+def cluster_labels(corr, threshold=CORRELATION_THRESHOLD):
+    """Komponen terhubung graf korelasi >= threshold; label = indeks anggota pertama"""
+    n = len(corr)
+    adjacent = corr >= threshold
+    np.fill_diagonal(adjacent, True)
+    labels = np.arange(n)
+    # Propagasi label minimum, O(N²) per iterasi, berhenti setelah diameter graf
+    while True:
+        updated = np.where(adjacent, labels[None, :], n).min(axis=1)
+        if (updated == labels).all():
+            return labels
+        labels = updated
+
+
+class CorrelationClusters:
+    """Tahap diversifikasi: klaster korelasi return dan batas pick per klaster
+
+    State korelasi disimpan per job di `<directory>/<name>.npz`, sehingga tiap
+    run hanya mendorong bar baru. Bila daftar simbol berubah, state dibangun
+    ulang dari `window` bar terakhir (satu perkalian matriks).
+    """
+
+    def __init__(self, name, window=CORRELATION_WINDOW, threshold=CORRELATION_THRESHOLD,
+                 max_per_cluster=MAX_PER_CLUSTER, directory=CORRELATION_DIR):
+        self.path = os.path.join(directory, f"{name}.npz")
+        self.window = window
+        self.threshold = threshold
+        self.max_per_cluster = max_per_cluster
+        self.state = None
+        self.labels = {}
+
+    def load(self, symbols):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path) as arrays:
+                state = RollingCorrelation.from_arrays(arrays)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"State korelasi diabaikan ({self.path}): {e}")
+            return None
+        if state.symbols != symbols or state.window != self.window:
+            return None
+        return state
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **self.state.to_arrays())
+        os.replace(tmp_path, self.path)
+
+    def tail(self, hist):
+        """Bar yang perlu disimpan per simbol selama run: window + 1 close terakhir"""
+        return hist['Close'].iloc[-(self.window + 1):]
+
+    def update(self, closes):
+        """Memperbarui korelasi dari dict simbol -> Series close, lalu menghitung klaster"""
+        panel = pd.DataFrame(closes).sort_index()
+        symbols = sorted(panel.columns)
+        self.state = self.load(symbols) or RollingCorrelation(symbols, self.window)
+        self.state.update(panel)
+        self.save()
+
+        labels = cluster_labels(self.state.corr(), self.threshold)
+        self.labels = {symbol: symbols[label] for symbol, label in zip(symbols, labels)}
+        return self.labels
+
+    def cap(self, results, limit=None):
+        """Maksimal `max_per_cluster` hasil per klaster di depan; sisanya dipindah ke belakang
+
+        Urutan `results` (sudah diranking, boleh iterator) dipertahankan di dalam
+        tiap bagian. Dengan `limit` hanya `limit` hasil pertama yang dikembalikan
+        dan `results` berhenti dibaca begitu `limit` pick terkumpul.
+        """
+        picked, capped = [], []
+        counts = {}
+        for result in results:
+            cluster = self.labels.get(result['symbol'], result['symbol'])
+            if counts.get(cluster, 0) < self.max_per_cluster:
+                counts[cluster] = counts.get(cluster, 0) + 1
+                picked.append(result)
+                if limit is not None and len(picked) == limit:
+                    break
+            else:
+                capped.append(result)
+        for result in capped:
+            print(f"{result['symbol']} dipindah ke belakang: klaster {self.labels[result['symbol']]} "
+                  f"sudah {self.max_per_cluster} pick")
+        return (picked + capped)[:limit]
@@ -0,0 +1,116 @@
+import os
+
+import pandas as pd
+
+from universe import load_sectors
+
+# Skor lintas saham (sektor / relative strength) sebagai input net_score, default mati
+CROSS_SECTION = os.getenv("CROSS_SECTION", "").lower() in ("1", "true", "yes")
+# Panjang return untuk relative strength (bar)
+RS_LOOKBACK = int(os.getenv("RS_LOOKBACK", "20"))
+# Indeks pembanding; bila tidak tersedia dipakai rata-rata return universe
+RS_INDEX_SYMBOL = os.getenv("RS_INDEX_SYMBOL", "^JKSE")
+
+UNKNOWN_SECTOR = 'Lainnya'
+
+
+class CrossSection:
+    """Peringkat lintas saham: return sektor, relative strength dan persentil
+
+    Return `lookback` bar dihitung sekaligus pada panel close, lalu agregat
+    sektor, relative strength terhadap sektor / indeks dan persentil dihitung
+    dengan satu groupby. Poin yang ditambahkan ke net_score:
+    +1 persentil return >= strong_pct, +1 sektor mengungguli indeks,
+    -1 persentil return <= weak_pct.
+    """
+
+    def __init__(self, sectors=None, lookback=RS_LOOKBACK, index_symbol=RS_INDEX_SYMBOL,
+                 strong_pct=0.7, weak_pct=0.3):
+        self.sectors = load_sectors() if sectors is None else sectors
+        self.lookback = lookback
+        self.index_symbol = index_symbol
+        self.strong_pct = strong_pct
+        self.weak_pct = weak_pct
+
+    def tail(self, hist):
+        """Close yang perlu disimpan per simbol selama run: lookback + 1 bar terakhir"""
+        return hist['Close'].iloc[-(self.lookback + 1):]
+
+    def trailing_returns(self, data):
+        """Return `lookback` bar terakhir per simbol
+
+        `data` berisi DataFrame OHLCV atau Series close (tail()) per simbol.
+        Dipanggil sekali untuk seluruh universe: kalender tanggal gabungan (dan
+        ffill-nya) tidak bergantung pada pembagian simbol per kelompok fetch.
+        """
+        if not data:
+            return pd.Series(dtype=float)
+        # Cukup lookback + 1 bar terakhir; ffill untuk simbol yang tidak trading di tanggal tertentu
+        closes = pd.DataFrame({
+            symbol: hist if isinstance(hist, pd.Series) else self.tail(hist) for symbol, hist in data.items()
+        }).sort_index().ffill()
+        if len(closes) <= self.lookback:
+            return pd.Series(float('nan'), index=closes.columns)
+        return closes.iloc[-1] / closes.iloc[-1 - self.lookback] - 1
+
+    def rank(self, returns, index_return=None):
+        """Tabel per simbol: sektor, return sektor, relative strength, persentil dan poin"""
+        frame = pd.DataFrame({'return': returns.astype(float)})
+        frame['sector'] = frame.index.map(self.sectors).fillna(UNKNOWN_SECTOR)
+        if index_return is None or pd.isna(index_return):
+            index_return = frame['return'].mean()
+
+        by_sector = frame.groupby('sector')['return']
+        sector_return = by_sector.mean()
+        frame['sector_return'] = frame['sector'].map(sector_return)
+        frame['rs_sector'] = frame['return'] - frame['sector_return']
+        frame['rs_index'] = frame['return'] - index_return
+        frame['percentile'] = frame['return'].rank(pct=True)
+        frame['sector_percentile'] = frame['sector'].map(sector_return.rank(pct=True))
+        frame['rank_in_sector'] = by_sector.rank(pct=True)
+
+        frame['strong'] = frame['percentile'] >= self.strong_pct
+        frame['strong_sector'] = frame['sector_return'] > index_return
+        frame['weak'] = frame['percentile'] <= self.weak_pct
+        return frame
+
+    def apply(self, analyses, returns, index_return=None):
+        """Menambahkan poin lintas saham ke hasil analisis (dict baru, hasil asli tidak diubah)
+
+        Persentil dan return sektor dihitung atas seluruh `returns` (universe),
+        bukan hanya simbol yang dianalisis, sehingga tidak bergantung pada prefilter.
+        """
+        if not analyses:
+            return {}
+        symbols = returns.index.union(pd.Index(list(analyses)), sort=False)
+        ranks = self.rank(returns.reindex(symbols), index_return).to_dict('index')
+
+        adjusted = {}
+        for symbol, analysis in analyses.items():
+            rank = ranks[symbol]
+            details = list(analysis['signal_details'])
+            bullish, bearish = analysis['bullish_signals'], analysis['bearish_signals']
+            if rank['strong']:
+                bullish += 1
+                details.append(f"RS kuat (persentil {rank['percentile'] * 100:.0f})")
+            if rank['strong_sector']:
+                bullish += 1
+                details.append(f"Sektor {rank['sector']} di atas indeks")
+            if rank['weak']:
+                bearish += 1
+                details.append(f"RS lemah (persentil {rank['percentile'] * 100:.0f})")
+
+            adjusted[symbol] = {
+                **analysis,
+                'sector': rank['sector'],
+                'return': rank['return'],
+                'sector_return': rank['sector_return'],
+                'rs_sector': rank['rs_sector'],
+                'rs_index': rank['rs_index'],
+                'rs_percentile': rank['percentile'],
+                'bullish_signals': bullish,
+                'bearish_signals': bearish,
+                'net_score': bullish - bearish,
+                'signal_details': details,
+            }
+        return adjusted
@@ -0,0 +1,354 @@
+"""Mode daemon: scanner dan trading bot berjalan terus dengan data hangat di memori
+
+Histori harga, state indikator streaming dan hasil run terakhir disimpan di
+memori; setelah run pertama tiap refresh hanya mengambil dan menghitung bar baru.
+Jadwal workflow (Senin-Jumat, jam WIB) dijalankan sendiri, dan perintah
+Telegram dijawab langsung dari state tersebut tanpa mengunduh / menghitung ulang:
+
+    /scan            top 5 hasil screening terakhir
+    /top 10          top N hasil screening terakhir
+    /signal BBCA     indikator, skor swing dan sinyal beli satu saham
+    /bot             rekomendasi trading bot terakhir
+    /refresh         ambil data terbaru dan hitung ulang (tanpa laporan terjadwal)
+
+    python daemon.py
+    python daemon.py --no-schedule --refresh-minutes 0
+    TELEGRAM_API_URL=http://127.0.0.1:8081 python daemon.py   # Bot API lokal / palsu
+"""
+import argparse
+import asyncio
+import html
+import os
+import textwrap
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from telegram.ext import Application, CommandHandler, filters
+
+import scanner
+import trading_bot
+from correlation import MAX_PER_CLUSTER, CorrelationClusters
+from cross_section import CROSS_SECTION, CrossSection
+from instrumentation import RunMetrics, reset_provider_stats
+from monte_carlo import MC_PATHS, PortfolioSimulator
+from precompute import WarmIndicators
+from replay import provider_from_env
+from telegram_delivery import TELEGRAM_API_URL, parse_chat_ids, split_message
+from timeframes import TimeframeProvider, job_name
+from universe import normalize_symbol
+
+WIB = timezone(timedelta(hours=7), 'WIB')
+
+# Jadwal yang sama dengan workflow GitHub Actions: jam WIB=job, hanya hari kerja
+DAEMON_SCHEDULE = os.getenv(
+    "DAEMON_SCHEDULE",
+    "07:00=trading_bot,08:00=scanner,08:00=trading_bot,15:00=scanner,15:00=trading_bot",
+)
+# Refresh data tanpa mengirim laporan selama jam bursa (menit, 0 = mati)
+DAEMON_REFRESH_MINUTES = int(os.getenv("DAEMON_REFRESH_MINUTES", "30"))
+
+# Jam perdagangan IDX (WIB), termasuk pre-opening dan post-trading
+IDX_OPEN_HOUR = 9
+IDX_CLOSE_HOUR = 16
+
+JOBS = {'scanner': scanner, 'trading_bot': trading_bot}
+
+# Batas /top N agar balasan tetap beberapa pesan saja
+MAX_TOP = 50
+
+NOT_READY = "⏳ Data belum siap, daemon masih memuat data awal."
+
+
+def parse_schedule(value):
+    """'07:00=trading_bot,08:00=scanner' -> [((7, 0), 'trading_bot'), ((8, 0), 'scanner')]"""
+    schedule = []
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        at, _, job = item.strip().partition('=')
+        if job not in JOBS:
+            raise ValueError(f"Job tidak dikenal di jadwal: {item} (pilih {', '.join(JOBS)})")
+        hour, minute = (int(part) for part in at.split(':'))
+        schedule.append(((hour, minute), job))
+    return sorted(schedule)
+
+
+def next_run(schedule, now):
+    """Waktu jadwal berikutnya (hari kerja) setelah `now` beserta job-job pada waktu itu"""
+    now = now.astimezone(WIB)
+    for days in range(8):
+        day = now.date() + timedelta(days=days)
+        if day.weekday() >= 5:
+            continue
+        for (hour, minute), _ in schedule:
+            at = datetime(day.year, day.month, day.day, hour, minute, tzinfo=WIB)
+            if at > now:
+                return at, [job for slot, job in schedule if slot == (hour, minute)]
+    return None, []
+
+
+def is_market_hours(now):
+    now = now.astimezone(WIB)
+    return now.weekday() < 5 and IDX_OPEN_HOUR <= now.hour < IDX_CLOSE_HOUR
+
+
+class StockDaemon:
+    """State hangat scanner + trading bot, dengan run dieksekusi di satu thread worker
+
+    Semua akses provider dan cache SQLite terjadi di thread worker yang sama,
+    sedangkan perintah Telegram hanya membaca hasil dan snapshot di memori.
+    """
+
+    def __init__(self, interval=scanner.TIMEFRAME, runners=None):
+        # Satu worker: run tidak tumpang tindih dan koneksi SQLite tetap di thread pembuatnya
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='daemon')
+        self.runners = runners or self.executor.submit(self._build_runners, interval).result()
+        self.results = {job: None for job in self.runners}
+        self.updated_at = {job: None for job in self.runners}
+
+    @staticmethod
+    def _build_runners(interval):
+        # Satu provider untuk kedua job: cache OHLCV dan koneksi HTTP dipakai bersama
+        provider = provider_from_env() or TimeframeProvider()
+        return {
+            'scanner': scanner.IndonesiaStockScreener(
+                provider=provider, interval=interval, keep_state=True,
+                cross_section=CrossSection() if CROSS_SECTION else None,
+                clusters=CorrelationClusters(job_name('scanner', interval)) if MAX_PER_CLUSTER else None,
+                precomputed=WarmIndicators(job_name('scanner', interval), interval, scanner.PERIODS[interval])),
+            'trading_bot': trading_bot.IndonesiaStockTradingBot(
+                provider=provider, interval=interval, keep_state=True,
+                clusters=CorrelationClusters(job_name('trading_bot', interval)) if MAX_PER_CLUSTER else None,
+                simulator=PortfolioSimulator() if MC_PATHS else None,
+                precomputed=WarmIndicators(job_name('trading_bot', interval), interval,
+                                           trading_bot.PERIODS[interval])),
+        }
+
+    def run_job(self, job, publish=False):
+        """Menjalankan satu job dan memperbarui state hangat (di thread worker)"""
+        runner = self.runners[job]
+        # Metrics dan statistik provider per run, bukan akumulasi sejak daemon mulai
+        runner.metrics = RunMetrics(runner.job)
+        reset_provider_stats(runner.provider)
+
+        if job == 'scanner':
+            results = runner.screen_stocks(min_score=1)
+        else:
+            results = runner.run_analysis()
+        if isinstance(runner.precomputed, WarmIndicators):
+            runner.precomputed.advance()
+        self.results[job] = results
+        self.updated_at[job] = datetime.now(WIB)
+
+        if publish:
+            module = JOBS[job]
+            module.publish(runner, results[:module.RESULT_TOP_K])
+        return results
+
+    async def submit(self, job, publish=False):
+        """Menjalankan job di thread worker tanpa memblokir event loop Telegram"""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self.run_job, job, publish)
+        except Exception as e:
+            print(f"Error menjalankan {job}: {str(e)}")
+            return False
+        print(f"{job} selesai dalam {time.perf_counter() - started:.1f} detik")
+        return True
+
+    async def refresh(self):
+        results = [await self.submit(job) for job in self.runners]
+        return all(results)
+
+    async def run_schedule(self, schedule):
+        while True:
+            at, jobs = next_run(schedule, datetime.now(WIB))
+            if at is None:
+                return
+            print(f"Jadwal berikutnya: {at:%Y-%m-%d %H:%M} WIB ({', '.join(jobs)})")
+            await asyncio.sleep(max(0.0, (at - datetime.now(WIB)).total_seconds()))
+            for job in jobs:
+                await self.submit(job, publish=True)
+
+    async def run_refresh(self, minutes):
+        while True:
+            await asyncio.sleep(minutes * 60)
+            if is_market_hours(datetime.now(WIB)):
+                await self.refresh()
+
+    def _data_time(self, job):
+        return f"🕒 Data per {self.updated_at[job]:%d-%m-%Y %H:%M} WIB"
+
+    def scan_message(self, limit=5):
+        if self.results['scanner'] is None:
+            return NOT_READY
+        message = self.runners['scanner'].compose_message(self.results['scanner'], limit=limit)
+        return f"{message}\n\n{self._data_time('scanner')}"
+
+    def bot_message(self, limit=5):
+        if self.results['trading_bot'] is None:
+            return NOT_READY
+        message = self.runners['trading_bot'].compose_message(self.results['trading_bot'], limit=limit)
+        return f"{message}\n\n{self._data_time('trading_bot')}"
+
+    def signal_message(self, symbol):
+        """Ringkasan satu saham dari snapshot indikator di memori (HTML)"""
+        if self.results['scanner'] is None and self.results['trading_bot'] is None:
+            return NOT_READY
+        screener, bot = self.runners['scanner'], self.runners['trading_bot']
+        swing_snapshot = screener.snapshots.get(symbol)
+        bot_snapshot = bot.snapshots.get(symbol)
+        # Simbol berasal dari teks pengguna dan dikirim dengan parse_mode HTML
+        name = html.escape(symbol)
+        if swing_snapshot is None and bot_snapshot is None:
+            return (f"❓ <code>{name}</code> tidak ada di data terakhir "
+                    "(di luar universe atau tidak lolos prefilter).")
+
+        snapshot = swing_snapshot or bot_snapshot
+        message = f"📈 <b>{name}</b> | Harga: <b>Rp {snapshot['price']:,.0f}</b>"
+        hist = screener.history.get(symbol)
+        if hist is None:
+            hist = bot.history.get(symbol)
+        if hist is not None and len(hist) >= 2:
+            message += f" ({(hist['Close'].iloc[-1] / hist['Close'].iloc[-2] - 1) * 100:+.1f}%)"
+        message += "\n\n"
+
+        if swing_snapshot is not None:
+            stock = screener.evaluate_swing_criteria(swing_snapshot)
+            message += (
+                f"<b>Swing</b>: Net Score <b>{stock['net_score']}</b> "
+                f"(Bullish: {stock['bullish_signals']}, Bearish: {stock['bearish_signals']})\n"
+                f"   - RSI: {stock['rsi']:.1f}, MACD: {stock['macd']:.3f} (Signal: {stock['macd_signal']:.3f})\n"
+                f"   - Stochastic K: {stock['stoch_k']:.1f}, D: {stock['stoch_d']:.1f}\n"
+                f"   - Bollinger Position: {stock['bb_position']}, "
+                f"Volume Spike: {'Ya' if stock['volume_spike'] else 'Tidak'}\n"
+                f"   - Sinyal: {html.escape(', '.join(stock['signal_details'])) or '-'}\n\n"
+            )
+        if bot_snapshot is not None:
+            trend = bot.evaluate_trend(bot_snapshot)
+            analysis = bot.analyze_stock(symbol, snapshot=bot_snapshot)
+            message += f"<b>Trading bot</b>: Tren {trend.capitalize()}\n"
+            if analysis:
+                message += (
+                    f"   - Beli: <b>Rp {analysis['buy_price']:,.0f}</b>\n"
+                    f"   - TP: <b>Rp {analysis['take_profit']:,.0f}</b> (+{analysis['potential_profit']:.1f}%)\n"
+                    f"   - SL: <b>Rp {analysis['stop_loss']:,.0f}</b> (-{analysis['risk']:.1f}%)\n\n"
+                )
+            else:
+                message += "   - Belum ada sinyal beli\n\n"
+
+        job = 'scanner' if swing_snapshot is not None else 'trading_bot'
+        return message + self._data_time(job)
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def chat_filter(chat_ids):
+    """Hanya chat di TELEGRAM_CHAT_ID yang dilayani (angka = chat id, selain itu username)"""
+    ids = parse_chat_ids(chat_ids)
+    numeric = [chat_id for chat_id in ids if chat_id.lstrip('-').isdigit()]
+    return filters.Chat(
+        chat_id=[int(chat_id) for chat_id in numeric],
+        username=[chat_id.lstrip('@') for chat_id in ids if chat_id not in numeric],
+    )
+
+
+def build_application(daemon, token=scanner.TOKEN, chat_ids=scanner.CHAT_ID, api_url=TELEGRAM_API_URL,
+                      schedule=(), refresh_minutes=DAEMON_REFRESH_MINUTES):
+    """Aplikasi python-telegram-bot (long polling) yang menjawab perintah dari state daemon"""
+    api_url = api_url.rstrip('/')
+    application = (
+        Application.builder()
+        .token(token)
+        .base_url(f"{api_url}/bot")
+        .base_file_url(f"{api_url}/file/bot")
+        .post_init(lambda app: _start_tasks(app, daemon, schedule, refresh_minutes))
+        .post_shutdown(lambda app: _stop_tasks(app, daemon))
+        .build()
+    )
+    allowed = chat_filter(chat_ids)
+
+    async def reply(update, text, parse_mode='HTML'):
+        for chunk in split_message(text):
+            await update.effective_message.reply_text(chunk, parse_mode=parse_mode)
+
+    async def help_command(update, context):
+        await reply(update, textwrap.dedent(__doc__.split('\n\n')[2]), parse_mode=None)
+
+    async def scan(update, context):
+        await reply(update, daemon.scan_message())
+
+    async def top(update, context):
+        try:
+            limit = int(context.args[0]) if context.args else 10
+        except ValueError:
+            await reply(update, "Format: /top 10", parse_mode=None)
+            return
+        await reply(update, daemon.scan_message(limit=min(max(limit, 1), MAX_TOP)))
+
+    async def signal(update, context):
+        if not context.args:
+            await reply(update, "Format: /signal BBCA", parse_mode=None)
+            return
+        await reply(update, daemon.signal_message(normalize_symbol(context.args[0])))
+
+    async def bot_command(update, context):
+        await reply(update, daemon.bot_message(), parse_mode='Markdown')
+
+    async def refresh(update, context):
+        await reply(update, "🔄 Mengambil data terbaru...", parse_mode=None)
+        if await daemon.refresh():
+            await reply(update, daemon.scan_message())
+        else:
+            await reply(update, "⚠️ Refresh gagal, lihat log daemon.", parse_mode=None)
+
+    application.add_handler(CommandHandler(['start', 'help'], help_command, filters=allowed))
+    application.add_handler(CommandHandler('scan', scan, filters=allowed))
+    application.add_handler(CommandHandler('top', top, filters=allowed))
+    application.add_handler(CommandHandler('signal', signal, filters=allowed))
+    application.add_handler(CommandHandler('bot', bot_command, filters=allowed))
+    # block=False: perintah lain tetap dijawab selama refresh berjalan
+    application.add_handler(CommandHandler('refresh', refresh, filters=allowed, block=False))
+    return application
+
+
+async def _start_tasks(application, daemon, schedule, refresh_minutes):
+    tasks = [asyncio.create_task(daemon.refresh())]
+    if schedule:
+        tasks.append(asyncio.create_task(daemon.run_schedule(schedule)))
+    if refresh_minutes:
+        tasks.append(asyncio.create_task(daemon.run_refresh(refresh_minutes)))
+    application.bot_data['daemon_tasks'] = tasks
+
+
+async def _stop_tasks(application, daemon):
+    for task in application.bot_data.get('daemon_tasks', []):
+        task.cancel()
+    daemon.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--interval', default=scanner.TIMEFRAME, help='Timeframe: 1h, 4h, 1d, 1wk')
+    parser.add_argument('--no-schedule', action='store_true', help='Hanya melayani perintah, tanpa laporan terjadwal')
+    parser.add_argument('--refresh-minutes', type=int, default=DAEMON_REFRESH_MINUTES)
+    args = parser.parse_args()
+
+    if not scanner.TOKEN:
+        print("TELEGRAM_BOT_TOKEN belum di-set, daemon tidak bisa menerima perintah.")
+        return
+    if not parse_chat_ids(scanner.CHAT_ID):
+        print("TELEGRAM_CHAT_ID kosong: perintah dari chat mana pun akan diabaikan.")
+
+    daemon = StockDaemon(interval=args.interval)
+    schedule = () if args.no_schedule else parse_schedule(DAEMON_SCHEDULE)
+    application = build_application(daemon, schedule=schedule, refresh_minutes=args.refresh_minutes)
+    print("Daemon berjalan, menunggu perintah Telegram...")
+    application.run_polling(allowed_updates=['message'])
+
+
+if __name__ == "__main__":
+    main()
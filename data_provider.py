@@ -0,0 +1,239 @@
+import ast
+import logging
+import re
+import threading
+
+import pandas as pd
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Padanan parameter `period` Yahoo Finance ke offset tanggal
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+
+# Pesan error yfinance yang berarti throttling / gangguan sementara; error lain
+# (delisted, tanpa data, simbol salah) tidak akan berubah dengan diulang
+RATE_LIMIT_MARKERS = ('YFRateLimitError', 'Too Many Requests', 'Rate limited')
+TRANSIENT_MARKERS = ('Timeout', 'timed out', 'ConnectionError', 'Connection aborted',
+                     'Connection reset', 'Bad Gateway', 'Service Unavailable', 'Gateway Timeout')
+
+
+class RetryableFetchError(Exception):
+    """Request gagal sementara (rate limit, timeout, 5xx) dan layak diulang
+
+    `data` berisi simbol yang sudah berhasil dalam request yang sama,
+    `symbols` simbol yang perlu diulang (None: seluruh request).
+    """
+
+    def __init__(self, message='Request gagal sementara', retry_after=None, symbols=None, data=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.symbols = symbols
+        self.data = data or {}
+
+
+class RateLimitError(RetryableFetchError):
+    """Dilempar provider ketika server membalas 429 / rate limited"""
+
+    def __init__(self, message='Rate limited', retry_after=None, symbols=None, data=None):
+        super().__init__(message, retry_after, symbols, data)
+
+
+def classify_error(message):
+    """'rate_limit', 'transient' atau None untuk error permanen"""
+    if any(marker in message for marker in RATE_LIMIT_MARKERS):
+        return 'rate_limit'
+    if any(marker in message for marker in TRANSIENT_MARKERS):
+        return 'transient'
+    return None
+
+
+def period_start(period, end):
+    """Menghitung tanggal awal dari sebuah `period` relatif terhadap `end`"""
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return pd.Timestamp(year=end.year, month=1, day=1, tz=end.tz)
+    if period not in PERIOD_OFFSETS:
+        raise ValueError(f"Period tidak dikenal: {period}")
+    return end - PERIOD_OFFSETS[period]
+
+
+def trim_to_period(hist, period):
+    """Memotong data historis agar sesuai dengan `period`"""
+    if hist.empty:
+        return hist
+    start = period_start(period, hist.index[-1])
+    if start is None:
+        return hist
+    return hist[hist.index > start]
+
+
+def filter_min_bars(data, min_bars):
+    """Membuang simbol yang datanya kurang dari `min_bars` bar"""
+    return {
+        symbol: hist for symbol, hist in data.items()
+        if hist is not None and len(hist) >= min_bars
+    }
+
+
+class _DownloadErrors(logging.Handler):
+    """Menangkap error per ticker yang dicatat yf.download di thread pemanggil
+
+    yf.download tidak melempar error per ticker, hanya mencatatnya sebagai
+    "['A.JK', 'B.JK']: <error>" di logger `yfinance`.
+    """
+
+    PATTERN = re.compile(r"^\s*\[(.*?)\]: (.*)$", re.S)
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.thread = threading.get_ident()
+        self.errors = {}
+
+    def emit(self, record):
+        if record.thread != self.thread:
+            return
+        match = self.PATTERN.match(record.getMessage())
+        if not match:
+            return
+        try:
+            symbols = ast.literal_eval(f"[{match.group(1)}]")
+        except (ValueError, SyntaxError):
+            return
+        for symbol in symbols:
+            self.errors[str(symbol).upper()] = match.group(2)
+
+    def __enter__(self):
+        logging.getLogger('yfinance').addHandler(self)
+        return self
+
+    def __exit__(self, *exc):
+        logging.getLogger('yfinance').removeHandler(self)
+
+
+def _yfinance():
+    # Import yfinance (~0.4 detik) ditunda sampai benar-benar mengunduh, sehingga
+    # jalur yang hanya membaca cache / panel tidak membayarnya
+    import yfinance
+    return yfinance
+
+
+class YahooDataProvider:
+    """Provider data OHLCV dari Yahoo Finance dengan request batch
+
+    Dengan `raise_errors=True` error sementara per batch (rate limit, timeout)
+    dilempar sebagai RetryableFetchError / RateLimitError berisi simbol yang
+    perlu diulang, untuk dipakai ConcurrentFetcher. Simbol delisted / tanpa
+    data hanya dilewati.
+    """
+
+    def __init__(self, batch_size=50, threads=True, raise_errors=False):
+        self.batch_size = batch_size
+        self.threads = threads
+        self.raise_errors = raise_errors
+
+    def fetch(self, symbols, period='3mo', interval='1d', start=None):
+        """Mengambil data banyak saham sekaligus, hasil per simbol"""
+        results = {}
+        # `start` dipakai untuk refresh inkremental, menggantikan `period`
+        span = {'start': start} if start is not None else {'period': period}
+        symbols = list(dict.fromkeys(symbols))
+        throttled, transient = [], []
+
+        yf = _yfinance()
+        for i in range(0, len(symbols), self.batch_size):
+            batch = symbols[i:i + self.batch_size]
+            try:
+                with _DownloadErrors() as errors:
+                    raw = yf.download(
+                        batch,
+                        interval=interval,
+                        group_by='ticker',
+                        auto_adjust=True,
+                        actions=False,
+                        threads=self.threads,
+                        progress=False,
+                        **span,
+                    )
+            except Exception as e:
+                kind = classify_error(repr(e))
+                if self.raise_errors and kind is not None:
+                    (throttled if kind == 'rate_limit' else transient).extend(batch)
+                    continue
+                if self.raise_errors:
+                    raise
+                print(f"Error fetching batch {batch[0]}..{batch[-1]}: {str(e)}")
+                continue
+
+            frames = self._split_batch(raw, batch)
+            results.update(frames)
+            for symbol in batch:
+                kind = classify_error(errors.errors.get(symbol.upper(), ''))
+                if symbol not in frames and kind == 'rate_limit':
+                    throttled.append(symbol)
+                elif symbol not in frames and kind == 'transient':
+                    transient.append(symbol)
+
+        if self.raise_errors and throttled:
+            raise RateLimitError(f"Rate limited: {len(throttled)} simbol",
+                                 symbols=throttled + transient, data=results)
+        if self.raise_errors and transient:
+            raise RetryableFetchError(f"Error sementara: {len(transient)} simbol",
+                                      symbols=transient, data=results)
+        return results
+
+    def _split_batch(self, raw, batch):
+        """Memecah hasil `yf.download` menjadi DataFrame per simbol"""
+        frames = {}
+        if raw is None or raw.empty:
+            return frames
+
+        for symbol in batch:
+            if isinstance(raw.columns, pd.MultiIndex):
+                if symbol not in raw.columns.get_level_values(0):
+                    continue
+                hist = raw[symbol]
+            else:
+                hist = raw
+
+            hist = hist[[c for c in OHLCV_COLUMNS if c in hist.columns]]
+            # Ticker dengan tanggal libur berbeda menghasilkan baris NaN
+            hist = hist.dropna(how='all')
+            if not hist.empty:
+                frames[symbol] = hist
+
+        return frames
+
+
+class FakeDataProvider:
+    """Provider data lokal untuk pengujian tanpa jaringan"""
+
+    def __init__(self, frames=None):
+        self.frames = dict(frames or {})
+        self.calls = []
+
+    def fetch(self, symbols, period='3mo', interval='1d', start=None):
+        """Mengembalikan data yang tersimpan untuk simbol yang diminta"""
+        symbols = list(symbols)
+        self.calls.append((symbols, period, interval, start))
+        results = {}
+        for symbol in symbols:
+            if symbol not in self.frames:
+                continue
+            hist = self.frames[symbol]
+            if start is not None:
+                results[symbol] = hist[hist.index.date >= pd.Timestamp(start).date()]
+            else:
+                results[symbol] = trim_to_period(hist, period)
+        return results
@@ -0,0 +1,147 @@
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from data_provider import RateLimitError, RetryableFetchError
+
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+FETCH_RATE_PER_SEC = float(os.getenv("FETCH_RATE_PER_SEC", "10"))
+# Simbol per request: satu token bucket per batch, bukan per simbol
+FETCH_CHUNK_SIZE = int(os.getenv("FETCH_CHUNK_SIZE", "50"))
+
+# latency: waktu satu chunk dari request pertama sampai selesai, termasuk retry dan backoff
+FetchResult = namedtuple('FetchResult', ['symbols', 'latency', 'attempts', 'error'])
+
+
+class TokenBucket:
+    """Token bucket thread-safe yang menurunkan laju saat terkena throttling"""
+
+    def __init__(self, rate=FETCH_RATE_PER_SEC, capacity=None, min_rate=0.2):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Menunggu sampai satu token tersedia"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttle(self, retry_after=None):
+        """Laju dibagi dua; token dikosongkan selama `retry_after` detik"""
+        with self.lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+            if retry_after:
+                self.tokens -= retry_after * self.rate
+
+    def recover(self):
+        """Menaikkan laju kembali secara bertahap setelah request sukses"""
+        with self.lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+
+class ConcurrentFetcher:
+    """Mengambil data secara paralel lewat provider, dibatasi token bucket
+
+    Tiap chunk `chunk_size` simbol adalah satu request. Hanya error sementara
+    (RetryableFetchError, termasuk RateLimitError) yang diulang dengan backoff,
+    dan hanya untuk simbol yang gagal; error lain langsung dilaporkan.
+    """
+
+    def __init__(self, provider, max_workers=FETCH_MAX_WORKERS, bucket=None,
+                 chunk_size=FETCH_CHUNK_SIZE, max_retries=4, backoff=0.5, max_backoff=30.0):
+        self.provider = provider
+        self.max_workers = max_workers
+        self.bucket = bucket or TokenBucket()
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.results = []
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        delay += random.uniform(0, delay / 2)
+        return max(delay, retry_after or 0)
+
+    def _fetch_chunk(self, chunk, period, interval, start):
+        """Satu request dengan retry + exponential backoff untuk error sementara"""
+        attempt = 0
+        data = {}
+        pending = chunk
+        self.bucket.acquire()
+        started = time.monotonic()
+        while True:
+            try:
+                data.update(self.provider.fetch(pending, period=period, interval=interval, start=start))
+            except RetryableFetchError as e:
+                if isinstance(e, RateLimitError):
+                    self.bucket.throttle(e.retry_after)
+                data.update(e.data)
+                pending = [symbol for symbol in (e.symbols or pending) if symbol not in data]
+                error, retry_after = e, e.retry_after
+            except Exception as e:
+                return data, FetchResult(chunk, time.monotonic() - started, attempt + 1, e)
+            else:
+                self.bucket.recover()
+                return data, FetchResult(chunk, time.monotonic() - started, attempt + 1, None)
+
+            if not pending or attempt >= self.max_retries:
+                return data, FetchResult(chunk, time.monotonic() - started, attempt + 1, error if pending else None)
+            time.sleep(self._backoff_delay(attempt, retry_after))
+            attempt += 1
+            self.bucket.acquire()
+
+    def iter_fetch(self, symbols, period='3mo', interval='1d', start=None):
+        """Menghasilkan data per request begitu selesai, tanpa menunggu semua simbol"""
+        symbols = list(dict.fromkeys(symbols))
+        chunks = [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._fetch_chunk, chunk, period, interval, start)
+                for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                data, result = future.result()
+                self.results.append(result)
+                if result.error is not None:
+                    print(f"Error fetching {', '.join(result.symbols)}: {str(result.error)}")
+                if data:
+                    yield data
+
+    def fetch(self, symbols, period='3mo', interval='1d', start=None):
+        """Sama seperti iter_fetch, tapi hasilnya digabung jadi satu dict"""
+        results = {}
+        for data in self.iter_fetch(symbols, period=period, interval=interval, start=start):
+            results.update(data)
+        return results
+
+
+def iter_provider(provider, symbols, **kwargs):
+    """Memakai iter_fetch provider bila ada, selain itu satu kali fetch"""
+    if hasattr(provider, 'iter_fetch'):
+        yield from provider.iter_fetch(symbols, **kwargs)
+    else:
+        yield provider.fetch(symbols, **kwargs)
@@ -0,0 +1,205 @@
+import functools
+import inspect
+
+import numpy as np
+import pandas as pd
+
+import indicators
+
+
+def build_panel(data, field):
+    """Menyusun satu kolom OHLCV semua simbol menjadi panel tanggal × simbol"""
+    return pd.DataFrame({symbol: hist[field] for symbol, hist in data.items()}).sort_index()
+
+
+class _GapLayout:
+    """Memadatkan baris valid tiap simbol agar rolling/ewm tidak melewati celah
+
+    Panel gabungan berisi NaN pada tanggal ketika sebuah simbol tidak punya bar
+    (suspensi, jam tanpa transaksi). Di sini baris valid tiap kolom digeser ke
+    bawah secara berurutan sehingga indikator dihitung atas bar simbol itu
+    sendiri, sama dengan jalur per-Series, lalu hasilnya dikembalikan ke
+    tanggal aslinya.
+    """
+
+    def __init__(self, valid, index, columns):
+        self.index = index
+        self.columns = columns
+        counts = valid.sum(axis=0)
+        target = len(valid) - counts + valid.cumsum(axis=0) - 1
+        self.rows, self.cols = np.nonzero(valid)
+        self.target = target[self.rows, self.cols]
+
+    @classmethod
+    def detect(cls, close):
+        """_GapLayout bila ada simbol dengan celah di tengah historinya, selain itu None"""
+        valid = close.notna().to_numpy()
+        if not valid.size:
+            return None
+        counts = valid.sum(axis=0)
+        first = valid.argmax(axis=0)
+        last = len(valid) - 1 - valid[::-1].argmax(axis=0)
+        if not ((counts > 0) & (counts < last - first + 1)).any():
+            return None
+        return cls(valid, close.index, close.columns)
+
+    def compact(self, frame):
+        values = frame.to_numpy()
+        out = np.full(values.shape, np.nan, dtype=np.result_type(values.dtype, np.float16))
+        out[self.target, self.cols] = values[self.rows, self.cols]
+        return pd.DataFrame(out, columns=self.columns)
+
+    def expand(self, result):
+        if isinstance(result, tuple):
+            return tuple(self.expand(part) for part in result)
+        values = result.to_numpy()
+        out = np.full(values.shape, np.nan, dtype=np.result_type(values.dtype, np.float16))
+        out[self.rows, self.cols] = values[self.target, self.cols]
+        return pd.DataFrame(out, index=self.index, columns=self.columns)
+
+
+def _memoize(method):
+    """Menyimpan hasil indikator per kombinasi parameter dalam satu panel
+
+    Bila panel punya celah, indikator dihitung pada panel rapat (_GapLayout)
+    dan hasilnya disejajarkan kembali ke kalender gabungan.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__, tuple(bound.arguments.items())[1:])
+        if key not in self._memo:
+            if self._gaps is None:
+                self._memo[key] = method(self, *args, **kwargs)
+            else:
+                self._memo[key] = self._gaps.expand(wrapper(self._compact, *args, **kwargs))
+        return self._memo[key]
+
+    return wrapper
+
+
+class IndicatorPanel:
+    """Menghitung indikator untuk seluruh simbol sekaligus (panel tanggal × simbol)
+
+    Rumus diambil dari indicators.py (sama dengan jalur per-Series di
+    scanner.py / trading_bot.py), hanya saja rolling/ewm dijalankan pada semua
+    kolom dalam satu panggilan. Tiap simbol dihitung atas barisnya sendiri
+    (Close tidak NaN), sehingga tanggal yang hanya dimiliki simbol lain tidak
+    menyisipkan NaN ke historinya.
+    Hasil tiap indikator di-memoize per parameter, sehingga kombinasi
+    parameter yang berbagi indikator (mis. parameter sweep) tidak menghitung ulang.
+    """
+
+    def __init__(self, data):
+        self.open = build_panel(data, 'Open')
+        self.close = build_panel(data, 'Close')
+        self.high = build_panel(data, 'High')
+        self.low = build_panel(data, 'Low')
+        self.volume = build_panel(data, 'Volume')
+        self.symbols = list(self.close.columns)
+        self._memo = {}
+        self._detect_gaps()
+
+    @classmethod
+    def from_panels(cls, open, high, low, close, volume):
+        """Membuat panel dari DataFrame tanggal × simbol yang sudah jadi, tanpa menyalin data"""
+        panel = cls.__new__(cls)
+        panel.open, panel.high, panel.low, panel.close, panel.volume = open, high, low, close, volume
+        panel.symbols = list(close.columns)
+        panel._memo = {}
+        panel._detect_gaps()
+        return panel
+
+    def _detect_gaps(self):
+        self._gaps = _GapLayout.detect(self.close)
+        if self._gaps is not None:
+            self._compact = IndicatorPanel.from_panels(
+                *(self._gaps.compact(panel) for panel in (self.open, self.high, self.low, self.close, self.volume))
+            )
+
+    @_memoize
+    def rsi(self, window=14):
+        """Menghitung RSI (Relative Strength Index)"""
+        return indicators.rsi(self.close, window)
+
+    @_memoize
+    def ema(self, span):
+        """Exponential moving average harga penutupan"""
+        return indicators.ema(self.close, span)
+
+    @_memoize
+    def macd(self, fast=12, slow=26, signal=9):
+        """Menghitung MACD"""
+        return indicators.macd_from_ema(self.ema(fast), self.ema(slow), signal)
+
+    @_memoize
+    def rolling_std(self, window):
+        """Standar deviasi rolling harga penutupan"""
+        return indicators.rolling_std(self.close, window)
+
+    @_memoize
+    def bollinger_bands(self, window=20, num_std=2):
+        """Menghitung Bollinger Bands"""
+        return indicators.bands(self.sma(window), self.rolling_std(window), num_std)
+
+    @_memoize
+    def stochastic(self, k_window=14, d_window=3):
+        """Menghitung Stochastic Oscillator"""
+        return indicators.stochastic(self.high, self.low, self.close, k_window, d_window)
+
+    @_memoize
+    def atr(self, window=14):
+        """Menghitung Average True Range (ATR)"""
+        return indicators.atr(self.high, self.low, self.close, window)
+
+    @_memoize
+    def sma(self, window, field='close'):
+        """Menghitung simple moving average"""
+        return indicators.sma(getattr(self, field), window)
+
+    def latest(self, **panels):
+        """Mengambil nilai tiap panel pada bar terakhir masing-masing simbol"""
+        valid = self.close.notna().to_numpy()
+        last_pos = len(valid) - 1 - valid[::-1].argmax(axis=0)
+        cols = np.arange(len(self.symbols))
+        return pd.DataFrame(
+            {name: panel.to_numpy()[last_pos, cols] for name, panel in panels.items()},
+            index=self.close.columns,
+        )
+
+    def fields(self, names=None, rsi_window=14, macd_spans=(12, 26, 9), bb=(20, 2)):
+        """Panel tanggal × simbol per nama field aturan (rules/*.json), dihitung sesuai kebutuhan"""
+        builders = {
+            'price': lambda: self.close,
+            'rsi': lambda: self.rsi(rsi_window),
+            'macd': lambda: self.macd(*macd_spans)[0],
+            'macd_signal': lambda: self.macd(*macd_spans)[1],
+            'stoch_k': lambda: self.stochastic()[0],
+            'stoch_d': lambda: self.stochastic()[1],
+            'ma_20': lambda: self.sma(20),
+            'ma_50': lambda: self.sma(50),
+            'ma_200': lambda: self.sma(200),
+            'bb_upper': lambda: self.bollinger_bands(*bb)[0],
+            'bb_lower': lambda: self.bollinger_bands(*bb)[2],
+            'volume': lambda: self.volume,
+            'avg_volume': lambda: self.sma(20, field='volume'),
+            'atr': lambda: self.atr(),
+        }
+        names = list(builders) if names is None else list(names)
+        unknown = [name for name in names if name not in builders]
+        if unknown:
+            raise ValueError(f"Field aturan tidak dikenal: {', '.join(unknown)} (tersedia: {', '.join(builders)})")
+        return {name: builders[name]() for name in names}
+
+    def latest_fields(self):
+        """Semua field pada bar terakhir tiap simbol, DataFrame simbol × field"""
+        return self.latest(**self.fields())
+
+    def snapshot(self):
+        """Nilai indikator terkini per simbol, untuk swing_trading_criteria dan get_buy_signal"""
+        if not self.symbols:
+            return {}
+        return self.latest_fields().to_dict('index')
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+def sma(values, window):
+    """Menghitung simple moving average"""
+    return values.rolling(window=window).mean()
+
+
+def ema(values, span):
+    """Exponential moving average"""
+    return values.ewm(span=span).mean()
+
+
+def rolling_std(values, window):
+    """Standar deviasi rolling (ddof=1)"""
+    return values.rolling(window=window).std()
+
+
+def rsi(prices, window=14):
+    """Menghitung RSI (Relative Strength Index)"""
+    delta = prices.diff()
+    # Baris tanpa harga (awal histori yang lebih pendek dalam panel) tetap NaN, bukan gain/loss 0
+    has_price = prices.notna()
+    gain = (delta.where(delta > 0, 0)).where(has_price).rolling(window=window).mean()
+    loss = (-delta.where(delta < 0, 0)).where(has_price).rolling(window=window).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def macd(prices, fast=12, slow=26, signal=9):
+    """Menghitung MACD: (macd, signal line, histogram)"""
+    return macd_from_ema(ema(prices, fast), ema(prices, slow), signal)
+
+
+def macd_from_ema(fast_ema, slow_ema, signal=9):
+    """MACD dari dua EMA yang sudah dihitung (dipakai ulang oleh IndicatorPanel)"""
+    macd_line = fast_ema - slow_ema
+    signal_line = ema(macd_line, signal)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def bollinger_bands(prices, window=20, num_std=2):
+    """Menghitung Bollinger Bands: (upper, middle, lower)"""
+    return bands(sma(prices, window), rolling_std(prices, window), num_std)
+
+
+def bands(rolling_mean, rolling_std, num_std=2):
+    upper_band = rolling_mean + (rolling_std * num_std)
+    lower_band = rolling_mean - (rolling_std * num_std)
+    return upper_band, rolling_mean, lower_band
+
+
+def stochastic(high, low, close, k_window=14, d_window=3):
+    """Menghitung Stochastic Oscillator: (%K, %D)"""
+    lowest_low = low.rolling(window=k_window).min()
+    highest_high = high.rolling(window=k_window).max()
+    k_percent = 100 * ((close - lowest_low) / (highest_high - lowest_low))
+    d_percent = k_percent.rolling(window=d_window).mean()
+    return k_percent, d_percent
+
+
+def atr(high, low, close, window=14):
+    """Menghitung Average True Range (ATR)"""
+    prev_close = close.shift(1)
+    tr1 = high - low
+    tr2 = (high - prev_close).abs()
+    tr3 = (low - prev_close).abs()
+    # fmax mengabaikan NaN, sama seperti concat(...).max(axis=1)
+    tr = np.fmax(np.fmax(tr1, tr2), tr3)
+    return tr.rolling(window=window).mean()
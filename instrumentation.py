@@ -0,0 +1,205 @@
+import cProfile
+import json
+import os
+import pstats
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(".cache", "metrics"))
+METRICS_PROFILE = os.getenv("METRICS_PROFILE", "").lower() in ("1", "true", "yes")
+
+
+class RunMetrics:
+    """Mencatat waktu per tahap, data per simbol, cache dan error selama satu run"""
+
+    def __init__(self, job, profile=METRICS_PROFILE):
+        self.job = job
+        self.profile_enabled = profile
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.stages = defaultdict(float)
+        self.bars = {}
+        # Per chunk fetch (satu request batch): jumlah simbol, latency termasuk retry, percobaan
+        self.fetch_chunks = []
+        self.cache = Counter()
+        self.errors = Counter()
+        self.counters = Counter()
+        self.profiles = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Menambahkan waktu blok ini ke tahap `name` (bisa dipanggil berulang)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - started
+
+    def timed(self, name, iterable):
+        """Iterasi `iterable` dengan waktu menunggu item dihitung ke tahap `name`"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    @contextmanager
+    def profile(self, name):
+        """cProfile untuk hot path, hanya aktif bila METRICS_PROFILE=1"""
+        if not self.profile_enabled:
+            yield
+            return
+        profiler = self.profiles.setdefault(name, cProfile.Profile())
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+
+    def record_bars(self, data):
+        for symbol, hist in data.items():
+            self.bars[symbol] = len(hist)
+
+    def error(self, error):
+        self.errors[error if isinstance(error, str) else type(error).__name__] += 1
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def collect_provider(self, provider):
+        """Mengambil latency chunk fetch, statistik cache dan error fetch dari rantai provider"""
+        seen = set()
+        while provider is not None and id(provider) not in seen:
+            seen.add(id(provider))
+            for result in getattr(provider, 'results', []):
+                self.fetch_chunks.append({
+                    'symbols': len(result.symbols),
+                    'first_symbol': result.symbols[0] if result.symbols else None,
+                    'latency_seconds': result.latency,
+                    'attempts': result.attempts,
+                })
+                if result.error is not None:
+                    self.error(result.error)
+            self.cache.update(getattr(provider, 'stats', {}))
+            provider = getattr(provider, 'provider', None)
+
+    def report(self):
+        return {
+            'job': self.job,
+            'started_at': self.started_at.isoformat(),
+            'duration_seconds': time.perf_counter() - self.started,
+            'stages': dict(self.stages),
+            'counters': dict(self.counters),
+            'cache': dict(self.cache),
+            'errors': dict(self.errors),
+            'fetch_chunks': self.fetch_chunks,
+            'symbols': {symbol: {'bars': self.bars[symbol]} for symbol in sorted(self.bars)},
+        }
+
+    def prometheus(self, report=None):
+        """Format textfile Prometheus (node_exporter textfile collector)"""
+        report = report or self.report()
+        job = _label(self.job)
+        lines = []
+
+        def metric(name, help_text, samples, kind='gauge'):
+            lines.append(f"# HELP stocks_{name} {help_text}")
+            lines.append(f"# TYPE stocks_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join([f'job="{job}"'] + [f'{k}="{_label(v)}"' for k, v in labels])
+                lines.append(f"stocks_{name}{{{label_text}}} {value}")
+
+        metric('run_timestamp_seconds', 'Waktu mulai run (unix)',
+               [((), self.started_at.timestamp())])
+        metric('run_duration_seconds', 'Durasi total run',
+               [((), report['duration_seconds'])])
+        metric('stage_seconds', 'Durasi per tahap',
+               [((('stage', k),), v) for k, v in report['stages'].items()])
+        metric('events_total', 'Jumlah kejadian per jenis',
+               [((('name', k),), v) for k, v in report['counters'].items()], 'counter')
+        metric('cache_requests_total', 'Hit / miss cache OHLCV per simbol',
+               [((('result', k),), v) for k, v in report['cache'].items()], 'counter')
+        metric('errors_total', 'Error per tipe',
+               [((('type', k),), v) for k, v in report['errors'].items()], 'counter')
+        metric('symbol_bars', 'Jumlah bar per simbol',
+               [((('symbol', s),), info['bars']) for s, info in report['symbols'].items()])
+        chunks = report['fetch_chunks']
+        metric('fetch_chunk_latency_seconds', 'Latency per chunk fetch, termasuk retry dan backoff',
+               [((('chunk', i), ('first_symbol', c['first_symbol'])), c['latency_seconds'])
+                for i, c in enumerate(chunks)])
+        metric('fetch_chunk_attempts', 'Jumlah percobaan per chunk fetch',
+               [((('chunk', i), ('first_symbol', c['first_symbol'])), c['attempts'])
+                for i, c in enumerate(chunks)])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, directory=METRICS_DIR, provider=None):
+        """Menulis laporan JSON, textfile Prometheus dan profil (.prof) bila ada"""
+        if provider is not None:
+            self.collect_provider(provider)
+        os.makedirs(directory, exist_ok=True)
+        report = self.report()
+
+        paths = {}
+        for name, profiler in self.profiles.items():
+            path = os.path.join(directory, f"{self.job}-{name}.prof")
+            profiler.dump_stats(path)
+            paths[name] = path
+            report.setdefault('profiles', {})[name] = {
+                'path': path,
+                'top': _top_functions(profiler),
+            }
+
+        json_path = os.path.join(directory, f"{self.job}.json")
+        _write_atomic(json_path, json.dumps(report, indent=2, default=str))
+        prom_path = os.path.join(directory, f"{self.job}.prom")
+        _write_atomic(prom_path, self.prometheus(report))
+        paths.update(json=json_path, prometheus=prom_path)
+        return paths
+
+
+def reset_provider_stats(provider):
+    """Mengosongkan hasil fetch (termasuk latency chunk) dan statistik cache di rantai provider
+
+    Dipakai proses yang berjalan lama (daemon) agar laporan tiap run hanya
+    berisi fetch run itu dan daftar hasil fetch tidak terus bertambah.
+    """
+    seen = set()
+    while provider is not None and id(provider) not in seen:
+        seen.add(id(provider))
+        for name in ('results', 'stats'):
+            value = getattr(provider, name, None)
+            if value is not None:
+                value.clear()
+        provider = getattr(provider, 'provider', None)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _top_functions(profiler, limit=15):
+    """Fungsi dengan waktu kumulatif terbesar"""
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            'function': f"{filename}:{line}({name})",
+            'calls': calls,
+            'total_seconds': total,
+            'cumulative_seconds': cumulative,
+        }
+        for (filename, line, name), (_, calls, total, cumulative, _) in rows
+    ]
+
+
+def _write_atomic(path, text):
+    # Textfile collector bisa membaca kapan saja, jadi tulis ke file sementara dulu
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,180 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Jumlah path simulasi portofolio trading bot (0 = tahap simulasi mati)
+MC_PATHS = int(os.getenv("MC_PATHS", "50000"))
+# Lama posisi dipegang (bar) sebelum ditutup di harga close
+MC_HOLD_BARS = int(os.getenv("MC_HOLD_BARS", "20"))
+# Jumlah rekomendasi teratas yang disimulasikan sebagai satu portofolio
+MC_TOP = int(os.getenv("MC_TOP", "5"))
+# Panjang histori (bar) yang di-bootstrap
+MC_LOOKBACK = int(os.getenv("MC_LOOKBACK", "250"))
+# Seed tetap agar run dengan data yang sama memberi angka yang sama
+MC_SEED = int(os.getenv("MC_SEED", "0"))
+
+PRICE_FIELDS = ('Open', 'High', 'Low', 'Close')
+
+
+def bar_ratios(frames, symbols):
+    """Rasio open/high/low/close terhadap close sebelumnya, array (T, S) per field
+
+    Tanggal yang sama dipakai untuk semua simbol sehingga korelasi antar saham
+    ikut terbawa saat bar di-bootstrap. Simbol yang tidak trading di suatu
+    tanggal dianggap diam (rasio 1).
+    """
+    panels = {
+        field: pd.DataFrame({symbol: frames[symbol][field] for symbol in symbols}).sort_index()
+        for field in PRICE_FIELDS
+    }
+    close = panels['Close'].ffill()
+    # Hanya tanggal setelah semua simbol punya harga
+    valid = close.notna().all(axis=1).to_numpy()
+    prev = close.shift(1).to_numpy()[valid][1:]
+    close_ratio = close.to_numpy()[valid][1:] / prev
+
+    ratios = {'Close': close_ratio}
+    for field in ('Open', 'High', 'Low'):
+        ratio = panels[field].to_numpy()[valid][1:] / prev
+        ratios[field] = np.where(np.isfinite(ratio), ratio, close_ratio)
+    # Bar dengan data rusak tidak boleh membuat high < close atau low > close
+    ratios['High'] = np.fmax(ratios['High'], np.fmax(ratios['Open'], close_ratio))
+    ratios['Low'] = np.fmin(ratios['Low'], np.fmin(ratios['Open'], close_ratio))
+    return ratios
+
+
+def first_hit(hit, hold):
+    """Indeks bar pertama yang True di sumbu 1, `hold` bila tidak pernah"""
+    return np.where(hit.any(axis=1), hit.argmax(axis=1), hold)
+
+
+class PortfolioSimulator:
+    """Simulasi Monte Carlo portofolio rekomendasi trading bot
+
+    Bar historis (OHLC relatif terhadap close sebelumnya) di-bootstrap per
+    tanggal untuk semua simbol sekaligus, sehingga korelasi dan ekor tebal
+    return ikut terbawa. Setiap path menjalankan aturan exit backtest: SL
+    dulu bila TP dan SL tersentuh di bar yang sama, gap open dieksekusi di
+    harga open, sisanya ditutup di close bar terakhir. Portofolio berbobot
+    sama; posisi yang sudah exit dipegang sebagai kas.
+
+    Path diproses per batch `batch_size` × hold × simbol agar memori tetap kecil.
+    """
+
+    def __init__(self, paths=MC_PATHS, hold=MC_HOLD_BARS, top=MC_TOP, lookback=MC_LOOKBACK,
+                 seed=MC_SEED, var_level=0.95, batch_size=10000):
+        self.paths = paths
+        self.hold = hold
+        self.top = top
+        self.lookback = lookback
+        self.seed = seed
+        self.var_level = var_level
+        self.batch_size = batch_size
+
+    def tail(self, hist):
+        """Bar yang perlu disimpan per simbol selama run: lookback + 1 bar terakhir"""
+        return hist[list(PRICE_FIELDS)].iloc[-(self.lookback + 1):]
+
+    def simulate_batch(self, rng, ratios, entry, take_profit, stop_loss, size):
+        """Satu batch path: outcome per posisi (b, S) dan nilai portofolio per bar (b, hold)"""
+        hold = self.hold
+        days = rng.integers(0, len(ratios['Close']), size=(size, hold))
+        close = entry * np.cumprod(ratios['Close'][days], axis=1)
+        prev = np.concatenate([np.broadcast_to(entry, (size, 1, len(entry))), close[:, :-1]], axis=1)
+        open_ = prev * ratios['Open'][days]
+
+        first_tp = first_hit(prev * ratios['High'][days] >= take_profit, hold)
+        first_sl = first_hit(prev * ratios['Low'][days] <= stop_loss, hold)
+        is_sl = (first_sl < hold) & (first_sl <= first_tp)
+        is_tp = (first_tp < hold) & ~is_sl
+        exit_bar = np.select([is_sl, is_tp], [first_sl, first_tp], hold - 1)
+
+        exit_open = np.take_along_axis(open_, exit_bar[:, None, :], axis=1)[:, 0]
+        exit_price = np.select(
+            [is_sl, is_tp],
+            [np.fmin(stop_loss, exit_open), np.fmax(take_profit, exit_open)],
+            close[:, -1],
+        )
+        bars = np.arange(hold)[None, :, None]
+        value = np.where(bars < exit_bar[:, None, :], close, exit_price[:, None, :]) / entry
+        return is_tp, is_sl, value.mean(axis=2)
+
+    def simulate(self, results, frames):
+        """Menjalankan simulasi untuk `top` hasil teratas
+
+        Mengembalikan (hasil dengan prob_tp / prob_sl per saham, ringkasan
+        portofolio); ringkasan None bila histori tidak cukup.
+        """
+        picks = [r for r in results[:self.top] if r['symbol'] in frames]
+        if not picks or self.paths <= 0:
+            return results, None
+        symbols = [r['symbol'] for r in picks]
+        ratios = bar_ratios(frames, symbols)
+        if len(ratios['Close']) < self.hold:
+            print(f"Simulasi portofolio dilewati: histori hanya {len(ratios['Close'])} bar")
+            return results, None
+
+        entry = np.array([r['buy_price'] for r in picks], dtype=float)
+        take_profit = np.array([r['take_profit'] for r in picks], dtype=float)
+        stop_loss = np.array([r['stop_loss'] for r in picks], dtype=float)
+        # Level portofolio: rata-rata target dan risiko posisi (bobot sama)
+        portfolio_tp = (take_profit / entry).mean()
+        portfolio_sl = (stop_loss / entry).mean()
+
+        rng = np.random.default_rng(self.seed)
+        tp_hits = np.zeros(len(picks))
+        sl_hits = np.zeros(len(picks))
+        portfolio_tp_hits = portfolio_sl_hits = 0
+        returns = []
+        for start in range(0, self.paths, self.batch_size):
+            size = min(self.batch_size, self.paths - start)
+            is_tp, is_sl, value = self.simulate_batch(rng, ratios, entry, take_profit, stop_loss, size)
+            tp_hits += is_tp.sum(axis=0)
+            sl_hits += is_sl.sum(axis=0)
+
+            first_tp = first_hit(value >= portfolio_tp, self.hold)
+            first_sl = first_hit(value <= portfolio_sl, self.hold)
+            portfolio_sl_hits += ((first_sl < self.hold) & (first_sl <= first_tp)).sum()
+            portfolio_tp_hits += ((first_tp < self.hold) & (first_tp < first_sl)).sum()
+            returns.append(value[:, -1] - 1)
+
+        returns = np.concatenate(returns) * 100
+        tail = np.percentile(returns, (1 - self.var_level) * 100)
+        summary = {
+            'paths': self.paths,
+            'hold': self.hold,
+            'symbols': symbols,
+            'take_profit_pct': (portfolio_tp - 1) * 100,
+            'stop_loss_pct': (1 - portfolio_sl) * 100,
+            'prob_tp': portfolio_tp_hits / self.paths * 100,
+            'prob_sl': portfolio_sl_hits / self.paths * 100,
+            'expected_return_pct': returns.mean(),
+            'percentiles': dict(zip((5, 25, 50, 75, 95), np.percentile(returns, (5, 25, 50, 75, 95)))),
+            'var_level': self.var_level,
+            'var_pct': -tail,
+            'cvar_pct': -returns[returns <= tail].mean(),
+        }
+
+        probs = {
+            symbol: (tp / self.paths * 100, sl / self.paths * 100)
+            for symbol, tp, sl in zip(symbols, tp_hits, sl_hits)
+        }
+        annotated = [
+            {**r, 'prob_tp': probs[r['symbol']][0], 'prob_sl': probs[r['symbol']][1]}
+            if r['symbol'] in probs else r
+            for r in results
+        ]
+        return annotated, summary
+
+    def report(self, summary):
+        """Ringkasan simulasi untuk konsol"""
+        pct = summary['percentiles']
+        print(f"\nSimulasi portofolio ({summary['paths']:,} path × {summary['hold']} bar, "
+              f"{', '.join(summary['symbols'])}):")
+        print(f"   TP portofolio +{summary['take_profit_pct']:.1f}% lebih dulu: {summary['prob_tp']:.1f}% | "
+              f"SL -{summary['stop_loss_pct']:.1f}% lebih dulu: {summary['prob_sl']:.1f}%")
+        print(f"   Return: rata-rata {summary['expected_return_pct']:+.1f}%, median {pct[50]:+.1f}%, "
+              f"P5 {pct[5]:+.1f}%, P95 {pct[95]:+.1f}%")
+        print(f"   VaR {summary['var_level'] * 100:.0f}%: {summary['var_pct']:.1f}% | "
+              f"CVaR: {summary['cvar_pct']:.1f}%")
@@ -0,0 +1,261 @@
+"""Precompute indikator semalam untuk scan pra-pembukaan yang ringan
+
+Job malam (setelah market tutup) mengambil histori penuh tiap job, menghangatkan
+state indikator streaming per simbol (MA20/50/200, ATR, Bollinger, MACD, RSI,
+stochastic) dan menyimpannya bersama ekor OHLCV ke .cache/precompute/<job>.json
+dan <job>.npz.
+
+Run scanner.py / trading_bot.py dengan PREOPEN_DELTA=1 memuat snapshot itu,
+hanya mengambil bar beberapa hari terakhir dan menerapkan bar yang lebih baru
+dari snapshot sebelum scoring. Biayanya sebanding jumlah simbol, bukan panjang
+histori. Simbol tanpa snapshot atau dengan celah data dihitung penuh seperti biasa.
+
+    python precompute.py build scanner trading_bot   # malam, setelah close
+    PREOPEN_DELTA=1 python trading_bot.py            # pagi, sebelum open
+"""
+import argparse
+import importlib
+import os
+import time
+from collections import Counter
+
+import pandas as pd
+
+from data_provider import trim_to_period
+from fetch_pipeline import iter_provider
+from indicator_panel import IndicatorPanel
+from price_cache import OVERLAP_BARS, adjusted_since
+from replay import FrameArchive, provider_from_env
+from streaming import IndicatorStateStore, StreamingIndicators
+
+# Run scanner / trading bot memakai snapshot semalam + bar terbaru
+PREOPEN_DELTA = os.getenv("PREOPEN_DELTA", "").lower() in ("1", "true", "yes")
+PRECOMPUTE_DIR = os.getenv("PRECOMPUTE_DIR", os.path.join(".cache", "precompute"))
+# Ekor OHLCV per simbol untuk prefilter, cross-section, korelasi dan simulasi (>= MC_LOOKBACK + 1)
+PRECOMPUTE_TAIL_BARS = int(os.getenv("PRECOMPUTE_TAIL_BARS", "260"))
+# Histori yang diambil run delta, cukup untuk menutup akhir pekan / libur pendek sejak snapshot
+DELTA_PERIODS = {'1h': '5d', '4h': '5d', '1d': '5d', '1wk': '1mo'}
+
+JOB_CLASSES = {
+    'scanner': ('scanner', 'IndonesiaStockScreener'),
+    'trading_bot': ('trading_bot', 'IndonesiaStockTradingBot'),
+}
+
+
+class PrecomputedIndicators:
+    """Snapshot indikator semalam satu job: state StreamingIndicators + ekor OHLCV per simbol
+
+    State disimpan lewat IndicatorStateStore (<job>.json), ekor OHLCV sebagai
+    FrameArchive (<job>.npz) dengan kunci (simbol, interval, period) job saat
+    build. State semalam tidak pernah diubah oleh run delta: bar baru
+    diterapkan ke salinannya, karena bar terakhir bisa saja belum final.
+    """
+
+    def __init__(self, name, interval='1d', period='3mo', directory=PRECOMPUTE_DIR,
+                 tail_bars=PRECOMPUTE_TAIL_BARS):
+        self.name = name
+        self.interval = interval
+        self.period = period
+        self.tail_bars = tail_bars
+        self.delta_period = DELTA_PERIODS[interval]
+        self.state_store = IndicatorStateStore(os.path.join(directory, f"{name}.json"))
+        self.tail_path = os.path.join(directory, f"{name}.npz")
+        self.states = {}
+        self.tails = {}
+        # Bar yang lebih baru dari snapshot, per simbol yang dilayani lewat jalur delta
+        self.pending = {}
+        self.stats = Counter()
+
+    def load(self):
+        """Memuat snapshot; False bila belum ada atau dibuat untuk interval / period lain"""
+        if not (os.path.exists(self.state_store.path) and os.path.exists(self.tail_path)):
+            return False
+        archive = FrameArchive.load(self.tail_path)
+        states = self.state_store.load()
+        self.tails = {
+            symbol: hist for (symbol, interval, span), hist in archive.frames.items()
+            if interval == self.interval and span == self.period
+        }
+        # State dan ekor harus berakhir di bar yang sama (mis. build malam yang terputus)
+        self.states = {
+            symbol: states[symbol] for symbol, tail in self.tails.items()
+            if symbol in states and pd.Timestamp(states[symbol].last_timestamp) == tail.index[-1]
+        }
+        return bool(self.states)
+
+    def build(self, data):
+        """Menghangatkan state dari histori penuh tiap simbol (job malam)"""
+        self.states = {
+            symbol: StreamingIndicators.from_history(hist) for symbol, hist in data.items() if len(hist)
+        }
+        self.tails = {symbol: data[symbol].iloc[-self.tail_bars:] for symbol in self.states}
+        self.pending = {}
+
+    def save(self):
+        FrameArchive({
+            (symbol, self.interval, self.period): tail for symbol, tail in self.tails.items()
+        }).save(self.tail_path)
+        self.state_store.save(self.states)
+
+    def identity(self):
+        """Identitas snapshot untuk kunci cache hasil, karena hasil run delta bergantung pada state awalnya"""
+        path = self.state_store.path
+        return {'snapshot': self.name, 'built': os.path.getmtime(path) if os.path.exists(path) else None}
+
+    def extend(self, symbol, recent):
+        """Ekor snapshot + bar `recent` yang lebih baru; None bila `recent` tidak menyambung / berubah"""
+        last = pd.Timestamp(self.states[symbol].last_timestamp)
+        # Tidak menyambung, atau bar lama berubah karena penyesuaian split / dividen
+        if (not len(recent) or not recent.index[0] <= last <= recent.index[-1]
+                or adjusted_since(self.tails[symbol].iloc[-OVERLAP_BARS:], recent)):
+            self.pending.pop(symbol, None)
+            return None
+        new = recent.iloc[recent.index.searchsorted(last, side='right'):]
+        self.pending[symbol] = new
+        if not len(new):
+            return self.tails[symbol]
+        # Jendela `period` yang sama dengan run penuh: bar awal yang sudah keluar dibuang
+        return trim_to_period(pd.concat([self.tails[symbol], new]), self.period).iloc[-self.tail_bars:]
+
+    def iter_fetch(self, provider, symbols, period='3mo', interval='1d'):
+        """Seperti iter_provider, tapi simbol di snapshot cukup diambil `delta_period` terakhir
+
+        Frame yang dihasilkan adalah ekor snapshot + bar baru. Simbol yang
+        belum ada di snapshot, atau yang data terbarunya tidak mencakup bar
+        terakhir snapshot (libur panjang, build malam gagal), diambil ulang
+        dengan `period` penuh, begitu juga simbol yang bar lamanya berubah.
+        """
+        known = [symbol for symbol in symbols if symbol in self.states]
+        full = [symbol for symbol in symbols if symbol not in self.states]
+        if known:
+            for recent in iter_provider(provider, known, period=self.delta_period, interval=interval):
+                data = {}
+                for symbol, hist in recent.items():
+                    merged = self.extend(symbol, hist)
+                    if merged is None:
+                        full.append(symbol)
+                    else:
+                        data[symbol] = merged
+                if data:
+                    yield data
+        if full:
+            print(f"{len(full)} simbol tanpa snapshot yang menyambung, histori {period} diambil penuh")
+            yield from iter_provider(provider, full, period=period, interval=interval)
+
+    def latest_fields(self, data):
+        """Sama dengan IndicatorPanel(data).latest_fields(), memakai snapshot bila tersedia"""
+        rows, full = {}, {}
+        for symbol, hist in data.items():
+            new = self.pending.get(symbol)
+            if new is None:
+                full[symbol] = hist
+                continue
+            state = self.states[symbol]
+            if len(new):
+                # Salinan: bar terakhir bisa belum final, state semalam tidak diubah
+                state = StreamingIndicators.from_dict(state.to_dict()).update_from(new)
+                if len(self.tails[symbol]) < self.tail_bars:
+                    # Ekor = seluruh jendela snapshot, jadi `hist` = jendela run penuh. EMA
+                    # state dimulai di awal jendela snapshot yang lebih lama: dihitung
+                    # ulang dari jendela ini agar MACD sama dengan run penuh
+                    state.restart_ema(hist['Close'].tolist())
+            rows[symbol] = state.snapshot()
+        self.stats['delta'] += len(rows)
+        self.stats['full'] += len(full)
+
+        frames = []
+        if rows:
+            frames.append(pd.DataFrame.from_dict(rows, orient='index'))
+        if full:
+            frames.append(IndicatorPanel(full).latest_fields())
+        return pd.concat(frames).reindex(list(data))
+
+    def report(self, metrics=None):
+        print(f"Precompute: {self.stats['delta']} saham dari snapshot + bar terbaru, "
+              f"{self.stats['full']} dihitung dari histori penuh")
+        if metrics is not None:
+            metrics.count('precompute_delta', self.stats['delta'])
+            metrics.count('precompute_full', self.stats['full'])
+
+
+class WarmIndicators(PrecomputedIndicators):
+    """State indikator di memori untuk daemon, maju bersama tiap refresh
+
+    Run pertama menghitung penuh. Setelah itu tiap refresh hanya mengambil
+    bar terbaru dan menerapkannya ke salinan state, seperti run delta
+    pra-pembukaan. advance() kemudian memasukkan bar yang sudah final (semua
+    kecuali bar terakhir, yang bisa jadi belum final) ke state dan ekornya.
+    """
+
+    def __init__(self, name, interval='1d', period='3mo', tail_bars=PRECOMPUTE_TAIL_BARS):
+        super().__init__(name, interval, period, tail_bars=tail_bars)
+        # Histori simbol yang diambil penuh pada run ini, dibangun jadi state di advance()
+        self.full = {}
+
+    def iter_fetch(self, provider, symbols, period='3mo', interval='1d'):
+        for data in super().iter_fetch(provider, symbols, period, interval):
+            self.full.update({symbol: hist for symbol, hist in data.items() if symbol not in self.pending})
+            yield data
+
+    def identity(self):
+        return {'snapshot': self.name, 'warm': True}
+
+    def advance(self):
+        """Memasukkan bar final run ini ke state; dipanggil setelah run selesai"""
+        for symbol, hist in self.full.items():
+            final = hist.iloc[:-1]
+            if len(final):
+                self.states[symbol] = StreamingIndicators.from_history(final)
+                self.tails[symbol] = final.iloc[-self.tail_bars:]
+        for symbol, new in self.pending.items():
+            final = new.iloc[:-1]
+            if symbol not in self.full and len(final):
+                self.states[symbol].update_from(final)
+                self.tails[symbol] = pd.concat([self.tails[symbol], final]).iloc[-self.tail_bars:]
+        self.full, self.pending = {}, {}
+        self.stats.clear()
+
+
+def load_precomputed(name, interval, period, directory=PRECOMPUTE_DIR):
+    """PrecomputedIndicators yang sudah dimuat; None (run penuh) bila snapshot belum ada"""
+    precomputed = PrecomputedIndicators(name, interval, period, directory)
+    if precomputed.load():
+        return precomputed
+    print(f"Snapshot precompute {name} ({interval}, {period}) tidak ada, run memakai histori penuh")
+    return None
+
+
+def build(jobs, directory=PRECOMPUTE_DIR, tail_bars=PRECOMPUTE_TAIL_BARS):
+    """Mengambil histori penuh tiap job dan menyimpan snapshot indikatornya"""
+    for name in jobs:
+        module_name, class_name = JOB_CLASSES[name]
+        module = importlib.import_module(module_name)
+        job = getattr(module, class_name)(interval=module.TIMEFRAME, provider=provider_from_env())
+        period = module.PERIODS[job.interval]
+
+        started = time.perf_counter()
+        data = job.get_stocks_data(job.stock_list)
+        fetched = time.perf_counter()
+        precomputed = PrecomputedIndicators(job.job, job.interval, period, directory, tail_bars)
+        precomputed.build(data)
+        precomputed.save()
+        print(f"{job.job}: {len(precomputed.states)} saham ({period}), fetch {fetched - started:.1f} s, "
+              f"state {time.perf_counter() - fetched:.1f} s -> {precomputed.state_store.path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('jobs', nargs='*', default=list(JOB_CLASSES), help=', '.join(JOB_CLASSES))
+    parser.add_argument('--directory', default=PRECOMPUTE_DIR)
+    parser.add_argument('--tail-bars', type=int, default=PRECOMPUTE_TAIL_BARS)
+    args = parser.parse_args()
+
+    unknown = set(args.jobs) - set(JOB_CLASSES)
+    if unknown:
+        parser.error(f"job tidak dikenal: {' '.join(sorted(unknown))}")
+    build(args.jobs, args.directory, args.tail_bars)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+
+# Ambang tahap murah; 0 / kosong berarti tahap tidak dipakai
+PREFILTER_MIN_PRICE = float(os.getenv("PREFILTER_MIN_PRICE", "50"))
+PREFILTER_MIN_VALUE = float(os.getenv("PREFILTER_MIN_VALUE", "1e9"))
+PREFILTER_ABOVE_MA20 = os.getenv("PREFILTER_ABOVE_MA20", "").lower() in ("1", "true", "yes")
+
+
+class Prefilter:
+    """Tahap penyaringan murah sebelum indikator lengkap dihitung
+
+    Hanya memakai `window` bar terakhir: harga penutupan terakhir (min_price),
+    rata-rata nilai transaksi close × volume dalam rupiah (min_value) dan
+    opsional harga di atas MA20. Jumlah simbol masuk / lolos dicatat per tahap.
+    """
+
+    def __init__(self, min_price=PREFILTER_MIN_PRICE, min_value=PREFILTER_MIN_VALUE,
+                 above_ma20=PREFILTER_ABOVE_MA20, window=20):
+        self.window = window
+        self.stages = []
+        if min_price:
+            self.stages.append(('price', lambda s: s['close'] >= min_price))
+        if min_value:
+            self.stages.append(('liquidity', lambda s: s['avg_value'] >= min_value))
+        if above_ma20:
+            self.stages.append(('ma20_trend', lambda s: s['close'] > s['ma_20']))
+        self.reset()
+
+    def reset(self):
+        self.counts = {name: [0, 0] for name, _ in self.stages}
+
+    def _tail_stats(self, hist):
+        tail = hist.iloc[-self.window:]
+        close = tail['Close'].to_numpy(dtype=float)
+        volume = tail['Volume'].to_numpy(dtype=float)
+        return {
+            'close': close[-1],
+            'ma_20': close.mean(),
+            'avg_value': (close * volume).mean(),
+        }
+
+    def apply(self, data):
+        """Mengembalikan simbol yang lolos semua tahap"""
+        if not self.stages:
+            return data
+        stats = {symbol: self._tail_stats(hist) for symbol, hist in data.items()}
+        survivors = list(data)
+        for name, check in self.stages:
+            before = len(survivors)
+            # Perbandingan dengan NaN bernilai False, jadi data kosong ikut tersaring
+            survivors = [symbol for symbol in survivors if check(stats[symbol])]
+            self.counts[name][0] += before
+            self.counts[name][1] += len(survivors)
+        return {symbol: data[symbol] for symbol in survivors}
+
+    def pruning_rates(self):
+        """Persentase simbol yang dibuang di tiap tahap"""
+        return {
+            name: (1 - passed / seen) * 100 if seen else 0.0
+            for name, (seen, passed) in self.counts.items()
+        }
+
+    def report(self, metrics=None):
+        for name, (seen, passed) in self.counts.items():
+            print(f"Prefilter {name}: {seen} → {passed} saham "
+                  f"({self.pruning_rates()[name]:.1f}% dipangkas)")
+            if metrics is not None:
+                metrics.count(f"prefilter_{name}_in", seen)
+                metrics.count(f"prefilter_{name}_pruned", seen - passed)
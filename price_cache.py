@@ -0,0 +1,253 @@
+import os
+import sqlite3
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+from data_provider import OHLCV_COLUMNS, YahooDataProvider, period_start
+from fetch_pipeline import ConcurrentFetcher, iter_provider
+
+DEFAULT_CACHE_PATH = os.getenv("OHLCV_CACHE_PATH", os.path.join(".cache", "ohlcv.sqlite"))
+
+# Penanda cakupan untuk period='max' (seluruh histori sudah pernah diambil)
+FULL_HISTORY = -(2 ** 63)
+
+# Bar cache yang ikut diunduh ulang saat refresh, untuk mendeteksi penyesuaian split / dividen
+OVERLAP_BARS = 2
+ADJUSTMENT_RTOL = 1e-4
+
+
+def _to_utc_ns(index):
+    """Mengubah DatetimeIndex menjadi epoch nanodetik UTC"""
+    if index.tz is not None:
+        index = index.tz_convert('UTC')
+    return index.as_unit('ns').asi8
+
+
+class PriceCache:
+    """Penyimpanan OHLCV lokal (SQLite) dengan kunci simbol dan tanggal"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS bars ("
+                " symbol TEXT NOT NULL, interval TEXT NOT NULL, ts INTEGER NOT NULL,"
+                " open REAL, high REAL, low REAL, close REAL, volume REAL,"
+                " PRIMARY KEY (symbol, interval, ts)) WITHOUT ROWID"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                " symbol TEXT NOT NULL, interval TEXT NOT NULL, tz TEXT,"
+                " covered_from INTEGER NOT NULL,"
+                " PRIMARY KEY (symbol, interval))"
+            )
+
+    def coverage(self, symbols, interval='1d'):
+        """Mengembalikan (covered_from, ts bar terakhir, tz) tiap simbol di cache"""
+        rows = self.conn.execute(
+            "SELECT c.symbol, c.covered_from, MAX(b.ts), c.tz FROM coverage c"
+            " JOIN bars b ON b.symbol = c.symbol AND b.interval = c.interval"
+            " WHERE c.interval = ? GROUP BY c.symbol",
+            (interval,),
+        ).fetchall()
+        wanted = set(symbols)
+        return {
+            symbol: (covered_from, last_ts, tz)
+            for symbol, covered_from, last_ts, tz in rows if symbol in wanted
+        }
+
+    def load(self, symbol, interval='1d', period=None):
+        """Membaca bar yang tersimpan untuk satu simbol
+
+        Dengan `period` hanya bar dalam `period` sebelum bar terakhir yang dibaca
+        (hasilnya sama dengan trim_to_period), bukan seluruh histori.
+        """
+        if period is not None:
+            last = self.tail(symbol, interval, bars=1)
+            start = period_start(period, last.index[-1]) if last is not None else None
+            if start is not None:
+                return self._read(symbol, interval, "AND ts > ? ORDER BY ts", (start.value,))
+        return self._read(symbol, interval, "ORDER BY ts")
+
+    def tail(self, symbol, interval='1d', bars=OVERLAP_BARS):
+        """Membaca `bars` bar terakhir yang tersimpan untuk satu simbol"""
+        hist = self._read(symbol, interval, "ORDER BY ts DESC LIMIT ?", (bars,))
+        return None if hist is None else hist.iloc[::-1]
+
+    def _read(self, symbol, interval, order, params=()):
+        tz_row = self.conn.execute(
+            "SELECT tz FROM coverage WHERE symbol = ? AND interval = ?",
+            (symbol, interval),
+        ).fetchone()
+        rows = self.conn.execute(
+            "SELECT ts, open, high, low, close, volume FROM bars"
+            " WHERE symbol = ? AND interval = ? " + order,
+            (symbol, interval, *params),
+        ).fetchall()
+        if not rows:
+            return None
+
+        ts, *values = zip(*rows)
+        index = pd.to_datetime(list(ts), unit='ns', utc=True)
+        tz = tz_row[0] if tz_row else None
+        index = index.tz_convert(tz) if tz else index.tz_localize(None)
+        return pd.DataFrame(dict(zip(OHLCV_COLUMNS, values)), index=index)
+
+    def store(self, symbol, hist, interval='1d', covered_from=None):
+        """Menyimpan (merge) bar baru; bar dengan tanggal sama ditimpa"""
+        if hist is None or hist.empty:
+            return
+
+        hist = hist[OHLCV_COLUMNS]
+        rows = zip(
+            [symbol] * len(hist),
+            [interval] * len(hist),
+            _to_utc_ns(hist.index).tolist(),
+            *(hist[c].astype(float).tolist() for c in OHLCV_COLUMNS),
+        )
+        tz = str(hist.index.tz) if hist.index.tz is not None else None
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            if covered_from is not None:
+                self.conn.execute(
+                    "INSERT INTO coverage VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (symbol, interval) DO UPDATE SET"
+                    " tz = excluded.tz,"
+                    " covered_from = MIN(covered_from, excluded.covered_from)",
+                    (symbol, interval, tz, covered_from),
+                )
+
+    def drop(self, symbol, interval='1d'):
+        """Menghapus seluruh bar dan cakupan satu simbol"""
+        with self.conn:
+            self.conn.execute("DELETE FROM bars WHERE symbol = ? AND interval = ?", (symbol, interval))
+            self.conn.execute("DELETE FROM coverage WHERE symbol = ? AND interval = ?", (symbol, interval))
+
+    def close(self):
+        self.conn.close()
+
+
+def adjusted_since(stored, fetched):
+    """True bila bar cache yang diunduh ulang berubah (split / dividen menyesuaikan ulang histori)
+
+    Bar terakhir cache bisa jadi belum final, jadi hanya Open-nya yang
+    dibandingkan; bar sebelumnya dibandingkan OHLC lengkap.
+    """
+    overlap = stored.index.intersection(fetched.index)
+    if not len(overlap):
+        return True
+    last = stored.index[-1]
+    checks = [(overlap[overlap < last], ['Open', 'High', 'Low', 'Close']), (overlap[overlap == last], ['Open'])]
+    return any(
+        not np.allclose(stored.loc[index, columns], fetched.loc[index, columns], rtol=ADJUSTMENT_RTOL, equal_nan=True)
+        for index, columns in checks
+    )
+
+
+class CachedDataProvider:
+    """Provider yang hanya mengunduh bar yang belum ada di cache lokal"""
+
+    def __init__(self, provider=None, cache=None):
+        self.provider = provider or ConcurrentFetcher(YahooDataProvider(raise_errors=True))
+        self.cache = cache or PriceCache()
+        # hit: cukup refresh inkremental, miss: unduh penuh, stale: refresh gagal,
+        # readjusted: histori lama berubah (split / dividen) dan diunduh ulang penuh
+        self.stats = Counter()
+
+    def iter_fetch(self, symbols, period='3mo', interval='1d', start=None):
+        """Refresh cache secara inkremental, lalu melayani `period` dari cache
+        per kelompok simbol begitu unduhannya selesai"""
+        symbols = list(dict.fromkeys(symbols))
+        if start is not None:
+            fetched = self.provider.fetch(symbols, interval=interval, start=start)
+            for symbol, hist in fetched.items():
+                self.cache.store(symbol, hist, interval)
+            yield fetched
+            return
+
+        required = period_start(period, pd.Timestamp.now(tz='UTC'))
+        required = FULL_HISTORY if required is None else required.value
+        coverage = self.cache.coverage(symbols, interval)
+
+        # Simbol baru (atau histori kurang panjang) diunduh penuh, sisanya
+        # dikelompokkan per tanggal bar yang diunduh ulang
+        full = []
+        incremental = defaultdict(list)
+        tails = {}
+        for symbol in symbols:
+            info = coverage.get(symbol)
+            if info is None or info[0] > required:
+                full.append(symbol)
+            else:
+                tails[symbol] = self.cache.tail(symbol, interval)
+                incremental[tails[symbol].index[0].strftime('%Y-%m-%d')].append(symbol)
+        self.stats['miss'] += len(full)
+        self.stats['hit'] += len(symbols) - len(full)
+
+        pending = []
+        if full:
+            pending.append((full, {'period': period}, required))
+        for first_date, group in incremental.items():
+            # Bar terakhir ikut diambil ulang karena bisa jadi belum final, bar
+            # sebelumnya untuk memeriksa penyesuaian harga
+            pending.append((group, {'start': first_date}, None))
+
+        served = set()
+        readjusted = []
+        for group, span, covered_from in pending:
+            for fetched in iter_provider(self.provider, group, interval=interval, **span):
+                changed = [s for s in fetched if covered_from is None and adjusted_since(tails[s], fetched[s])]
+                readjusted.extend(changed)
+                for symbol, hist in fetched.items():
+                    if symbol not in changed:
+                        self.cache.store(symbol, hist, interval, covered_from=covered_from)
+                results = self._load([s for s in fetched if s not in changed], period, interval)
+                served.update(results)
+                if results:
+                    yield results
+
+        # Histori lama sudah disesuaikan ulang oleh Yahoo: cache simbol itu diganti unduhan penuh
+        if readjusted:
+            print(f"{len(readjusted)} simbol dengan harga lama yang berubah (split / dividen), diunduh ulang penuh")
+            self.stats['readjusted'] += len(readjusted)
+            for fetched in iter_provider(self.provider, readjusted, interval=interval, period=period):
+                for symbol, hist in fetched.items():
+                    self.cache.drop(symbol, interval)
+                    self.cache.store(symbol, hist, interval, covered_from=required)
+                results = self._load(fetched, period, interval)
+                served.update(results)
+                if results:
+                    yield results
+
+        # Simbol yang gagal di-refresh tetap dilayani dari data cache terakhir
+        stale = self._load([s for s in symbols if s not in served], period, interval)
+        self.stats['stale'] += len(stale)
+        if stale:
+            yield stale
+
+    def _load(self, symbols, period, interval):
+        results = {}
+        for symbol in symbols:
+            hist = self.cache.load(symbol, interval, period)
+            if hist is not None:
+                results[symbol] = hist
+        return results
+
+    def fetch(self, symbols, period='3mo', interval='1d', start=None):
+        """Sama seperti iter_fetch, tapi hasilnya digabung jadi satu dict"""
+        results = {}
+        for data in self.iter_fetch(symbols, period=period, interval=interval, start=start):
+            results.update(data)
+        return results
@@ -0,0 +1,195 @@
+"""Panel harga float32 di disk (tanggal × simbol) yang di-memory-map
+
+Satu kalender tanggal bersama (dates.npy, epoch ns UTC) dan satu array
+float32 per kolom OHLCV (Open.npy, ...). Saat dibaca, array tidak disalin ke
+memori: halaman file baru dimuat ketika benar-benar diakses. float32 cukup
+presisi untuk harga IDX; volume di atas ~16 juta lembar dibulatkan ke
+~7 digit signifikan.
+
+    python price_panel.py convert --universe idx --period 10y --output .cache/panel
+    python price_panel.py compare --panel .cache/panel
+    python price_panel.py compare --synthetic 900 --bars 2500
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_provider import OHLCV_COLUMNS
+from indicator_panel import IndicatorPanel
+
+DEFAULT_PANEL_PATH = os.getenv("PRICE_PANEL_PATH", os.path.join(".cache", "panel"))
+
+
+def write_panel(data, path=DEFAULT_PANEL_PATH):
+    """Mengubah dict simbol -> DataFrame (output get_stocks_data) menjadi panel di disk"""
+    data = {symbol: hist for symbol, hist in data.items() if not hist.empty}
+    symbols = list(data)
+    tz = next((str(hist.index.tz) for hist in data.values() if hist.index.tz is not None), None)
+
+    indexes = [_utc_index(hist) for hist in data.values()]
+    calendar = indexes[0].append(indexes[1:]).unique().sort_values() if indexes else pd.DatetimeIndex([])
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'dates.npy'), calendar.as_unit('ns').asi8)
+
+    for field in OHLCV_COLUMNS:
+        array = np.lib.format.open_memmap(
+            os.path.join(path, f"{field}.npy"), mode='w+', dtype=np.float32,
+            shape=(len(calendar), len(symbols)),
+        )
+        array[:] = np.nan
+        for col, (hist, index) in enumerate(zip(data.values(), indexes)):
+            array[calendar.get_indexer(index), col] = hist[field].to_numpy(dtype=np.float32)
+        array.flush()
+        del array
+
+    # meta.json ditulis terakhir, sehingga panel yang setengah jadi tidak terbaca
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'symbols': symbols, 'tz': tz, 'fields': OHLCV_COLUMNS}, f)
+    return path
+
+
+def _utc_index(hist):
+    return hist.index.tz_convert('UTC') if hist.index.tz is not None else hist.index
+
+
+class PricePanel:
+    """Panel OHLCV float32 yang di-memory-map dari direktori hasil write_panel"""
+
+    def __init__(self, path=DEFAULT_PANEL_PATH):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.path = path
+        self.symbols = meta['symbols']
+
+        dates = pd.to_datetime(np.load(os.path.join(path, 'dates.npy')), utc=True)
+        self.dates = (dates.tz_convert(meta['tz']) if meta['tz'] else dates.tz_localize(None)).rename('Date')
+        self.arrays = {
+            field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode='r')
+            for field in meta['fields']
+        }
+
+    def frame(self, field):
+        """Panel tanggal × simbol untuk satu kolom, langsung di atas memmap (tanpa salinan)"""
+        return pd.DataFrame(self.arrays[field], index=self.dates, columns=self.symbols, copy=False)
+
+    def indicator_panel(self):
+        return IndicatorPanel.from_panels(**{field.lower(): self.frame(field) for field in OHLCV_COLUMNS})
+
+    def to_frames(self, symbols=None):
+        """Kembali ke format dict simbol -> DataFrame (float64), untuk kode per simbol"""
+        frames = {}
+        for symbol in symbols or self.symbols:
+            col = self.symbols.index(symbol)
+            hist = pd.DataFrame(
+                {field: self.arrays[field][:, col].astype(np.float64) for field in OHLCV_COLUMNS},
+                index=self.dates,
+            )
+            frames[symbol] = hist[hist['Close'].notna()]
+        return frames
+
+
+def _rss_mb():
+    """RSS saat ini (Linux /proc), selain itu peak RSS dari getrusage"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure_load(kind, path, symbols=None):
+    """Dijalankan di proses baru: waktu load, waktu RSI pertama dan kenaikan RSS"""
+    from price_cache import PriceCache
+
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    if kind == 'memmap':
+        panel = PricePanel(path).indicator_panel()
+    else:
+        cache = PriceCache(path)
+        panel = IndicatorPanel({symbol: cache.load(symbol, '1d') for symbol in symbols})
+    load_seconds = time.perf_counter() - started
+    rss_loaded = _rss_mb()
+
+    started = time.perf_counter()
+    panel.rsi()
+    rsi_seconds = time.perf_counter() - started
+
+    return {
+        'path': kind,
+        'load_s': load_seconds,
+        'first_rsi_s': rsi_seconds,
+        'rss_after_load_mb': rss_loaded - rss_before,
+        'rss_after_rsi_mb': _rss_mb() - rss_before,
+    }
+
+
+def compare(panel_path, cache_path):
+    """Membandingkan load memmap dengan jalur DataFrame per simbol dari cache SQLite"""
+    import multiprocessing
+
+    symbols = PricePanel(panel_path).symbols
+    ctx = multiprocessing.get_context('spawn')
+    rows = []
+    for kind, path in (('dataframe', cache_path), ('memmap', panel_path)):
+        # Proses baru per jalur agar RSS dan page cache Python tidak saling memengaruhi
+        with ctx.Pool(1) as pool:
+            rows.append(pool.apply(_measure_load, (kind, path, symbols)))
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help='Buat panel dari data cache / Yahoo')
+    convert_parser.add_argument('--universe', required=True, help='Nama file di folder universe/ (mis. idx untuk universe/idx.txt)')
+    convert_parser.add_argument('--period', default='10y')
+    convert_parser.add_argument('--output', default=DEFAULT_PANEL_PATH)
+
+    compare_parser = subparsers.add_parser('compare', help='Bandingkan waktu load dan RSS')
+    compare_parser.add_argument('--panel', default=DEFAULT_PANEL_PATH)
+    compare_parser.add_argument('--cache', default=None, help='Default: OHLCV_CACHE_PATH')
+    compare_parser.add_argument('--synthetic', type=int, default=None, help='Jumlah simbol sintetis')
+    compare_parser.add_argument('--bars', type=int, default=2500)
+    args = parser.parse_args()
+
+    from price_cache import DEFAULT_CACHE_PATH, CachedDataProvider, PriceCache
+
+    if args.command == 'convert':
+        from universe import load_universe
+        data = CachedDataProvider().fetch(load_universe(args.universe), period=args.period)
+        write_panel(data, args.output)
+        print(f"Panel {len(data)} saham disimpan ke: {args.output}")
+        return
+
+    workdir = None
+    panel_path, cache_path = args.panel, args.cache or DEFAULT_CACHE_PATH
+    if args.synthetic:
+        from synthetic import generate_ohlcv
+        workdir = tempfile.mkdtemp(prefix='panel-')
+        panel_path, cache_path = os.path.join(workdir, 'panel'), os.path.join(workdir, 'ohlcv.sqlite')
+        data = generate_ohlcv(args.synthetic, args.bars)
+        cache = PriceCache(cache_path)
+        for symbol, hist in data.items():
+            cache.store(symbol, hist, '1d')
+        cache.close()
+        write_panel(data, panel_path)
+
+    try:
+        print(compare(panel_path, cache_path).round(4).to_string(index=False))
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""Rekam dan putar ulang data OHLCV untuk run offline yang deterministik
+
+Mode rekam (REPLAY_RECORD=path) menyimpan setiap frame yang diterima scanner /
+trading bot ke satu arsip npz terkompresi. Mode replay (REPLAY_ARCHIVE=path)
+melayani frame yang sama tanpa jaringan, opsional dengan latency tiruan per
+kelompok simbol (REPLAY_LATENCY detik).
+
+    python replay.py record scanner trading_bot --archive .cache/replay/ohlcv.npz
+    python replay.py run scanner trading_bot --repeat 3
+    python replay.py run trading_bot --latency 0.3      # tiru latency batch Yahoo
+
+`run` menjalankan tiap job end to end (arsip sinyal, metrics, Telegram diganti
+outbox) di direktori sementara yang bersih, lalu membandingkan hash hasil dan
+pesan antar run.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from data_provider import OHLCV_COLUMNS
+from fetch_pipeline import iter_provider
+from timeframes import TimeframeProvider
+
+REPLAY_RECORD = os.getenv("REPLAY_RECORD")
+REPLAY_ARCHIVE = os.getenv("REPLAY_ARCHIVE")
+# Latency tiruan per kelompok simbol saat replay (detik)
+REPLAY_LATENCY = float(os.getenv("REPLAY_LATENCY", "0"))
+DEFAULT_REPLAY_PATH = os.path.join(".cache", "replay", "ohlcv.npz")
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+JOB_SCRIPTS = {'scanner': 'scanner.py', 'trading_bot': 'trading_bot.py'}
+
+# State per run diarahkan ke direktori run agar setiap replay mulai dari nol
+STATE_ENV = {
+    'OHLCV_CACHE_PATH': os.path.join('.cache', 'ohlcv.sqlite'),
+    'RESULT_CACHE_DIR': os.path.join('.cache', 'results'),
+    'CORRELATION_DIR': os.path.join('.cache', 'correlation'),
+    'PRECOMPUTE_DIR': os.path.join('.cache', 'precompute'),
+    'SIGNAL_ARCHIVE_PATH': os.path.join('.cache', 'signals.sqlite'),
+    'METRICS_DIR': os.path.join('.cache', 'metrics'),
+    'TELEGRAM_OUTBOX': 'outbox.jsonl',
+}
+
+
+def span_key(period, start):
+    return period if start is None else f"start={start}"
+
+
+def _frame_entry(hist):
+    index = hist.index
+    utc = index.tz_convert('UTC') if index.tz is not None else index
+    entry = {
+        'rows': len(hist),
+        'columns': list(hist.columns),
+        'dtypes': [str(dtype) for dtype in hist.dtypes],
+        'tz': str(index.tz) if index.tz is not None else None,
+        'unit': index.unit,
+        'name': index.name,
+    }
+    values = hist.reindex(columns=OHLCV_COLUMNS).to_numpy(dtype=float)
+    return entry, utc.as_unit('ns').asi8, values
+
+
+def _entry_index(entry, utc):
+    index = utc.tz_convert(entry['tz']) if entry['tz'] else utc.tz_localize(None)
+    return index.as_unit(entry['unit'])
+
+
+def _entry_frame(entry, index, values):
+    # Per kolom dengan dtype aslinya: jauh lebih cepat dari astype pada frame jadi
+    return pd.DataFrame({
+        column: values[:, OHLCV_COLUMNS.index(column)].astype(dtype)
+        for column, dtype in zip(entry['columns'], entry['dtypes'])
+    }, index=index)
+
+
+class FrameArchive:
+    """Frame OHLCV per (simbol, interval, span) dalam satu file npz terkompresi
+
+    Semua frame digabung menjadi satu array timestamp dan satu array nilai,
+    ditambah manifest JSON (panjang, kolom, dtype, zona waktu), sehingga
+    simpan / muat tetap cepat untuk ribuan simbol dan hasil muat sama persis.
+    """
+
+    def __init__(self, frames=None):
+        self.frames = dict(frames or {})
+
+    def put(self, symbol, interval, span, hist):
+        self.frames[(symbol, interval, span)] = hist
+
+    def get(self, symbol, interval, span):
+        return self.frames.get((symbol, interval, span))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            manifest = json.loads(str(arrays['manifest']))
+            ns, values = arrays['index'], arrays['values']
+        # Timestamp dikonversi sekali per (zona waktu, unit), lalu diiris per frame
+        utc = pd.to_datetime(ns, unit='ns', utc=True)
+        indexes = {}
+        frames, offset = {}, 0
+        for entry in manifest:
+            end = offset + entry['rows']
+            zone = (entry['tz'], entry['unit'])
+            if zone not in indexes:
+                indexes[zone] = _entry_index(entry, utc)
+            index = indexes[zone][offset:end].rename(entry['name'])
+            key = (entry['symbol'], entry['interval'], entry['span'])
+            frames[key] = _entry_frame(entry, index, values[offset:end])
+            offset = end
+        return cls(frames)
+
+    def save(self, path):
+        manifest, indexes, values = [], [], []
+        for (symbol, interval, span), hist in self.frames.items():
+            entry, ns, frame_values = _frame_entry(hist)
+            manifest.append({'symbol': symbol, 'interval': interval, 'span': span, **entry})
+            indexes.append(ns)
+            values.append(frame_values)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                manifest=np.array(json.dumps(manifest)),
+                index=np.concatenate(indexes) if indexes else np.zeros(0, dtype=np.int64),
+                values=np.vstack(values) if values else np.zeros((0, len(OHLCV_COLUMNS))),
+            )
+        os.replace(tmp_path, path)
+
+
+class RecordingProvider:
+    """Meneruskan fetch ke provider asli dan merekam setiap frame yang dikembalikan
+
+    Arsip yang sudah ada digabung (frame dengan kunci sama ditimpa) dan
+    disimpan setiap kali satu fetch selesai.
+    """
+
+    def __init__(self, provider, path):
+        self.provider = provider
+        self.path = path
+        self.archive = FrameArchive.load(path) if os.path.exists(path) else FrameArchive()
+
+    def iter_fetch(self, symbols, period='3mo', interval='1d', start=None):
+        span = span_key(period, start)
+        try:
+            for data in iter_provider(self.provider, symbols, period=period, interval=interval, start=start):
+                for symbol, hist in data.items():
+                    self.archive.put(symbol, interval, span, hist)
+                yield data
+        finally:
+            self.archive.save(self.path)
+            print(f"{len(self.archive.frames)} frame direkam ke {self.path}")
+
+    def fetch(self, symbols, period='3mo', interval='1d', start=None):
+        """Sama seperti iter_fetch, tapi hasilnya digabung jadi satu dict"""
+        results = {}
+        for data in self.iter_fetch(symbols, period=period, interval=interval, start=start):
+            results.update(data)
+        return results
+
+
+class ReplayProvider:
+    """Provider offline yang melayani frame dari arsip rekaman
+
+    `latency` detik ditunggu sebelum setiap kelompok `batch_size` simbol,
+    meniru request batch ke Yahoo. Simbol yang tidak ada di arsip dilewati.
+    """
+
+    def __init__(self, path, latency=REPLAY_LATENCY, batch_size=50):
+        self.path = path
+        self.archive = FrameArchive.load(path)
+        self.latency = latency
+        self.batch_size = batch_size
+        self.stats = Counter()
+
+    def iter_fetch(self, symbols, period='3mo', interval='1d', start=None):
+        symbols = list(dict.fromkeys(symbols))
+        span = span_key(period, start)
+        missing = []
+        for i in range(0, len(symbols), self.batch_size):
+            if self.latency:
+                time.sleep(self.latency)
+            data = {}
+            for symbol in symbols[i:i + self.batch_size]:
+                hist = self.archive.get(symbol, interval, span)
+                if hist is None:
+                    missing.append(symbol)
+                else:
+                    data[symbol] = hist
+            self.stats['replayed'] += len(data)
+            if data:
+                yield data
+
+        self.stats['missing'] += len(missing)
+        if missing:
+            print(f"{len(missing)} simbol tidak ada di arsip replay ({interval}, {span}): "
+                  f"{', '.join(missing[:5])}{' ...' if len(missing) > 5 else ''}")
+
+    def fetch(self, symbols, period='3mo', interval='1d', start=None):
+        """Sama seperti iter_fetch, tapi hasilnya digabung jadi satu dict"""
+        results = {}
+        for data in self.iter_fetch(symbols, period=period, interval=interval, start=start):
+            results.update(data)
+        return results
+
+
+def provider_from_env():
+    """ReplayProvider (REPLAY_ARCHIVE) atau RecordingProvider (REPLAY_RECORD); None bila keduanya kosong"""
+    if REPLAY_ARCHIVE:
+        return ReplayProvider(REPLAY_ARCHIVE)
+    if REPLAY_RECORD:
+        return RecordingProvider(TimeframeProvider(), REPLAY_RECORD)
+    return None
+
+
+def run_jobs(jobs, directory, env):
+    """Menjalankan script job sebagai proses baru; False bila ada yang gagal"""
+    for job in jobs:
+        result = subprocess.run(
+            [sys.executable, os.path.join(REPO_DIR, JOB_SCRIPTS[job])],
+            cwd=directory, env=env, capture_output=True, text=True,
+        )
+        with open(os.path.join(directory, f"{job}.log"), 'w', encoding='utf-8') as f:
+            f.write(result.stdout + result.stderr)
+        if result.returncode != 0:
+            print(f"{job} gagal:\n{result.stderr.strip()}")
+            return False
+    return True
+
+
+def run_digest(directory):
+    """Hash hasil (arsip sinyal) dan pesan (outbox) satu run
+
+    Nama file CSV yang dikirim memuat jam run, jadi hanya isinya (sha256) yang dihitung.
+    """
+    digest = hashlib.sha256()
+    conn = sqlite3.connect(os.path.join(directory, STATE_ENV['SIGNAL_ARCHIVE_PATH']))
+    try:
+        for row in conn.execute("SELECT job, symbol, rank, payload FROM signals ORDER BY run_id, rank"):
+            digest.update(json.dumps(row).encode('utf-8'))
+    finally:
+        conn.close()
+
+    outbox = os.path.join(directory, STATE_ENV['TELEGRAM_OUTBOX'])
+    if os.path.exists(outbox):
+        with open(outbox, encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry['document']:
+                    entry['document'].pop('filename')
+                digest.update(json.dumps(entry, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def record(jobs, path):
+    """Run normal (data dari cache / Yahoo) sambil merekam semua frame ke arsip baru"""
+    path = os.path.abspath(path)
+    if os.path.exists(path):
+        os.remove(path)
+    outbox = os.path.splitext(path)[0] + '.outbox.jsonl'
+    env = {**os.environ, 'REPLAY_RECORD': path, 'TELEGRAM_OUTBOX': outbox}
+    env.pop('REPLAY_ARCHIVE', None)
+    for job in jobs:
+        print(f"Merekam {job}...")
+        if subprocess.run([sys.executable, os.path.join(REPO_DIR, JOB_SCRIPTS[job])], env=env).returncode != 0:
+            return False
+    frames = FrameArchive.load(path).frames
+    print(f"\nArsip: {path} ({len(frames)} frame, {os.path.getsize(path) / 2 ** 20:.1f} MB)")
+    print(f"Pesan Telegram (tidak dikirim): {outbox}")
+    return True
+
+
+def replay(jobs, path, repeat=2, latency=REPLAY_LATENCY, workdir=None):
+    """Menjalankan job dari arsip `repeat` kali dan membandingkan hash-nya"""
+    path = os.path.abspath(path)
+    digests = []
+    for run in range(1, repeat + 1):
+        directory = tempfile.mkdtemp(prefix='replay-', dir=workdir)
+        env = {
+            **os.environ,
+            **{name: os.path.join(directory, value) for name, value in STATE_ENV.items()},
+            'REPLAY_ARCHIVE': path,
+            'REPLAY_LATENCY': str(latency),
+            'TELEGRAM_BOT_TOKEN': 'replay',
+            'TELEGRAM_CHAT_ID': 'replay',
+        }
+        env.pop('REPLAY_RECORD', None)
+
+        started = time.perf_counter()
+        if not run_jobs(jobs, directory, env):
+            return False
+        elapsed = time.perf_counter() - started
+        digests.append(run_digest(directory))
+        print(f"Run {run}: {elapsed:6.2f} s  {digests[-1][:16]}  ({directory})")
+
+    identical = len(set(digests)) == 1
+    print("Hasil dan pesan identik di semua run." if identical else "Hasil BERBEDA antar run!")
+    return identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['record', 'run'])
+    parser.add_argument('jobs', nargs='*', default=list(JOB_SCRIPTS), help=', '.join(JOB_SCRIPTS))
+    parser.add_argument('--archive', default=REPLAY_ARCHIVE or DEFAULT_REPLAY_PATH)
+    parser.add_argument('--repeat', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=REPLAY_LATENCY, help='Detik per kelompok 50 simbol')
+    parser.add_argument('--workdir', default=None, help='Direktori induk direktori run (default: temp sistem)')
+    args = parser.parse_args()
+
+    unknown = set(args.jobs) - set(JOB_SCRIPTS)
+    if unknown:
+        parser.error(f"job tidak dikenal: {' '.join(sorted(unknown))}")
+
+    if args.command == 'record':
+        ok = record(args.jobs, args.archive)
+    else:
+        ok = replay(args.jobs, args.archive, args.repeat, args.latency, args.workdir)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import hashlib
+import inspect
+import json
+import os
+
+import numpy as np
+
+DEFAULT_RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(".cache", "results"))
+
+
+def params_key(params, *functions):
+    """Hash parameter analisis + source fungsi aturan, agar perubahan aturan
+    otomatis membuat hasil lama tidak dipakai lagi"""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode())
+    for function in functions:
+        digest.update(inspect.getsource(function).encode())
+    return digest.hexdigest()
+
+
+def window_key(hist):
+    """Identitas jendela data yang dianalisis: timestamp bar terakhir + hash seluruh bar
+
+    Nilai bar terakhir ikut dihitung karena bar harian yang diambil saat market
+    masih buka punya timestamp yang sama dengan bar finalnya; bar yang lebih
+    lama karena Yahoo menyesuaikan ulang histori setelah split / dividen.
+    """
+    digest = hashlib.sha1(hist.index.as_unit('ns').asi8.tobytes())
+    digest.update(np.ascontiguousarray(hist.to_numpy(dtype=float)).tobytes())
+    return f"{hist.index[-1].isoformat()}|{digest.hexdigest()}"
+
+
+def _to_builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Tidak bisa di-serialize: {type(value)}")
+
+
+class ResultCache:
+    """Hasil analisis per simbol yang disimpan antar run (file JSON)
+
+    Hasil dipakai ulang selama jendela data simbol dan parameter analisis
+    tidak berubah. Hasil None (tidak ada sinyal) juga disimpan.
+    """
+
+    def __init__(self, name, directory=DEFAULT_RESULT_CACHE_DIR):
+        self.path = os.path.join(directory, f"{name}.json")
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Cache hasil diabaikan ({self.path}): {e}")
+
+    def split(self, data, key):
+        """Memisahkan data menjadi hasil cache yang masih valid dan simbol yang perlu dihitung"""
+        cached = {}
+        stale = {}
+        for symbol, hist in data.items():
+            entry = self.entries.get(symbol)
+            if entry and entry['params'] == key and entry['bar'] == window_key(hist):
+                cached[symbol] = entry['result']
+            else:
+                stale[symbol] = hist
+        return cached, stale
+
+    def put(self, symbol, hist, key, result):
+        self.entries[symbol] = {'bar': window_key(hist), 'params': key, 'result': result}
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, default=_to_builtin)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,177 @@
+import ast
+import functools
+import json
+import os
+
+import numpy as np
+
+RULES_DIR = os.getenv("RULES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules'))
+
+SIDES = ('bullish', 'bearish', 'info')
+# Nama yang boleh dipakai ekspresi `entry` (dihitung dari poin aturan)
+SCORE_NAMES = ('bullish_signals', 'bearish_signals', 'net_score')
+
+_COMPARE = {
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+_BINARY = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.true_divide}
+
+
+def compile_expression(text):
+    """Mengompilasi ekspresi aturan menjadi fungsi env -> array, beserta nama yang dipakai
+
+    Yang didukung: nama field, angka, + - * /, perbandingan (boleh berantai),
+    and / or / not. Perbandingan dengan NaN bernilai False, sama seperti
+    perbandingan skalar di Python.
+    """
+    try:
+        tree = ast.parse(text, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Ekspresi aturan tidak valid: {text!r} ({e.msg})") from e
+    names = set()
+    return _compile(tree.body, text, names), names
+
+
+def _compile(node, text, names):
+    if isinstance(node, ast.Name):
+        names.add(node.id)
+        return lambda env: env[node.id]
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return lambda env: node.value
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile(value, text, names) for value in node.values]
+        op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return lambda env: functools.reduce(op, (part(env) for part in parts))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        operand = _compile(node.operand, text, names)
+        op = np.logical_not if isinstance(node.op, ast.Not) else np.negative
+        return lambda env: op(operand(env))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        left, right = _compile(node.left, text, names), _compile(node.right, text, names)
+        op = _BINARY[type(node.op)]
+        return lambda env: op(left(env), right(env))
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARE for op in node.ops):
+        operands = [_compile(operand, text, names) for operand in [node.left, *node.comparators]]
+        ops = [_COMPARE[type(op)] for op in node.ops]
+
+        def compare(env):
+            # a < b < c = (a < b) and (b < c), tiap operand dievaluasi sekali
+            values = [operand(env) for operand in operands]
+            return functools.reduce(np.logical_and, (
+                op(values[i], values[i + 1]) for i, op in enumerate(ops)
+            ))
+        return compare
+    raise ValueError(f"Ekspresi aturan tidak didukung: {ast.unparse(node)!r} dalam {text!r}")
+
+
+class RuleSet:
+    """Aturan sinyal deklaratif, dikompilasi menjadi operasi array
+
+    Konfigurasi (lihat rules/*.json):
+      conditions: nama -> ekspresi, kondisi bernama yang bisa dipakai aturan lain
+      labels:     nama -> {cases: [[label, ekspresi], ...], default}, kasus pertama yang cocok
+      rules:      [{when, side: bullish | bearish | info, points, detail}, ...]
+      entry:      opsional, ekspresi atas bullish_signals / bearish_signals / net_score
+
+    Setiap ekspresi dievaluasi sekali untuk seluruh array field, baik satu nilai
+    per simbol (scoring live) maupun panel tanggal × simbol (backtest).
+    """
+
+    def __init__(self, config, name='rules'):
+        self.name = name
+        self.config = config
+        referenced = set()
+
+        def compile_(text):
+            function, names = compile_expression(text)
+            referenced.update(names)
+            return function
+
+        self.conditions = [(key, compile_(text)) for key, text in config.get('conditions', {}).items()]
+        self.labels = [
+            (key, [(value, compile_(text)) for value, text in label['cases']], label['default'])
+            for key, label in config.get('labels', {}).items()
+        ]
+        self.rules = []
+        for rule in config.get('rules', []):
+            missing = [key for key in ('when', 'detail') if key not in rule]
+            if missing:
+                raise ValueError(f"Aturan tanpa {' / '.join(missing)}: {rule!r}")
+            side = rule.get('side', 'bullish')
+            if side not in SIDES:
+                raise ValueError(f"Sisi aturan tidak dikenal: {side!r} ({rule['detail']}), pilih {', '.join(SIDES)}")
+            points = 0 if side == 'info' else rule.get('points', 1)
+            self.rules.append((compile_(rule['when']), side, points, rule['detail']))
+        self.entry = compile_(config['entry']) if config.get('entry') else None
+
+        # Field indikator yang dibutuhkan = nama yang dipakai, selain kondisi bernama dan skor
+        self.fields = sorted(referenced - {key for key, _ in self.conditions} - set(SCORE_NAMES))
+
+    def evaluate(self, fields):
+        """Mask tiap aturan, skor, label, kondisi bernama dan entry untuk semua elemen sekaligus
+
+        `fields` berisi array dengan bentuk sama untuk setiap nama di self.fields:
+        (simbol,) untuk bar terakhir atau (tanggal, simbol) untuk seluruh histori.
+        """
+        env = {name: np.asarray(fields[name]) for name in self.fields}
+        shape = np.broadcast_shapes(*(value.shape for value in env.values())) if env else ()
+        for key, condition in self.conditions:
+            env[key] = np.broadcast_to(condition(env), shape)
+
+        masks = np.zeros((len(self.rules), *shape), dtype=bool)
+        bullish = np.zeros(shape, dtype=int)
+        bearish = np.zeros(shape, dtype=int)
+        for i, (condition, side, points, _) in enumerate(self.rules):
+            masks[i] = condition(env)
+            if side == 'bullish':
+                bullish += points * masks[i]
+            elif side == 'bearish':
+                bearish += points * masks[i]
+        scores = {'bullish_signals': bullish, 'bearish_signals': bearish, 'net_score': bullish - bearish}
+
+        labels = {
+            key: np.select([np.broadcast_to(case(env), shape) for _, case in cases],
+                           [value for value, _ in cases], default)
+            for key, cases, default in self.labels
+        }
+        entry = np.broadcast_to(self.entry({**env, **scores}), shape) if self.entry else None
+        return {
+            'masks': masks,
+            **scores,
+            'labels': labels,
+            'conditions': {key: env[key] for key, _ in self.conditions},
+            'entry': entry,
+        }
+
+    def details(self, masks):
+        """Teks signal_details per simbol (urutan aturan) dari mask (aturan, simbol)"""
+        texts = np.array([detail for *_, detail in self.rules], dtype=object)
+        return [texts[column].tolist() for column in masks.T]
+
+    def evaluate_frame(self, frame):
+        """evaluate() untuk DataFrame simbol × field (mis. IndicatorPanel.latest_fields())"""
+        return self.evaluate({name: frame[name].to_numpy(dtype=float) for name in self.fields})
+
+    def evaluate_snapshot(self, snapshot):
+        """evaluate() untuk satu simbol (dict field -> nilai skalar) tanpa membangun DataFrame
+
+        Hasilnya berbentuk sama dengan evaluate_frame() untuk satu baris.
+        """
+        return self.evaluate({name: [float(snapshot[name])] for name in self.fields})
+
+    def evaluate_panel(self, panel, **params):
+        """evaluate() untuk seluruh bar IndicatorPanel; `params` diteruskan ke IndicatorPanel.fields"""
+        fields = panel.fields(self.fields, **params)
+        return self.evaluate({name: field.to_numpy(dtype=float) for name, field in fields.items()})
+
+
+def load_rules(name, directory=RULES_DIR):
+    """Memuat dan mengompilasi rules/<name>.json"""
+    path = os.path.join(directory, name if name.endswith('.json') else f"{name}.json")
+    with open(path, encoding='utf-8') as f:
+        return RuleSet(json.load(f), name=os.path.splitext(os.path.basename(path))[0])
@@ -1,90 +1,133 @@
+import heapq
 import os
-import time
 import warnings
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
-import requests
-import yfinance as yf
 from dotenv import load_dotenv
 
+import indicators
+import rule_engine
+from cross_section import CROSS_SECTION, CrossSection
+from correlation import MAX_PER_CLUSTER, CorrelationClusters
+from data_provider import filter_min_bars
+from fetch_pipeline import iter_provider
+from indicator_panel import IndicatorPanel
+from instrumentation import RunMetrics
+from precompute import PREOPEN_DELTA, load_precomputed
+from prefilter import Prefilter
+from replay import provider_from_env
+from result_cache import ResultCache, params_key
+from rule_engine import load_rules
+from signal_archive import NOTIFY_MODE, SignalArchive, diff_results, has_changes
+from telegram_delivery import send_telegram
+from timeframes import TimeframeProvider, job_name
+from universe import load_universe
+
 warnings.filterwarnings('ignore')
 load_dotenv()
 
 # Ambil env dari GitHub Secrets
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+# Jumlah hasil teratas yang disimpan (0 = semua)
+RESULT_TOP_K = int(os.getenv("RESULT_TOP_K", "0")) or None
+# Tahap harga / likuiditas prefilter; default mati agar semua saham stock_list tetap dinilai
+SCANNER_PREFILTER = os.getenv("SCANNER_PREFILTER", "").lower() in ("1", "true", "yes")
 
-class IndonesiaStockScreener:
-  def __init__(self):
-    # Daftar saham blue chip dan populer Indonesia (sample)
-    self.stock_list = [
-      'BBCA.JK', 'BBRI.JK', 'BMRI.JK', 'BBNI.JK', 'BDMN.JK',  # Perbankan
-      'ASII.JK', 'UNVR.JK', 'INDF.JK', 'ICBP.JK', 'KLBF.JK', 'NASI.JK',  # Konsumer
-      'TLKM.JK', 'EXCL.JK', 'ISAT.JK',  # Telekomunikasi
-      'ADRO.JK', 'PTBA.JK', 'ITMG.JK',  # Pertambangan
-      'JSMR.JK', 'WSKT.JK', 'WIKA.JK',  # Infrastruktur
-      'GGRM.JK', 'HMSP.JK', 'WIIM.JK', 'ITIC.JK',  # Rokok
-      'SMGR.JK', 'INTP.JK',  # Semen
-      'CPIN.JK', 'JPFA.JK',  # Peternakan
-      'MNCN.JK', 'SCMA.JK', 'EMTK.JK',  # Media & Teknologi
-      'ANTM.JK', 'TINS.JK', 'MDKA.JK'   # Logam
-    ]
+# Timeframe analisis: 1h, 4h (per sesi IDX), 1d atau 1wk
+TIMEFRAME = os.getenv("TIMEFRAME", "1d")
+# Panjang histori per timeframe agar indikator terpanjang punya cukup bar
+PERIODS = {'1h': '3mo', '4h': '6mo', '1d': '3mo', '1wk': '2y'}
+
+# Nilai indikator yang ikut di hasil analisis swing (urutan kolom hasil)
+SWING_RESULT_FIELDS = ('price', 'rsi', 'macd', 'macd_signal', 'stoch_k', 'stoch_d', 'ma_20', 'ma_50')
+
+# Perubahan yang dianggap signifikan untuk notifikasi mode diff
+SIGNAL_DIFF_FIELDS = {'net_score': None, 'bb_position': None, 'volume_spike': None}
 
-  def get_stock_data(self, symbol, period='3mo'):
+class IndonesiaStockScreener:
+  def __init__(self, provider=None, stock_list=None, metrics=None, result_cache=None,
+               interval='1d', prefilter=None, keep_state=False, cross_section=None,
+               clusters=None, rules=None, precomputed=None):
+    self.interval = interval
+    self.job = job_name('scanner', interval)
+    self.provider = provider or TimeframeProvider()
+    self.metrics = metrics or RunMetrics(self.job)
+    # Opsional: ResultCache untuk melewati simbol yang datanya belum berubah
+    self.result_cache = result_cache
+    # Tahap murah sebelum indikator lengkap: harga / likuiditas hanya dengan SCANNER_PREFILTER=1,
+    # tren MA20 dengan PREFILTER_ABOVE_MA20=1
+    self.prefilter = prefilter or (Prefilter() if SCANNER_PREFILTER else Prefilter(min_price=0, min_value=0))
+    # Opsional: CrossSection untuk poin sektor / relative strength di net_score
+    self.cross_section = cross_section
+    # Opsional: CorrelationClusters untuk membatasi pick dari saham yang bergerak bersama
+    self.clusters = clusters
+    # Opsional: PrecomputedIndicators (snapshot semalam) untuk run delta pra-pembukaan
+    self.precomputed = precomputed
+    # Aturan bullish / bearish, detail sinyal dan posisi BB (rules/swing.json)
+    self.rules = rules or load_rules('swing')
+    # Daftar saham blue chip dan populer Indonesia (lihat universe/scanner.txt)
+    self.stock_list = stock_list or load_universe('scanner')
+    # Mode daemon: histori harga dan snapshot indikator run terakhir disimpan di memori
+    self.keep_state = keep_state
+    self.history = {}
+    self.snapshots = {}
+
+  def get_stock_data(self, symbol, period=None):
     """Mengambil data saham dari Yahoo Finance"""
+    return self.get_stocks_data([symbol], period).get(symbol)
+
+  def get_stocks_data(self, symbols, period=None, precomputed=True):
+    """Mengambil data banyak saham sekaligus dalam request batch"""
+    data = {}
+    for chunk in self.iter_stocks_data(symbols, period, precomputed):
+      data.update(chunk)
+    return data
+
+  def iter_stocks_data(self, symbols, period=None, precomputed=True):
+    """Menghasilkan data saham per kelompok begitu unduhannya selesai
+
+    precomputed=False melewati snapshot / state hangat, untuk simbol di luar
+    universe (indeks pembanding) yang tidak perlu dibangun jadi state.
+    """
+    period = period or PERIODS[self.interval]
     try:
-      stock = yf.Ticker(symbol)
-      # hist = stock.download(period=period, interval='1d', progress=False)
-      hist = stock.history(period, interval="1d")
-      if len(hist) < 20:  # Minimal data untuk kalkulasi indikator
-        return None
-      return hist
+      if self.precomputed and precomputed:
+        chunks = self.precomputed.iter_fetch(self.provider, symbols, period=period, interval=self.interval)
+      else:
+        chunks = iter_provider(self.provider, symbols, period=period, interval=self.interval)
+      for data in self.metrics.timed('fetch', chunks):
+        self.metrics.record_bars(data)
+        yield filter_min_bars(data, 20)  # Minimal data untuk kalkulasi indikator
     except Exception as e:
-      print(f"Error fetching {symbol}: {str(e)}")
-      return None
+      self.metrics.error(e)
+      print(f"Error fetching data: {str(e)}")
 
   def calculate_rsi(self, prices, window=14):
     """Menghitung RSI (Relative Strength Index)"""
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    return indicators.rsi(prices, window)
 
   def calculate_macd(self, prices, fast=12, slow=26, signal=9):
     """Menghitung MACD"""
-    exp1 = prices.ewm(span=fast).mean()
-    exp2 = prices.ewm(span=slow).mean()
-    macd = exp1 - exp2
-    signal_line = macd.ewm(span=signal).mean()
-    histogram = macd - signal_line
-    return macd, signal_line, histogram
+    return indicators.macd(prices, fast, slow, signal)
 
   def calculate_bollinger_bands(self, prices, window=20, num_std=2):
     """Menghitung Bollinger Bands"""
-    rolling_mean = prices.rolling(window=window).mean()
-    rolling_std = prices.rolling(window=window).std()
-    upper_band = rolling_mean + (rolling_std * num_std)
-    lower_band = rolling_mean - (rolling_std * num_std)
-    return upper_band, rolling_mean, lower_band
+    return indicators.bollinger_bands(prices, window, num_std)
 
   def calculate_stochastic(self, high, low, close, k_window=14, d_window=3):
     """Menghitung Stochastic Oscillator"""
-    lowest_low = low.rolling(window=k_window).min()
-    highest_high = high.rolling(window=k_window).max()
-    k_percent = 100 * ((close - lowest_low) / (highest_high - lowest_low))
-    d_percent = k_percent.rolling(window=d_window).mean()
-    return k_percent, d_percent
+    return indicators.stochastic(high, low, close, k_window, d_window)
 
   def check_volume_spike(self, volume, window=20, threshold=1.5):
     """Mengecek apakah ada lonjakan volume"""
-    avg_volume = volume.rolling(window=window).mean()
-    current_volume = volume.iloc[-1]
-    avg_volume_recent = avg_volume.iloc[-1]
+    avg_volume = indicators.sma(volume, window)
+    return self.is_volume_spike(volume.iloc[-1], avg_volume.iloc[-1], threshold)
 
+  def is_volume_spike(self, current_volume, avg_volume_recent, threshold=1.5):
+    """Membandingkan volume terkini dengan rata-rata volume"""
     if avg_volume_recent == 0:
       return False
 
@@ -104,131 +147,192 @@ class IndonesiaStockScreener:
     stoch_k, stoch_d = self.calculate_stochastic(high, low, close)
 
     # Moving averages
-    ma_20 = close.rolling(window=20).mean()
-    ma_50 = close.rolling(window=50).mean()
-
-    # Kondisi terkini
-    current_price = close.iloc[-1]
-    current_rsi = rsi.iloc[-1]
-    current_macd = macd.iloc[-1]
-    current_macd_signal = macd_signal.iloc[-1]
-    current_stoch_k = stoch_k.iloc[-1]
-    current_stoch_d = stoch_d.iloc[-1]
-
-    # Price action
-    price_above_ma20 = current_price > ma_20.iloc[-1]
-    ma20_above_ma50 = ma_20.iloc[-1] > ma_50.iloc[-1] if not np.isnan(
-      ma_50.iloc[-1]) else False
-
-    # Volume check
-    volume_spike = self.check_volume_spike(volume)
-
-    # Bollinger Bands position
-    bb_position = "middle"
-    if current_price > bb_upper.iloc[-1]:
-      bb_position = "above_upper"
-    elif current_price < bb_lower.iloc[-1]:
-      bb_position = "below_lower"
-
-    # Swing Trading Signals
-    signals = {
-      'bullish_signals': 0,
-      'bearish_signals': 0,
-      'details': []
-    }
-
-    # Bullish signals
-    if current_rsi < 70 and current_rsi > 30:  # RSI di zona netral
-      if current_rsi > 50:
-        signals['bullish_signals'] += 1
-        signals['details'].append("RSI bullish (>50)")
-
-    if current_macd > current_macd_signal:  # MACD di atas signal line
-      signals['bullish_signals'] += 1
-      signals['details'].append("MACD bullish crossover")
-
-    if price_above_ma20 and ma20_above_ma50:  # Trend bullish
-      signals['bullish_signals'] += 1
-      signals['details'].append("Price above MA20 & MA20>MA50")
-
-    if current_stoch_k > current_stoch_d and current_stoch_k < 80:  # Stochastic bullish tapi belum overbought
-      signals['bullish_signals'] += 1
-      signals['details'].append("Stochastic bullish")
-
-    if volume_spike:
-      signals['bullish_signals'] += 1
-      signals['details'].append("Volume spike detected")
-
-    # Bearish signals
-    if current_rsi > 70:  # Overbought
-      signals['bearish_signals'] += 1
-      signals['details'].append("RSI overbought (>70)")
-
-    if current_rsi < 30:  # Oversold (bisa bullish untuk swing)
-      signals['details'].append("RSI oversold (<30) - potential reversal")
-
-    if current_macd < current_macd_signal:  # MACD di bawah signal
-      signals['bearish_signals'] += 1
-      signals['details'].append("MACD bearish")
-
-    if not price_above_ma20:
-      signals['bearish_signals'] += 1
-      signals['details'].append("Price below MA20")
-
-    # Calculate score
-    net_score = signals['bullish_signals'] - signals['bearish_signals']
-
-    return {
-      'price': current_price,
-      'rsi': current_rsi,
-      'macd': current_macd,
-      'macd_signal': current_macd_signal,
-      'stoch_k': current_stoch_k,
-      'stoch_d': current_stoch_d,
+    ma_20 = indicators.sma(close, 20)
+    ma_50 = indicators.sma(close, 50)
+
+    return self.evaluate_swing_criteria({
+      'price': close.iloc[-1],
+      'rsi': rsi.iloc[-1],
+      'macd': macd.iloc[-1],
+      'macd_signal': macd_signal.iloc[-1],
+      'stoch_k': stoch_k.iloc[-1],
+      'stoch_d': stoch_d.iloc[-1],
       'ma_20': ma_20.iloc[-1],
-      'ma_50': ma_50.iloc[-1] if not np.isnan(ma_50.iloc[-1]) else None,
-      'bb_position': bb_position,
-      'volume_spike': volume_spike,
-      'bullish_signals': signals['bullish_signals'],
-      'bearish_signals': signals['bearish_signals'],
-      'net_score': net_score,
-      'signal_details': signals['details']
-    }
-
-  def screen_stocks(self, min_score=2):
+      'ma_50': ma_50.iloc[-1],
+      'bb_upper': bb_upper.iloc[-1],
+      'bb_lower': bb_lower.iloc[-1],
+      'volume': volume.iloc[-1],
+      'avg_volume': indicators.sma(volume, 20).iloc[-1],
+    })
+
+  def evaluate_swing_criteria(self, snapshot):
+    """Menilai sinyal swing trading dari nilai indikator terkini"""
+    values = {field: [snapshot[field]] for field in SWING_RESULT_FIELDS}
+    return self.swing_results(values, self.rules.evaluate_snapshot(snapshot), [0])[0]
+
+  def evaluate_swing_frame(self, frame):
+    """Menilai semua simbol sekaligus dengan aturan swing (rules/swing.json)
+
+    `frame` berisi nilai indikator terkini, satu baris per simbol (mis.
+    IndicatorPanel.latest_fields()). Setiap aturan dievaluasi sekali untuk
+    seluruh baris; hasilnya dict index baris -> hasil analisis.
+    """
+    values = {field: frame[field].tolist() for field in SWING_RESULT_FIELDS}
+    return self.swing_results(values, self.rules.evaluate_frame(frame), frame.index)
+
+  def swing_results(self, values, evaluation, keys):
+    """Hasil analisis per simbol dari nilai indikator (field -> list) dan hasil RuleSet.evaluate"""
+    columns = {field: values[field] for field in SWING_RESULT_FIELDS if field != 'ma_50'}
+    columns['ma_50'] = [None if np.isnan(value) else value for value in values['ma_50']]
+    columns['bb_position'] = evaluation['labels']['bb_position'].tolist()
+    columns['volume_spike'] = evaluation['conditions']['volume_spike'].tolist()
+    for field in ('bullish_signals', 'bearish_signals', 'net_score'):
+      columns[field] = evaluation[field].tolist()
+    columns['signal_details'] = self.rules.details(evaluation['masks'])
+
+    return {key: dict(zip(columns, row)) for key, row in zip(keys, zip(*columns.values()))}
+
+  def screen_stocks(self, min_score=2, top_k=None):
     """Screen saham berdasarkan kriteria swing trading"""
     results = []
+    self.prefilter.reset()
 
     print("Memulai screening saham untuk swing trading...")
     print("=" * 50)
 
-    for symbol in self.stock_list:
-      print(f"Analyzing {symbol}...")
-
-      data = self.get_stock_data(symbol)
-      if data is None or len(data) < 50:
-        continue
-
-      try:
-        analysis = self.swing_trading_criteria(data)
-
-        if analysis['net_score'] >= min_score:
-          results.append({
-            'symbol': symbol,
-            'company': symbol.replace('.JK', ''),
-            **analysis
-          })
-
-      except Exception as e:
-        print(f"Error analyzing {symbol}: {str(e)}")
-        continue
-
-      time.sleep(0.1)  # Rate limiting
+    key = self.result_key() if self.result_cache else None
+    history, all_snapshots = {}, {}
+    rs_closes, pending = {}, {}
+    closes = {}
+
+    # Analisis berjalan per kelompok data yang sudah selesai diunduh
+    with self.metrics.profile('screen_stocks'):
+      for stock_data in self.iter_stocks_data(self.stock_list):
+        if self.clusters:
+          closes.update({symbol: self.clusters.tail(hist) for symbol, hist in stock_data.items()})
+        stock_data = filter_min_bars(stock_data, 50)
+        if self.cross_section:
+          # Persentil RS atas seluruh universe, sebelum prefilter memangkas simbol
+          rs_closes.update({symbol: self.cross_section.tail(hist) for symbol, hist in stock_data.items()})
+        stock_data = self.prefilter.apply(stock_data)
+
+        # Simbol yang bar terakhirnya belum berubah memakai hasil run sebelumnya
+        analyses = {}
+        if self.result_cache:
+          analyses, stock_data = self.result_cache.split(stock_data, key)
+          self.metrics.count('result_cache_hits', len(analyses))
+
+        # Semua indikator dihitung sekaligus untuk seluruh simbol dalam kelompok
+        with self.metrics.stage('indicators'):
+          latest = self.latest_fields(stock_data) if stock_data else None
+        if self.keep_state:
+          history.update(stock_data)
+          all_snapshots.update(latest.to_dict('index') if latest is not None else {})
+
+        with self.metrics.stage('scoring'):
+          scored = {}
+          if latest is not None:
+            try:
+              scored = self.evaluate_swing_frame(latest)
+            except Exception as e:
+              self.metrics.error(e)
+              print(f"Error analyzing {len(latest)} saham: {str(e)}")
+          self.metrics.count('symbols_analyzed', len(scored))
+
+          for symbol, analysis in scored.items():
+            print(f"Analyzing {symbol}...")
+            analyses[symbol] = analysis
+            if self.result_cache:
+              self.result_cache.put(symbol, stock_data[symbol], key, analysis)
+
+          # Dengan skor lintas saham, filter min_score menunggu seluruh universe
+          if self.cross_section:
+            pending.update(analyses)
+          else:
+            results.extend(self.passing_results(analyses, min_score))
+
+    if self.cross_section:
+      with self.metrics.stage('cross_section'):
+        # Sekali untuk seluruh universe, bukan per kelompok fetch
+        returns = self.cross_section.trailing_returns(rs_closes)
+        analyses = self.cross_section.apply(pending, returns, self.index_return())
+      results.extend(self.passing_results(analyses, min_score))
+
+    if self.result_cache:
+      self.result_cache.save()
+    if self.keep_state:
+      # Diganti sekaligus agar pembaca di thread lain tidak melihat state setengah jadi
+      self.history, self.snapshots = history, all_snapshots
+
+    self.prefilter.report(self.metrics)
+    if self.precomputed:
+      self.precomputed.report(self.metrics)
+    if self.clusters and closes:
+      with self.metrics.stage('correlation'):
+        self.clusters.update(closes)
+      with self.metrics.stage('scoring'):
+        # Pick yang dipindah ke belakang tidak boleh mengisi top_k; heap hanya mengurutkan
+        # hasil sampai top_k pick terkumpul
+        results = self.clusters.cap(self.iter_ranked(results), top_k)
+    else:
+      with self.metrics.stage('scoring'):
+        results = self.rank_results(results, top_k)
+    self.metrics.count('signals', len(results))
+    return results
 
-    # Sort by net score
-    results = sorted(results, key=lambda x: x['net_score'], reverse=True)
+  def latest_fields(self, stock_data):
+    """Nilai indikator terkini per simbol; dari snapshot semalam + bar baru bila tersedia"""
+    if self.precomputed:
+      return self.precomputed.latest_fields(stock_data)
+    return IndicatorPanel(stock_data).latest_fields()
+
+  def passing_results(self, analyses, min_score):
+    """Hasil analisis dengan net score >= min_score, dalam format baris hasil"""
+    return [
+      {'symbol': symbol, 'company': symbol.replace('.JK', ''), **analysis}
+      for symbol, analysis in analyses.items()
+      if analysis['net_score'] >= min_score
+    ]
 
-    return results
+  def index_return(self):
+    """Return indeks pembanding untuk skor lintas saham, None bila tidak tersedia"""
+    symbol = self.cross_section.index_symbol
+    # Indeks bukan bagian universe: tidak ikut state WarmIndicators maupun snapshot precompute
+    hist = self.get_stocks_data([symbol], precomputed=False).get(symbol) if symbol else None
+    if hist is None:
+      print(f"Indeks {symbol} tidak tersedia, relative strength memakai rata-rata universe")
+      return None
+    return self.cross_section.trailing_returns({symbol: hist}).iloc[0]
+
+  def result_key(self):
+    """Kunci parameter + aturan untuk cache hasil analisis"""
+    return params_key(
+      {'job': self.job, 'period': PERIODS[self.interval], 'min_bars': 50, 'rules': self.rules.config,
+       'precomputed': self.precomputed.identity() if self.precomputed else None},
+      indicators, IndicatorPanel, rule_engine,
+      type(self).evaluate_swing_frame, type(self).swing_results,
+    )
+
+  def rank_key(self):
+    """Kunci urutan hasil: net score, lalu urutan stock_list agar hasil dengan skor sama tetap stabil"""
+    position = {symbol: i for i, symbol in enumerate(self.stock_list)}
+    return lambda x: (-x['net_score'], position.get(x['symbol'], len(position)))
+
+  def rank_results(self, results, top_k=None):
+    """Mengurutkan hasil berdasarkan net score (opsional: hanya `top_k` teratas)"""
+    key = self.rank_key()
+    if top_k is not None:
+      # Heap berukuran top_k: O(n log k), tanpa mengurutkan semua hasil
+      return heapq.nsmallest(top_k, results, key=key)
+    return sorted(results, key=key)
+
+  def iter_ranked(self, results):
+    """Hasil satu per satu dalam urutan rank_results; heap O(n), tiap hasil yang diambil O(log n)"""
+    key = self.rank_key()
+    heap = [(key(x), i, x) for i, x in enumerate(results)]
+    heapq.heapify(heap)
+    while heap:
+      yield heapq.heappop(heap)[2]
 
   def display_results(self, results):
     """Menampilkan hasil screening"""
@@ -237,7 +341,7 @@ class IndonesiaStockScreener:
       return
 
     print("\n" + "=" * 80)
-    print("HASIL SCREENING SAHAM SWING TRADING")
+    print(f"HASIL SCREENING SAHAM SWING TRADING{self.timeframe_label().upper()}")
     print("=" * 80)
 
     for i, stock in enumerate(results, 1):
@@ -252,15 +356,21 @@ class IndonesiaStockScreener:
         print(f"   MA50: Rp {stock['ma_50']:,.0f}")
       print(f"   Bollinger Position: {stock['bb_position']}")
       print(f"   Volume Spike: {'Ya' if stock['volume_spike'] else 'Tidak'}")
+      if stock.get('sector'):
+        print(f"   Sektor: {stock['sector']} (return {stock['sector_return'] * 100:+.1f}%), "
+              f"RS vs sektor: {stock['rs_sector'] * 100:+.1f}%, persentil {stock['rs_percentile'] * 100:.0f}")
       print(f"   Sinyal: {', '.join(stock['signal_details'])}")
 
-  def compose_message(self, results):
+  def timeframe_label(self):
+    return "" if self.interval == '1d' else f" ({self.interval})"
+
+  def compose_message(self, results, limit=5):
     """Menyusun pesan untuk dikirim ke Telegram"""
     if not results:
       return "⚠️ Tidak ada saham yang lolos screening swing trading hari ini."
 
-    message = "📊 <b>Hasil Screening Top 5 Saham Swing Trading</b>\n\n"
-    for stock in results[:5]:  # Top 5 saja
+    message = f"📊 <b>Hasil Screening Top {limit} Saham Swing Trading{self.timeframe_label()}</b>\n\n"
+    for stock in results[:limit]:
       message += (
         f"• <code>{stock['symbol']}</code> ({stock['company']}) | Harga: <b>Rp {stock['price']:,.0f}</b> | "
         f"Net Score: <b>{stock['net_score']}</b> (Bullish: {stock['bullish_signals']}, Bearish: {stock['bearish_signals']})\n"
@@ -268,9 +378,34 @@ class IndonesiaStockScreener:
         f"   - Stochastic K: {stock['stoch_k']:.1f}, D: {stock['stoch_d']:.1f}\n"
         f"   - MA20: Rp {stock['ma_20']:,.0f}" + (
             f", MA50: Rp {stock['ma_50']:,.0f}" if stock['ma_50'] else "") + "\n"
-        f"   - Bollinger Position: {stock['bb_position']}, Volume Spike: {'Ya' if stock['volume_spike'] else 'Tidak'}\n"
+        f"   - Bollinger Position: {stock['bb_position']}, Volume Spike: {'Ya' if stock['volume_spike'] else 'Tidak'}\n" + (
+            f"   - Sektor: {stock['sector']}, RS vs sektor: {stock['rs_sector'] * 100:+.1f}%, "
+            f"persentil {stock['rs_percentile'] * 100:.0f}\n" if stock.get('sector') else "") +
+        f"   - Sinyal: {', '.join(stock['signal_details'])}\n\n"
+      )
+    return message.strip()
+
+  def compose_diff_message(self, diff):
+    """Menyusun pesan Telegram yang hanya berisi perubahan dari run sebelumnya"""
+    if not has_changes(diff):
+      return None
+
+    labels = {'net_score': 'Net Score', 'bb_position': 'Bollinger Position', 'volume_spike': 'Volume Spike'}
+    message = f"🔔 <b>Perubahan Hasil Screening Swing Trading{self.timeframe_label()}</b>\n\n"
+    for stock in diff['new']:
+      message += (
+        f"🆕 <code>{stock['symbol']}</code> ({stock['company']}) | Harga: <b>Rp {stock['price']:,.0f}</b> | "
+        f"Net Score: <b>{stock['net_score']}</b>\n"
         f"   - Sinyal: {', '.join(stock['signal_details'])}\n\n"
       )
+    for stock in diff['dropped']:
+      message += f"❌ <code>{stock['symbol']}</code> tidak lolos lagi (Net Score sebelumnya: {stock['net_score']})\n\n"
+    for stock, changes in diff['changed']:
+      message += (
+        f"🔄 <code>{stock['symbol']}</code> | Harga: <b>Rp {stock['price']:,.0f}</b> | "
+        + ', '.join(f"{labels[field]}: {old} → {new}" for field, (old, new) in changes.items())
+        + "\n\n"
+      )
     return message.strip()
 
   def export_to_csv(self, results, filename=None):
@@ -279,7 +414,7 @@ class IndonesiaStockScreener:
       return
 
     if filename is None:
-      filename = f"swing_trading_screening_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+      filename = self.csv_filename()
 
     df = pd.DataFrame(results)
     df.to_csv(filename, index=False)
@@ -287,45 +422,74 @@ class IndonesiaStockScreener:
 
     return filename
 
+  def export_csv_bytes(self, results):
+    """Export hasil ke CSV di memori, mengembalikan (filename, bytes)"""
+    return self.csv_filename(), pd.DataFrame(results).to_csv(index=False).encode('utf-8')
+
+  def csv_filename(self):
+    return f"swing_trading_screening_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+
 
 def main():
   # Inisialisasi screener
-  screener = IndonesiaStockScreener()
+  screener = IndonesiaStockScreener(
+    interval=TIMEFRAME, result_cache=ResultCache(job_name('scanner', TIMEFRAME)),
+    provider=provider_from_env(),
+    cross_section=CrossSection() if CROSS_SECTION else None,
+    clusters=CorrelationClusters(job_name('scanner', TIMEFRAME)) if MAX_PER_CLUSTER else None,
+    precomputed=(load_precomputed(job_name('scanner', TIMEFRAME), TIMEFRAME, PERIODS[TIMEFRAME])
+                 if PREOPEN_DELTA else None),
+  )
 
   # Jalankan screening dengan minimum score 2
-  results = screener.screen_stocks(min_score=1)  # Lowered for demo
+  results = screener.screen_stocks(min_score=1, top_k=RESULT_TOP_K)  # Lowered for demo
+  publish(screener, results)
+
+
+def publish(screener, results):
+  """Mengarsipkan hasil, mengirim laporan ke Telegram dan menulis laporan run"""
+  # Arsipkan hasil dan bandingkan dengan run sebelumnya
+  archive = SignalArchive()
+  try:
+    previous = archive.latest_run(screener.job)
+    archive.record(screener.job, results, score_field='net_score')
+  finally:
+    archive.close()
+
+  diff = None
+  if NOTIFY_MODE == 'diff' and previous is not None:
+    diff = diff_results(previous, results, SIGNAL_DIFF_FIELDS)
+
+  send_report(screener, results, diff=diff)
 
+  # Laporan run (JSON + textfile Prometheus)
+  paths = screener.metrics.write(provider=screener.provider)
+  print(f"Laporan run disimpan ke: {paths['json']}")
+
+
+def send_report(screener, results, diff=None):
+  """Menampilkan hasil dan mengirim pesan + CSV ke Telegram
+
+  Bila `diff` diberikan (mode diff), hanya perubahan yang dikirim, tanpa CSV.
+  """
   # Tampilkan hasil
   screener.display_results(results)
 
-  # Export ke CSV
-  filename = None
-  if results:
-    filename = screener.export_to_csv(results)
-
-  # Kirim ke Telegram
-  message = screener.compose_message(results)
-  url = f"https://api.telegram.org/bot{TOKEN}/sendMessage"
-  payload = {
-    "chat_id": CHAT_ID,
-    "text": message,
-    "parse_mode": "HTML"
-  }
-  
-  res = requests.post(url, data=payload)
-  print("✔️ Terkirim ke Telegram!" if res.status_code == 200 else f"❌ Gagal: {res.text}")
-
-  if filename:
-    url = f"https://api.telegram.org/bot{TOKEN}/sendDocument"
-    payload = {
-      "chat_id": CHAT_ID,
-      "caption": "📈 Hasil lengkap screening swing trading.",
-    }
-    files = {
-      'document': open(filename, 'rb')
-    }
-    res = requests.post(url, data=payload, files=files)
-    print("✔️ File CSV terkirim ke Telegram!" if res.status_code == 200 else f"❌ Gagal kirim file: {res.text}")
+  # Kirim ke Telegram (CSV dibuat di memori, tidak ditulis ke disk)
+  with screener.metrics.stage('delivery'):
+    document = None
+    if diff is not None:
+      message = screener.compose_diff_message(diff)
+    else:
+      message = screener.compose_message(results)
+      if results:
+        filename, content = screener.export_csv_bytes(results)
+        document = (filename, content, "📈 Hasil lengkap screening swing trading.")
+
+    if message is None:
+      print("Tidak ada perubahan sinyal sejak run sebelumnya, notifikasi tidak dikirim.")
+    else:
+      send_telegram(TOKEN, CHAT_ID, message, parse_mode="HTML", document=document, metrics=screener.metrics)
 
   # Tips trading
   print("\n" + "=" * 80)
@@ -338,14 +502,6 @@ def main():
   print("5. Gunakan proper position sizing (maksimal 5% dari portfolio per saham)")
   print("6. Perhatikan kalender ekonomi dan berita perusahaan")
   print("7. Best time frame untuk swing trading: daily dan 4H charts\n")
-  
-  # Clean up
-  if os.path.exists(filename):
-    try:
-      os.remove(filename)
-      print('CSV File sudah dihapus')
-    except OSError as err:
-      print('Error saat menghapus file: ', err)
 
 if __name__ == "__main__":
   main()
@@ -0,0 +1,122 @@
+"""Scan seluruh universe IDX secara terbagi (shard) lalu gabungkan hasilnya
+
+Contoh (8 shard, bisa dijalankan sebagai proses / job workflow terpisah):
+
+    python sharding.py run scan --universe idx --shard 0 --num-shards 8
+    ...
+    python sharding.py run scan --universe idx --shard 7 --num-shards 8
+    python sharding.py merge scan --universe idx --num-shards 8
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from result_cache import ResultCache
+from universe import load_universe, shard
+
+DEFAULT_OUTPUT_DIR = os.getenv("SHARD_OUTPUT_DIR", os.path.join(".cache", "shards"))
+
+
+def _make_runner(kind, stock_list, result_cache=None):
+    """Membuat screener / trading bot untuk daftar saham tertentu"""
+    if kind == 'scan':
+        from scanner import IndonesiaStockScreener
+        return IndonesiaStockScreener(stock_list=stock_list, result_cache=result_cache)
+    if kind == 'bot':
+        from trading_bot import IndonesiaStockTradingBot
+        return IndonesiaStockTradingBot(stock_list=stock_list, result_cache=result_cache)
+    raise ValueError(f"Jenis tidak dikenal: {kind}")
+
+
+def _to_builtin(value):
+    """Konversi nilai numpy agar bisa ditulis sebagai JSON"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Tidak bisa di-serialize: {type(value)}")
+
+
+def shard_path(output_dir, kind, index, num_shards):
+    return os.path.join(output_dir, f"{kind}-shard-{index:03d}-of-{num_shards:03d}.json")
+
+
+def run_shard(kind, universe, index, num_shards, output_dir=DEFAULT_OUTPUT_DIR, min_score=1):
+    """Menjalankan analisis untuk satu shard dan menulis hasil parsialnya"""
+    symbols = shard(load_universe(universe), num_shards, index)
+    result_cache = ResultCache(f"{kind}-shard-{index:03d}-of-{num_shards:03d}")
+    runner = _make_runner(kind, symbols, result_cache)
+
+    if kind == 'scan':
+        results = runner.screen_stocks(min_score=min_score)
+    else:
+        results = runner.run_analysis()
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = shard_path(output_dir, kind, index, num_shards)
+    with open(path, 'w') as f:
+        json.dump({'symbols': symbols, 'results': results}, f, default=_to_builtin)
+
+    print(f"Shard {index + 1}/{num_shards}: {len(results)} hasil dari {len(symbols)} saham -> {path}")
+    return path
+
+
+def merge_shards(kind, universe, num_shards, output_dir=DEFAULT_OUTPUT_DIR):
+    """Menggabungkan hasil semua shard dengan urutan yang sama seperti run tunggal"""
+    results = []
+    missing = []
+    for index in range(num_shards):
+        path = shard_path(output_dir, kind, index, num_shards)
+        if not os.path.exists(path):
+            missing.append(index)
+            continue
+        with open(path) as f:
+            results.extend(json.load(f)['results'])
+
+    if missing:
+        print(f"⚠️ Shard tidak ditemukan: {', '.join(map(str, missing))}")
+
+    runner = _make_runner(kind, load_universe(universe))
+    return runner, runner.rank_results(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Jalankan satu shard')
+    run_parser.add_argument('kind', choices=['scan', 'bot'])
+    run_parser.add_argument('--shard', type=int, required=True)
+
+    merge_parser = subparsers.add_parser('merge', help='Gabungkan hasil shard dan kirim laporan')
+    merge_parser.add_argument('kind', choices=['scan', 'bot'])
+    merge_parser.add_argument('--dry-run', action='store_true', help='Tampilkan saja, jangan kirim')
+
+    run_parser.add_argument('--min-score', type=int, default=1)
+
+    for sub in (run_parser, merge_parser):
+        sub.add_argument('--universe', required=True, help='Nama file di folder universe/ (mis. idx untuk universe/idx.txt)')
+        sub.add_argument('--num-shards', type=int, required=True)
+        sub.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run_shard(args.kind, args.universe, args.shard, args.num_shards,
+                  output_dir=args.output_dir, min_score=args.min_score)
+        return
+
+    runner, results = merge_shards(args.kind, args.universe, args.num_shards, output_dir=args.output_dir)
+    if args.dry_run:
+        runner.display_results(results)
+        print("\n" + runner.compose_message(results))
+    elif args.kind == 'scan':
+        from scanner import send_report
+        send_report(runner, results)
+    else:
+        from trading_bot import send_report
+        send_report(runner, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Arsip hasil scanner / trading bot per run
+
+    python signal_archive.py count BBCA --job scanner --min-score 3 --since 2026-10-01
+    python signal_archive.py last --job trading_bot
+"""
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+DEFAULT_ARCHIVE_PATH = os.getenv("SIGNAL_ARCHIVE_PATH", os.path.join(".cache", "signals.sqlite"))
+
+# 'full': kirim top 5 setiap run, 'diff': kirim hanya perubahan dari run sebelumnya
+NOTIFY_MODE = os.getenv("NOTIFY_MODE", "full")
+
+
+class SignalArchive:
+    """Arsip hasil setiap run (SQLite), diindeks per job, waktu run dan simbol"""
+
+    def __init__(self, path=DEFAULT_ARCHIVE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job TEXT NOT NULL,
+                run_at TEXT NOT NULL,
+                num_results INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_job_time ON runs (job, run_at);
+            CREATE TABLE IF NOT EXISTS signals (
+                run_id INTEGER NOT NULL REFERENCES runs (run_id),
+                job TEXT NOT NULL,
+                run_at TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                score REAL,
+                price REAL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (run_id, symbol)
+            );
+            CREATE INDEX IF NOT EXISTS signals_job_time ON signals (job, run_at);
+            CREATE INDEX IF NOT EXISTS signals_symbol_time ON signals (job, symbol, run_at);
+        """)
+
+    def record(self, job, results, score_field, price_field='price', run_at=None):
+        """Menyimpan hasil satu run (sudah terurut) dan mengembalikan run_id"""
+        run_at = (run_at or datetime.now(timezone.utc)).strftime('%Y-%m-%dT%H:%M:%S')
+        with self.conn:
+            run_id = self.conn.execute(
+                "INSERT INTO runs (job, run_at, num_results) VALUES (?, ?, ?)",
+                (job, run_at, len(results)),
+            ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO signals VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, job, run_at, result['symbol'], rank,
+                     _as_float(result.get(score_field)), _as_float(result.get(price_field)),
+                     json.dumps(result, default=lambda value: value.item()))
+                    for rank, result in enumerate(results, 1)
+                ],
+            )
+        return run_id
+
+    def latest_run(self, job, before_run_id=None):
+        """Hasil run terakhir sebuah job (opsional: sebelum run tertentu), None bila belum ada"""
+        query = "SELECT run_id FROM runs WHERE job = ?"
+        params = [job]
+        if before_run_id is not None:
+            query += " AND run_id < ?"
+            params.append(before_run_id)
+        row = self.conn.execute(query + " ORDER BY run_id DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        return self.run_results(row[0])
+
+    def run_results(self, run_id):
+        rows = self.conn.execute(
+            "SELECT payload FROM signals WHERE run_id = ? ORDER BY rank", (run_id,)
+        ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def count_signals(self, job, symbol, min_score=None, since=None):
+        """Berapa run sebuah simbol muncul (opsional: dengan skor >= min_score, sejak tanggal)"""
+        query = "SELECT COUNT(*) FROM signals WHERE job = ? AND symbol = ?"
+        params = [job, symbol]
+        if min_score is not None:
+            query += " AND score >= ?"
+            params.append(min_score)
+        if since is not None:
+            query += " AND run_at >= ?"
+            params.append(str(since))
+        return self.conn.execute(query, params).fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def diff_results(previous, current, fields):
+    """Membandingkan dua run: sinyal baru, yang hilang dan yang berubah signifikan
+
+    `fields` memetakan nama kolom ke toleransi perubahan relatif; None berarti
+    setiap perubahan nilai dihitung.
+    """
+    before = {result['symbol']: result for result in previous}
+    after = {result['symbol']: result for result in current}
+
+    changed = []
+    for symbol, new in after.items():
+        old = before.get(symbol)
+        if old is None:
+            continue
+        changes = {
+            field: (old.get(field), new.get(field))
+            for field, tolerance in fields.items()
+            if _is_material(old.get(field), new.get(field), tolerance)
+        }
+        if changes:
+            changed.append((new, changes))
+
+    return {
+        'new': [result for symbol, result in after.items() if symbol not in before],
+        'dropped': [result for symbol, result in before.items() if symbol not in after],
+        'changed': changed,
+    }
+
+
+def _is_material(old, new, tolerance):
+    if tolerance is None or not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+        return old != new
+    if old == 0:
+        return new != 0
+    return abs(new / old - 1) > tolerance
+
+
+def has_changes(diff):
+    return any(diff[key] for key in ('new', 'dropped', 'changed'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    count_parser = subparsers.add_parser('count', help='Jumlah run sebuah simbol masuk hasil')
+    count_parser.add_argument('symbol')
+    count_parser.add_argument('--min-score', type=float, default=None)
+    count_parser.add_argument('--since', default=None, help='YYYY-MM-DD (UTC)')
+
+    last_parser = subparsers.add_parser('last', help='Hasil run terakhir')
+
+    for sub in (count_parser, last_parser):
+        sub.add_argument('--job', default='scanner', choices=['scanner', 'trading_bot'])
+        sub.add_argument('--path', default=DEFAULT_ARCHIVE_PATH)
+    args = parser.parse_args()
+
+    archive = SignalArchive(args.path)
+    try:
+        if args.command == 'count':
+            symbol = args.symbol.upper()
+            symbol = symbol if symbol.endswith('.JK') else f"{symbol}.JK"
+            count = archive.count_signals(args.job, symbol, args.min_score, args.since)
+            print(f"{symbol}: {count} run")
+        else:
+            results = archive.latest_run(args.job) or []
+            for rank, result in enumerate(results, 1):
+                print(f"{rank}. {result['symbol']}")
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+import json
+import math
+import os
+from collections import deque
+
+import pandas as pd
+
+DEFAULT_STATE_PATH = os.getenv(
+    "INDICATOR_STATE_PATH", os.path.join(".cache", "indicator_state.json")
+)
+
+NAN = float('nan')
+
+# Kolom bar yang dibaca StreamingIndicators.update
+BAR_COLUMNS = ['High', 'Low', 'Close', 'Volume']
+
+
+class RollingWindow:
+    """Rolling mean / standar deviasi O(1) memakai jumlah berjalan
+
+    Nilai NaN tidak masuk ke jumlah berjalan; selama masih ada di jendela
+    hasilnya NaN, sama seperti rolling pandas, dan pulih setelah keluar.
+    """
+
+    def __init__(self, window, values=None):
+        self.window = window
+        self.values = deque(values or [], maxlen=window)
+        finite = [v for v in self.values if not math.isnan(v)]
+        self.nans = len(self.values) - len(finite)
+        self.total = sum(finite)
+        self.total_sq = sum(v * v for v in finite)
+
+    def push(self, value):
+        if len(self.values) == self.window:
+            old = self.values[0]
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                self.total -= old
+                self.total_sq -= old * old
+        self.values.append(value)
+        if math.isnan(value):
+            self.nans += 1
+        else:
+            self.total += value
+            self.total_sq += value * value
+
+    @property
+    def full(self):
+        """Jendela penuh dan tanpa NaN"""
+        return len(self.values) == self.window and not self.nans
+
+    def mean(self):
+        return self.total / self.window if self.full else NAN
+
+    def std(self):
+        """Standar deviasi sampel (ddof=1), sama seperti pandas"""
+        if not self.full or self.window < 2:
+            return NAN
+        var = (self.total_sq - self.total * self.total / self.window) / (self.window - 1)
+        return math.sqrt(max(var, 0.0))
+
+    def to_dict(self):
+        return {'window': self.window, 'values': list(self.values)}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['window'], state['values'])
+
+
+class RollingExtreme:
+    """Rolling max/min O(1) amortized memakai monotonic deque
+
+    NaN tidak masuk deque; hasilnya NaN selama NaN terakhir masih di jendela.
+    """
+
+    def __init__(self, window, mode='max', count=0, items=None, last_nan=None):
+        self.window = window
+        self.mode = mode
+        self.count = count
+        self.items = deque(tuple(item) for item in (items or []))
+        self.last_nan = last_nan
+
+    def push(self, value):
+        if math.isnan(value):
+            self.last_nan = self.count
+        else:
+            dominated = (lambda last: last <= value) if self.mode == 'max' else (lambda last: last >= value)
+            while self.items and dominated(self.items[-1][1]):
+                self.items.pop()
+            self.items.append((self.count, value))
+        while self.items and self.items[0][0] <= self.count - self.window:
+            self.items.popleft()
+        self.count += 1
+
+    def value(self):
+        if self.count < self.window or (self.last_nan is not None and self.last_nan > self.count - 1 - self.window):
+            return NAN
+        return self.items[0][1]
+
+    def to_dict(self):
+        return {'window': self.window, 'mode': self.mode, 'count': self.count,
+                'items': [list(item) for item in self.items], 'last_nan': self.last_nan}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['window'], state['mode'], state['count'], state['items'], state.get('last_nan'))
+
+
+class EWMean:
+    """EWM mean (adjust=True) bentuk rekursif, identik dengan Series.ewm(span).mean()"""
+
+    def __init__(self, span, num=0.0, den=0.0):
+        self.span = span
+        self.decay = 1 - 2 / (span + 1)
+        self.num = num
+        self.den = den
+
+    def push(self, value):
+        # NaN dilewati tapi bobot lama tetap meluruh (ignore_na=False)
+        if math.isnan(value):
+            self.num *= self.decay
+            self.den *= self.decay
+            return
+        self.num = value + self.decay * self.num
+        self.den = 1 + self.decay * self.den
+
+    def value(self):
+        return self.num / self.den if self.den else NAN
+
+    def to_dict(self):
+        return {'span': self.span, 'num': self.num, 'den': self.den}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['span'], state['num'], state['den'])
+
+
+class StreamingIndicators:
+    """State indikator per simbol yang di-update O(1) tiap bar baru
+
+    Menghasilkan dict yang sama dengan IndicatorPanel.snapshot(), sehingga bisa
+    langsung dipakai evaluate_swing_criteria, evaluate_trend dan
+    evaluate_buy_signal dalam mode live/intraday.
+    """
+
+    def __init__(self, rsi_window=14, macd_fast=12, macd_slow=26, macd_signal=9,
+                 bb_window=20, bb_std=2, k_window=14, d_window=3, atr_window=14):
+        self.bb_std = bb_std
+        self.gain = RollingWindow(rsi_window)
+        self.loss = RollingWindow(rsi_window)
+        self.ema_fast = EWMean(macd_fast)
+        self.ema_slow = EWMean(macd_slow)
+        self.ema_signal = EWMean(macd_signal)
+        self.bb = RollingWindow(bb_window)
+        self.highest = RollingExtreme(k_window, 'max')
+        self.lowest = RollingExtreme(k_window, 'min')
+        self.stoch_k = deque(maxlen=d_window)
+        self.tr = RollingWindow(atr_window)
+        self.ma = {20: RollingWindow(20), 50: RollingWindow(50), 200: RollingWindow(200)}
+        self.avg_volume = RollingWindow(20)
+        self.last_bar = None
+        self.last_timestamp = None
+
+    def update(self, bar, timestamp=None):
+        """Menambahkan satu bar (dict/Series dengan Open/High/Low/Close/Volume)"""
+        high, low, close = float(bar['High']), float(bar['Low']), float(bar['Close'])
+        volume = float(bar['Volume'])
+        if math.isnan(close):
+            # Bar tanpa harga dilewati, sama seperti IndicatorPanel yang hanya memakai baris Close valid
+            if timestamp is not None:
+                self.last_timestamp = str(timestamp)
+            return self
+        prev_close = self.last_bar['Close'] if self.last_bar else None
+
+        # RSI: bar pertama dihitung gain/loss 0, sama seperti delta.where(...)
+        delta = close - prev_close if prev_close is not None else 0.0
+        self.gain.push(max(delta, 0.0))
+        self.loss.push(max(-delta, 0.0))
+
+        self.ema_fast.push(close)
+        self.ema_slow.push(close)
+        self.ema_signal.push(self.ema_fast.value() - self.ema_slow.value())
+
+        self.bb.push(close)
+        for window in self.ma.values():
+            window.push(close)
+        self.avg_volume.push(volume)
+
+        self.highest.push(high)
+        self.lowest.push(low)
+        lowest, highest = self.lowest.value(), self.highest.value()
+        k = 100 * ((close - lowest) / (highest - lowest)) if highest != lowest else NAN
+        self.stoch_k.append(k)
+
+        # Maksimum yang mengabaikan NaN, sama seperti np.fmax di indicators.atr
+        ranges = [high - low] + ([abs(high - prev_close), abs(low - prev_close)] if prev_close is not None else [])
+        self.tr.push(max((r for r in ranges if not math.isnan(r)), default=NAN))
+
+        self.last_bar = {'High': high, 'Low': low, 'Close': close, 'Volume': volume}
+        self.last_timestamp = str(timestamp) if timestamp is not None else None
+        return self
+
+    def update_from(self, hist):
+        """Menambahkan bar dari DataFrame yang lebih baru dari bar terakhir state"""
+        if self.last_timestamp is not None:
+            hist = hist.iloc[hist.index.searchsorted(pd.Timestamp(self.last_timestamp), side='right'):]
+        # Baris numpy biasa, bukan iterrows: warm-up ratusan bar × ribuan simbol
+        bars = hist.to_numpy(dtype=float)[:, [hist.columns.get_loc(c) for c in BAR_COLUMNS]].tolist()
+        for timestamp, bar in zip(hist.index, bars):
+            self.update(dict(zip(BAR_COLUMNS, bar)), timestamp)
+        return self
+
+    def restart_ema(self, closes):
+        """Menghitung ulang EMA MACD dari `closes` saja
+
+        EMA bergantung pada awal histori, tidak seperti jendela rolling; dipakai
+        bila state dihangatkan dari awal jendela yang lebih lama dari run penuh.
+        """
+        fast, slow, signal = (EWMean(ema.span) for ema in (self.ema_fast, self.ema_slow, self.ema_signal))
+        # Rekursi EWMean.push ditulis langsung: dipanggil per simbol tiap run delta
+        fast_num = fast_den = slow_num = slow_den = signal_num = signal_den = 0.0
+        for close in closes:
+            if math.isnan(close):
+                continue
+            fast_num = close + fast.decay * fast_num
+            fast_den = 1 + fast.decay * fast_den
+            slow_num = close + slow.decay * slow_num
+            slow_den = 1 + slow.decay * slow_den
+            signal_num = fast_num / fast_den - slow_num / slow_den + signal.decay * signal_num
+            signal_den = 1 + signal.decay * signal_den
+        fast.num, fast.den, slow.num, slow.den = fast_num, fast_den, slow_num, slow_den
+        signal.num, signal.den = signal_num, signal_den
+        self.ema_fast, self.ema_slow, self.ema_signal = fast, slow, signal
+        return self
+
+    @classmethod
+    def from_history(cls, hist, **params):
+        """Inisialisasi (warm-up) state dari data historis"""
+        return cls(**params).update_from(hist)
+
+    def preview(self, bar):
+        """Snapshot jika `bar` (bar intraday yang belum final) ditambahkan, tanpa mengubah state"""
+        return StreamingIndicators.from_dict(self.to_dict()).update(bar).snapshot()
+
+    def rsi(self):
+        gain, loss = self.gain.mean(), self.loss.mean()
+        if math.isnan(gain) or math.isnan(loss) or (gain == 0 and loss == 0):
+            return NAN
+        if loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + gain / loss))
+
+    def snapshot(self):
+        """Nilai indikator terkini dalam format IndicatorPanel.snapshot()"""
+        if self.last_bar is None:
+            return None
+
+        macd = self.ema_fast.value() - self.ema_slow.value()
+        bb_mean, bb_std = self.bb.mean(), self.bb.std()
+        k_values = list(self.stoch_k)
+        stoch_d = (sum(k_values) / len(k_values)
+                   if len(k_values) == self.stoch_k.maxlen and not any(map(math.isnan, k_values))
+                   else NAN)
+
+        return {
+            'price': self.last_bar['Close'],
+            'rsi': self.rsi(),
+            'macd': macd,
+            'macd_signal': self.ema_signal.value(),
+            'stoch_k': k_values[-1],
+            'stoch_d': stoch_d,
+            'ma_20': self.ma[20].mean(),
+            'ma_50': self.ma[50].mean(),
+            'ma_200': self.ma[200].mean(),
+            'bb_upper': bb_mean + bb_std * self.bb_std,
+            'bb_lower': bb_mean - bb_std * self.bb_std,
+            'volume': self.last_bar['Volume'],
+            'avg_volume': self.avg_volume.mean(),
+            'atr': self.tr.mean(),
+        }
+
+    def to_dict(self):
+        """State lengkap dalam bentuk yang bisa disimpan sebagai JSON"""
+        return {
+            'bb_std': self.bb_std,
+            'gain': self.gain.to_dict(),
+            'loss': self.loss.to_dict(),
+            'ema_fast': self.ema_fast.to_dict(),
+            'ema_slow': self.ema_slow.to_dict(),
+            'ema_signal': self.ema_signal.to_dict(),
+            'bb': self.bb.to_dict(),
+            'highest': self.highest.to_dict(),
+            'lowest': self.lowest.to_dict(),
+            'stoch_k': {'maxlen': self.stoch_k.maxlen, 'values': list(self.stoch_k)},
+            'tr': self.tr.to_dict(),
+            'ma': {str(window): ma.to_dict() for window, ma in self.ma.items()},
+            'avg_volume': self.avg_volume.to_dict(),
+            'last_bar': self.last_bar,
+            'last_timestamp': self.last_timestamp,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        obj = cls.__new__(cls)
+        obj.bb_std = state['bb_std']
+        obj.gain = RollingWindow.from_dict(state['gain'])
+        obj.loss = RollingWindow.from_dict(state['loss'])
+        obj.ema_fast = EWMean.from_dict(state['ema_fast'])
+        obj.ema_slow = EWMean.from_dict(state['ema_slow'])
+        obj.ema_signal = EWMean.from_dict(state['ema_signal'])
+        obj.bb = RollingWindow.from_dict(state['bb'])
+        obj.highest = RollingExtreme.from_dict(state['highest'])
+        obj.lowest = RollingExtreme.from_dict(state['lowest'])
+        obj.stoch_k = deque(state['stoch_k']['values'], maxlen=state['stoch_k']['maxlen'])
+        obj.tr = RollingWindow.from_dict(state['tr'])
+        obj.ma = {int(window): RollingWindow.from_dict(ma) for window, ma in state['ma'].items()}
+        obj.avg_volume = RollingWindow.from_dict(state['avg_volume'])
+        obj.last_bar = state['last_bar']
+        obj.last_timestamp = state['last_timestamp']
+        return obj
+
+
+class IndicatorStateStore:
+    """Menyimpan StreamingIndicators per simbol ke file JSON antar run"""
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            raw = json.load(f)
+        return {symbol: StreamingIndicators.from_dict(state) for symbol, state in raw.items()}
+
+    def save(self, states):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({symbol: state.to_dict() for symbol, state in states.items()}, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,167 @@
+"""Parameter sweep untuk window indikator, min_score dan volatility_factor
+
+Setiap kombinasi dievaluasi dengan backtest vektor atas histori di cache,
+paralel memakai process pool. Kombinasi dikelompokkan per parameter
+indikator, sehingga misalnya MACD tidak dihitung ulang ketika yang berubah
+hanya volatility_factor atau min_score.
+
+    python sweep.py bot --rsi-window 10,14,21 --macd 12/26/9,8/21/5 \\
+        --bb 20/2,20/2.5 --volatility-factor 1,1.5,2 --period 5y
+    python sweep.py scan --min-score 1,2,3 --take-profit 0.08,0.1 --stop-loss 0.03,0.05
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from backtest import backtest_buy_signal, backtest_swing
+from indicator_panel import IndicatorPanel
+
+_panel = None
+
+
+def _init_worker(data):
+    """Panel dibuat sekali per proses worker; memo indikator dipakai ulang antar task
+
+    `data` boleh path panel memmap: setiap worker memetakan file yang sama,
+    jadi data harga tidak disalin per proses.
+    """
+    global _panel
+    if isinstance(data, str):
+        from price_panel import PricePanel
+        _panel = PricePanel(data).indicator_panel()
+    else:
+        _panel = IndicatorPanel(data)
+
+
+def _run_group(kind, indicator_params, variants, max_hold):
+    """Mengevaluasi semua varian yang berbagi parameter indikator yang sama"""
+    rows = []
+    for variant in variants:
+        if kind == 'scan':
+            _, _, aggregate = backtest_swing(
+                _panel, max_hold=max_hold, **indicator_params, **variant
+            )
+        else:
+            _, _, aggregate = backtest_buy_signal(
+                _panel, max_hold=max_hold, **indicator_params, **variant
+            )
+        rows.append({
+            **_flatten(indicator_params),
+            **variant,
+            **aggregate,
+        })
+    return rows
+
+
+def _flatten(params):
+    flat = {}
+    for key, value in params.items():
+        flat[key] = '/'.join(map(str, value)) if isinstance(value, tuple) else value
+    return flat
+
+
+def build_grid(kind, rsi_windows, macd_spans, bbs, min_scores, take_profits, stop_losses,
+               volatility_factors):
+    """Kombinasi parameter, dikelompokkan per parameter indikator"""
+    groups = []
+    if kind == 'scan':
+        for rsi_window, macd in itertools.product(rsi_windows, macd_spans):
+            variants = [
+                {'min_score': m, 'take_profit': tp, 'stop_loss': sl}
+                for m, tp, sl in itertools.product(min_scores, take_profits, stop_losses)
+            ]
+            groups.append(({'rsi_window': rsi_window, 'macd_spans': macd}, variants))
+    else:
+        for rsi_window, macd, bb in itertools.product(rsi_windows, macd_spans, bbs):
+            variants = [{'volatility_factor': vf} for vf in volatility_factors]
+            groups.append(({'rsi_window': rsi_window, 'macd_spans': macd, 'bb': bb}, variants))
+    return groups
+
+
+def run_sweep(kind, data, groups, max_hold=20, max_workers=None):
+    """Menjalankan semua grup paralel, hasil diurutkan berdasarkan expectancy
+
+    `data` berupa dict DataFrame per simbol atau path panel memmap.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(data,)) as executor:
+        futures = [
+            executor.submit(_run_group, kind, indicator_params, variants, max_hold)
+            for indicator_params, variants in groups
+        ]
+        rows = [row for future in futures for row in future.result()]
+
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    return results.sort_values(['expectancy_pct', 'hit_rate'], ascending=False).reset_index(drop=True)
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',')]
+
+
+def _float_list(value):
+    return [float(v) for v in value.split(',')]
+
+
+def _spans_list(value):
+    return [tuple(float(x) if '.' in x else int(x) for x in v.split('/')) for v in value.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('kind', choices=['scan', 'bot'])
+    parser.add_argument('--universe', default=None, help='Default: watchlist scanner / trading_bot')
+    parser.add_argument('--period', default='5y')
+    parser.add_argument('--max-hold', type=int, default=20)
+    parser.add_argument('--rsi-window', type=_int_list, default=[14])
+    parser.add_argument('--macd', type=_spans_list, default=[(12, 26, 9)], help='fast/slow/signal,...')
+    parser.add_argument('--bb', type=_spans_list, default=[(20, 2)], help='window/num_std,...')
+    parser.add_argument('--min-score', type=_int_list, default=[1])
+    parser.add_argument('--take-profit', type=_float_list, default=[0.10])
+    parser.add_argument('--stop-loss', type=_float_list, default=[0.05])
+    parser.add_argument('--volatility-factor', type=_float_list, default=[1.5])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--output', default='sweep_results.csv')
+    parser.add_argument('--panel', help='Pakai panel memmap (price_panel.py) alih-alih cache')
+    args = parser.parse_args()
+
+    if args.panel:
+        from price_panel import PricePanel
+        data = args.panel
+        num_symbols = len(PricePanel(args.panel).symbols)
+    else:
+        from price_cache import CachedDataProvider
+        from universe import load_universe
+
+        universe = args.universe or ('scanner' if args.kind == 'scan' else 'trading_bot')
+        data = CachedDataProvider().fetch(load_universe(universe), period=args.period)
+        num_symbols = len(data)
+
+    groups = build_grid(
+        args.kind, args.rsi_window, args.macd, args.bb, args.min_score,
+        args.take_profit, args.stop_loss, args.volatility_factor,
+    )
+    total = sum(len(variants) for _, variants in groups)
+    print(f"Sweep {args.kind}: {total} kombinasi ({len(groups)} grup indikator), {num_symbols} saham")
+
+    started = time.perf_counter()
+    results = run_sweep(args.kind, data, groups, args.max_hold, args.workers)
+    print(f"Selesai dalam {time.perf_counter() - started:.1f} detik")
+
+    if results.empty:
+        print("Tidak ada hasil.")
+        return
+
+    print("\n" + results.head(20).round(2).to_string())
+    results.to_csv(args.output, index=False)
+    print(f"\nHasil lengkap disimpan ke: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+SYNTHETIC_END_DATE = '2024-12-31'
+
+
+def synthetic_symbols(num_symbols):
+    return [f"SYN{i:05d}.JK" for i in range(num_symbols)]
+
+
+def generate_ohlcv(num_symbols, num_bars, seed=42, end=SYNTHETIC_END_DATE):
+    """Data OHLCV sintetis yang deterministik (random walk per simbol)
+
+    Setiap simbol punya RNG sendiri dari (seed, nomor simbol), sehingga data
+    satu simbol tidak berubah ketika jumlah simbol atau bar diperbesar.
+    """
+    index = pd.bdate_range(end=end, periods=num_bars, tz='Asia/Jakarta', name='Date')
+    frames = {}
+
+    for i, symbol in enumerate(synthetic_symbols(num_symbols)):
+        rng = np.random.default_rng([seed, i])
+        start_price = rng.uniform(100, 10000)
+        volatility = rng.uniform(0.01, 0.04)
+
+        close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, num_bars)))
+        open_ = np.concatenate([[start_price], close[:-1]]) * (1 + rng.normal(0, volatility / 4, num_bars))
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, volatility, num_bars))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, volatility, num_bars))
+        volume = rng.lognormal(15, 1, num_bars).round()
+
+        frames[symbol] = pd.DataFrame({
+            'Open': np.maximum(open_.round(), 1),
+            'High': np.maximum(high.round(), 1),
+            'Low': np.maximum(low.round(), 1),
+            'Close': np.maximum(close.round(), 1),
+            'Volume': volume,
+        }, index=index)
+
+    return frames
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+# Bila diisi, pesan ditulis ke file JSONL ini alih-alih dikirim (run offline / replay)
+TELEGRAM_OUTBOX = os.getenv("TELEGRAM_OUTBOX")
+
+# Batas panjang teks sendMessage dan caption dokumen dari Bot API
+MAX_MESSAGE_LENGTH = 4096
+MAX_CAPTION_LENGTH = 1024
+
+
+def parse_chat_ids(value):
+    """TELEGRAM_CHAT_ID boleh berisi beberapa chat id dipisah koma"""
+    return [chat_id.strip() for chat_id in (value or '').split(',') if chat_id.strip()]
+
+
+def split_message(text, limit=MAX_MESSAGE_LENGTH):
+    """Memecah pesan panjang di batas paragraf / baris agar tag HTML tidak terpotong"""
+    chunks = []
+    current = ''
+    for paragraph in text.split('\n\n'):
+        candidate = f"{current}\n\n{paragraph}" if current else paragraph
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        current = ''
+        for line in paragraph.split('\n'):
+            candidate = f"{current}\n{line}" if current else line
+            if len(candidate) <= limit:
+                current = candidate
+                continue
+            if current:
+                chunks.append(current)
+            # Satu baris yang lebih panjang dari limit terpaksa dipotong
+            while len(line) > limit:
+                chunks.append(line[:limit])
+                line = line[limit:]
+            current = line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TelegramClient:
+    """Pengiriman ke Telegram Bot API dengan satu session, retry dan kirim paralel"""
+
+    def __init__(self, token, api_url=TELEGRAM_API_URL, max_retries=4, backoff=0.5,
+                 max_backoff=30.0, max_workers=4, timeout=30):
+        self.base_url = f"{api_url.rstrip('/')}/bot{token}"
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        delay += random.uniform(0, delay / 2)
+        return max(delay, retry_after or 0)
+
+    def _post(self, method, data, files=None):
+        """POST dengan retry untuk 429, 5xx dan error koneksi; mengembalikan pesan error atau None"""
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                res = self.session.post(
+                    f"{self.base_url}/{method}", data=data, files=files, timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if res.status_code == 200:
+                    return None
+                error = f"HTTP {res.status_code}: {res.text}"
+                if res.status_code == 429:
+                    try:
+                        retry_after = res.json().get('parameters', {}).get('retry_after')
+                    except ValueError:
+                        pass
+                elif res.status_code < 500:
+                    # 400 / 403 dst. tidak akan berhasil walau diulang
+                    return error
+
+            if attempt >= self.max_retries:
+                return error
+            time.sleep(self._backoff_delay(attempt, retry_after))
+            attempt += 1
+
+    def send_message(self, chat_id, text, parse_mode=None):
+        """Mengirim pesan, dipecah bila melebihi batas panjang Telegram"""
+        for chunk in split_message(text):
+            data = {"chat_id": chat_id, "text": chunk}
+            if parse_mode:
+                data["parse_mode"] = parse_mode
+            error = self._post('sendMessage', data)
+            if error:
+                return error
+        return None
+
+    def send_document(self, chat_id, filename, content, caption=None):
+        """Upload dokumen dari memori (bytes), tanpa file sementara di disk"""
+        data = {"chat_id": chat_id}
+        if caption:
+            data["caption"] = caption[:MAX_CAPTION_LENGTH]
+        # Tuple bytes dibaca ulang oleh requests setiap retry
+        return self._post('sendDocument', data, files={'document': (filename, content)})
+
+    def deliver(self, chat_ids, message, parse_mode=None, document=None):
+        """Mengirim pesan (dan dokumen opsional) ke semua chat id secara paralel
+
+        `document` berupa tuple (filename, bytes, caption). Mengembalikan
+        dict chat_id -> pesan error (None bila sukses).
+        """
+        def send(chat_id):
+            error = self.send_message(chat_id, message, parse_mode)
+            if error is None and document is not None:
+                error = self.send_document(chat_id, *document)
+            return error
+
+        if not chat_ids:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chat_ids))) as executor:
+            return dict(zip(chat_ids, executor.map(send, chat_ids)))
+
+    def close(self):
+        self.session.close()
+
+
+def write_outbox(path, chat_ids, message, parse_mode=None, document=None):
+    """Menambahkan satu pengiriman ke outbox JSONL; dokumen disimpan sebagai hash + ukuran"""
+    entry = {'chat_ids': chat_ids, 'parse_mode': parse_mode, 'message': message, 'document': None}
+    if document is not None:
+        filename, content, *caption = document
+        entry['document'] = {
+            'filename': filename,
+            'caption': caption[0] if caption else None,
+            'size': len(content),
+            'sha256': hashlib.sha256(content).hexdigest(),
+        }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    return {chat_id: None for chat_id in chat_ids}
+
+
+def send_telegram(token, chat_ids, message, parse_mode=None, document=None, metrics=None):
+    """Mengirim laporan ke semua chat id dan mencetak status per chat"""
+    chat_ids = parse_chat_ids(chat_ids) if chat_ids is None or isinstance(chat_ids, str) else list(chat_ids)
+    if TELEGRAM_OUTBOX:
+        print(f"📝 Pesan untuk {len(chat_ids)} chat disimpan ke outbox: {TELEGRAM_OUTBOX}")
+        return write_outbox(TELEGRAM_OUTBOX, chat_ids, message, parse_mode=parse_mode, document=document)
+
+    client = TelegramClient(token)
+    try:
+        errors = client.deliver(chat_ids, message, parse_mode=parse_mode, document=document)
+    finally:
+        client.close()
+
+    for chat_id, error in errors.items():
+        if error:
+            if metrics is not None:
+                metrics.error('TelegramError')
+            print(f"❌ Gagal kirim ke {chat_id}: {error}")
+        else:
+            print(f"✔️ Terkirim ke Telegram ({chat_id})" + (f" beserta {document[0]}!" if document else "!"))
+    return errors
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate_ohlcv  # noqa: E402
+
+
+@pytest.fixture
+def ohlcv():
+    """Data OHLCV sintetis deterministik: 6 simbol × 300 bar harian"""
+    return generate_ohlcv(6, 300)
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import backtest_buy_signal, backtest_swing, simulate_exits
+from indicator_panel import IndicatorPanel
+
+
+def reference_exits(frames, entries, take_profit, stop_loss, max_hold):
+    """Trade per trade di atas bar simbol itu sendiri (loop biasa)"""
+    trades = []
+    for (symbol, date), tp, sl in zip(entries, take_profit, stop_loss):
+        hist = frames[symbol]
+        start = hist.index.get_loc(date)
+        future = hist.iloc[start + 1:start + 1 + max_hold]
+        if future.empty:
+            continue
+        outcome, exit_date, exit_price = 'timeout', future.index[-1], future['Close'].iloc[-1]
+        for bar_date, bar in future.iterrows():
+            if bar['Low'] <= sl:
+                outcome, exit_date, exit_price = 'sl', bar_date, min(sl, bar['Open'])
+                break
+            if bar['High'] >= tp:
+                outcome, exit_date, exit_price = 'tp', bar_date, max(tp, bar['Open'])
+                break
+        trades.append({'symbol': symbol, 'entry_date': date, 'exit_date': exit_date, 'outcome': outcome,
+                       'bars_held': future.index.get_loc(exit_date) + 1, 'exit_price': exit_price})
+    return pd.DataFrame(trades)
+
+
+@pytest.fixture
+def gapped(ohlcv):
+    """Sebagian simbol tidak punya bar di beberapa tanggal (suspensi, libur berbeda)"""
+    frames = dict(ohlcv)
+    for i, symbol in enumerate(list(frames)[::2]):
+        hist = frames[symbol]
+        frames[symbol] = hist.drop(hist.index[[40 + i, 41 + i, 150, 220 + 3 * i]])
+    return frames
+
+
+@pytest.mark.parametrize('max_hold', [1, 5, 20])
+def test_exits_use_each_symbols_own_bars(gapped, max_hold):
+    panel = IndicatorPanel(gapped)
+    close = panel.close.to_numpy()
+    rng = np.random.default_rng(3)
+    entries = (rng.random(close.shape) < 0.1) & np.isfinite(close)
+    take_profit, stop_loss = close * 1.04, close * 0.97
+
+    trades = simulate_exits(panel, entries, take_profit, stop_loss, max_hold)
+
+    t_idx, s_idx = np.nonzero(entries)
+    expected = reference_exits(
+        gapped, [(panel.symbols[s], panel.close.index[t]) for t, s in zip(t_idx, s_idx)],
+        take_profit[t_idx, s_idx], stop_loss[t_idx, s_idx], max_hold,
+    )
+    columns = list(expected.columns)
+    actual = trades[columns].sort_values(['symbol', 'entry_date']).reset_index(drop=True)
+    expected = expected.sort_values(['symbol', 'entry_date']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_index_type=False)
+
+
+def test_stop_loss_wins_ties_and_gaps_fill_at_open():
+    index = pd.date_range('2024-01-01', periods=4, freq='B')
+    hist = pd.DataFrame({
+        'Open': [100.0, 100.0, 90.0, 100.0],
+        'High': [101.0, 111.0, 95.0, 100.0],
+        'Low': [99.0, 94.0, 85.0, 100.0],
+        'Close': [100.0, 100.0, 90.0, 100.0],
+        'Volume': [1e6] * 4,
+    }, index=index)
+    panel = IndicatorPanel({'A.JK': hist})
+    entries = np.array([[True], [True], [False], [False]])
+    close = panel.close.to_numpy()
+
+    trades = simulate_exits(panel, entries, close * 1.10, close * 0.95, max_hold=3)
+
+    # Bar 2 menyentuh TP dan SL sekaligus: SL dianggap lebih dulu
+    assert trades['outcome'].tolist() == ['sl', 'sl']
+    assert trades['exit_price'].iloc[0] == 95.0
+    # Bar 3 dibuka di bawah SL (gap): exit di harga open
+    assert trades['exit_date'].iloc[1] == index[2] and trades['exit_price'].iloc[1] == 90.0
+
+
+def test_backtests_summarize_trades(ohlcv):
+    for backtest in (backtest_swing, backtest_buy_signal):
+        trades, per_symbol, aggregate = backtest(ohlcv)
+        assert aggregate['trades'] == len(trades) == per_symbol['trades'].sum()
+        assert (trades['bars_held'] <= 20).all()
+        assert set(trades['outcome']) <= {'tp', 'sl', 'timeout'}
@@ -0,0 +1,53 @@
+import pytest
+
+from cross_section import CrossSection
+from data_provider import FakeDataProvider
+from fetch_pipeline import ConcurrentFetcher, TokenBucket
+from prefilter import Prefilter
+from scanner import IndonesiaStockScreener
+from synthetic import generate_ohlcv
+
+
+@pytest.fixture
+def frames():
+    frames = generate_ohlcv(12, 120)
+    # Kalender berbeda: beberapa simbol tidak punya bar di tanggal tertentu
+    for i, symbol in enumerate(list(frames)[::3]):
+        hist = frames[symbol]
+        frames[symbol] = hist.drop(hist.index[[-2 - i, -7 - i]])
+    return frames
+
+
+def screen(frames, chunk_size, prefilter=None):
+    provider = ConcurrentFetcher(FakeDataProvider(frames), max_workers=1, bucket=TokenBucket(rate=1000),
+                                 chunk_size=chunk_size)
+    sectors = {symbol: f"Sektor {i % 3}" for i, symbol in enumerate(frames)}
+    screener = IndonesiaStockScreener(
+        provider=provider, stock_list=list(frames), prefilter=prefilter or Prefilter(0, 0, False),
+        cross_section=CrossSection(sectors=sectors, lookback=10, index_symbol=None),
+    )
+    return screener.screen_stocks(min_score=-10)
+
+
+def test_results_do_not_depend_on_fetch_chunks(frames):
+    expected = screen(frames, chunk_size=len(frames))
+    assert expected and all('rs_percentile' in result for result in expected)
+    for chunk_size in (1, 5):
+        assert screen(frames, chunk_size) == expected
+
+
+def test_percentiles_do_not_depend_on_prefilter(frames):
+    expected = {result['symbol']: result for result in screen(frames, chunk_size=5)}
+    # Ambang harga di median close terakhir: kira-kira separuh universe tersaring
+    min_price = sorted(hist['Close'].iloc[-1] for hist in frames.values())[len(frames) // 2]
+    filtered = screen(frames, chunk_size=5, prefilter=Prefilter(min_price, 0, False))
+    assert 0 < len(filtered) < len(expected)
+    for result in filtered:
+        for field in ('rs_percentile', 'sector_return', 'net_score'):
+            assert result[field] == expected[result['symbol']][field]
+
+
+def test_trailing_returns_from_frames_or_close_tails(frames):
+    cross_section = CrossSection(sectors={}, lookback=10)
+    tails = {symbol: cross_section.tail(hist) for symbol, hist in frames.items()}
+    assert cross_section.trailing_returns(frames).equals(cross_section.trailing_returns(tails))
@@ -0,0 +1,111 @@
+from datetime import datetime
+
+import pytest
+
+import scanner
+import trading_bot
+from cross_section import CrossSection
+from daemon import NOT_READY, WIB, StockDaemon, next_run, parse_schedule
+from data_provider import FakeDataProvider
+from indicator_panel import IndicatorPanel
+from precompute import WarmIndicators
+from prefilter import Prefilter
+from synthetic import generate_ohlcv
+
+
+@pytest.fixture
+def frames():
+    return generate_ohlcv(8, 300)
+
+
+@pytest.fixture
+def daemon(frames):
+    provider = FakeDataProvider({symbol: hist.iloc[:-1] for symbol, hist in frames.items()})
+    symbols = list(frames)
+    runners = {
+        'scanner': scanner.IndonesiaStockScreener(
+            provider=provider, stock_list=symbols, keep_state=True, prefilter=Prefilter(0, 0, False),
+            precomputed=WarmIndicators('scanner', '1d', scanner.PERIODS['1d'])),
+        'trading_bot': trading_bot.IndonesiaStockTradingBot(
+            provider=provider, stock_list=symbols, keep_state=True,
+            precomputed=WarmIndicators('trading_bot', '1d', trading_bot.PERIODS['1d'])),
+    }
+    daemon = StockDaemon(runners=runners)
+    yield daemon
+    daemon.close()
+
+
+def test_commands_before_first_run(daemon):
+    assert daemon.scan_message() == NOT_READY
+    assert daemon.bot_message() == NOT_READY
+    assert daemon.signal_message('BBCA.JK') == NOT_READY
+
+
+def test_signal_escapes_user_symbol(daemon):
+    daemon.run_job('scanner')
+    message = daemon.signal_message('<b>X</b>.JK')
+    assert '&lt;b&gt;X&lt;/b&gt;.JK' in message
+    assert '<b>X' not in message
+
+
+def test_commands_answer_from_memory(daemon, frames):
+    daemon.run_job('scanner')
+    daemon.run_job('trading_bot')
+    symbol = next(iter(frames))
+    calls = len(daemon.runners['scanner'].provider.calls)
+
+    message = daemon.signal_message(symbol)
+    assert f"<b>{symbol}</b>" in message and 'Swing' in message and 'Trading bot' in message
+    assert 'Data per' in daemon.scan_message() and 'Data per' in daemon.bot_message()
+    # Perintah tidak mengunduh ulang
+    assert len(daemon.runners['scanner'].provider.calls) == calls
+
+
+def test_refresh_only_fetches_and_applies_new_bars(daemon, frames):
+    daemon.run_job('scanner')
+    warm = daemon.runners['scanner'].precomputed
+    symbol = next(iter(frames))
+    # Bar terakhir bisa belum final: state berhenti satu bar sebelumnya
+    assert warm.states[symbol].last_timestamp == str(frames[symbol].index[-3])
+
+    provider = daemon.runners['scanner'].provider
+    provider.frames = frames
+    provider.calls.clear()
+    daemon.run_job('scanner')
+
+    assert {period for _, period, _, _ in provider.calls} == {warm.delta_period}
+    assert warm.states[symbol].last_timestamp == str(frames[symbol].index[-2])
+    snapshot = daemon.runners['scanner'].snapshots[symbol]
+    expected = IndicatorPanel({symbol: frames[symbol]}).snapshot()[symbol]
+    for field in ('price', 'ma_20', 'rsi', 'atr', 'avg_volume'):
+        assert snapshot[field] == pytest.approx(expected[field], rel=1e-9)
+
+
+def test_index_symbol_stays_out_of_warm_state(frames):
+    index, *symbols = list(frames)
+    provider = FakeDataProvider(frames)
+    screener = scanner.IndonesiaStockScreener(
+        provider=provider, stock_list=symbols, keep_state=True, prefilter=Prefilter(0, 0, False),
+        cross_section=CrossSection(sectors={}, lookback=10, index_symbol=index),
+        precomputed=WarmIndicators('scanner', '1d', scanner.PERIODS['1d']))
+    daemon = StockDaemon(runners={'scanner': screener})
+    try:
+        daemon.run_job('scanner')
+        daemon.run_job('scanner')
+    finally:
+        daemon.close()
+
+    assert set(screener.precomputed.states) == set(symbols)
+    # Indeks tetap diambil tiap run untuk relative strength, dengan histori penuh
+    assert [period for batch, period, _, _ in provider.calls if index in batch] == [scanner.PERIODS['1d']] * 2
+
+
+def test_schedule_skips_weekends():
+    schedule = parse_schedule('07:00=trading_bot,08:00=scanner,08:00=trading_bot')
+    # Jumat 16:00 WIB -> Senin 07:00
+    at, jobs = next_run(schedule, datetime(2024, 12, 27, 16, 0, tzinfo=WIB))
+    assert (at.weekday(), at.hour, jobs) == (0, 7, ['trading_bot'])
+    at, jobs = next_run(schedule, at)
+    assert (at.hour, jobs) == (8, ['scanner', 'trading_bot'])
+    with pytest.raises(ValueError):
+        parse_schedule('07:00=unknown')
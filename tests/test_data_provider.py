@@ -0,0 +1,56 @@
+import types
+
+import pandas as pd
+
+import data_provider
+from data_provider import FakeDataProvider, YahooDataProvider, trim_to_period
+
+
+def yahoo_stub(frames, monkeypatch):
+    """yf.download palsu: satu frame MultiIndex (group_by='ticker') per batch"""
+    calls = []
+
+    def download(batch, **kwargs):
+        calls.append((list(batch), kwargs))
+        return pd.concat({symbol: frames[symbol] for symbol in batch if symbol in frames}, axis=1)
+
+    monkeypatch.setattr(data_provider, '_yfinance', lambda: types.SimpleNamespace(download=download))
+    return calls
+
+
+def test_yahoo_provider_downloads_in_batches(ohlcv, monkeypatch):
+    calls = yahoo_stub(ohlcv, monkeypatch)
+    symbols = list(ohlcv)
+
+    data = YahooDataProvider(batch_size=4).fetch(symbols + symbols[:2], period='1y')
+
+    assert [batch for batch, _ in calls] == [symbols[:4], symbols[4:]]
+    assert all(kwargs['period'] == '1y' and kwargs['group_by'] == 'ticker' for _, kwargs in calls)
+    assert list(data) == symbols
+    for symbol, hist in data.items():
+        pd.testing.assert_frame_equal(hist, ohlcv[symbol], check_names=False)
+
+
+def test_yahoo_provider_drops_rows_of_other_calendars(ohlcv, monkeypatch):
+    a, b = list(ohlcv)[:2]
+    frames = {a: ohlcv[a], b: ohlcv[b].iloc[:-3]}
+    calls = yahoo_stub(frames, monkeypatch)
+
+    data = YahooDataProvider().fetch([a, b, 'MISSING.JK'], start='2020-01-01')
+
+    assert calls[0][1]['start'] == '2020-01-01' and 'period' not in calls[0][1]
+    assert set(data) == {a, b}
+    # Baris NaN dari penggabungan kalender tidak ikut ke simbol yang tidak punya bar itu
+    assert data[b].index.equals(ohlcv[b].index[:-3])
+    assert not data[b].isna().any().any()
+
+
+def test_fake_provider_serves_period_and_start(ohlcv):
+    provider = FakeDataProvider(ohlcv)
+    symbol = next(iter(ohlcv))
+    hist = ohlcv[symbol]
+
+    assert provider.fetch([symbol], period='1mo')[symbol].equals(trim_to_period(hist, '1mo'))
+    start = hist.index[-10]
+    assert provider.fetch([symbol, 'MISSING.JK'], start=start)[symbol].equals(hist.iloc[-10:])
+    assert provider.calls[-1] == ([symbol, 'MISSING.JK'], '3mo', '1d', start)
@@ -0,0 +1,194 @@
+import io
+import json
+import logging
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+import requests
+
+import data_provider
+from data_provider import RateLimitError, RetryableFetchError, YahooDataProvider
+from fetch_pipeline import ConcurrentFetcher, TokenBucket
+from instrumentation import RunMetrics
+
+
+class StubServer:
+    """Server HTTP lokal: satu GET per batch, dengan jeda dan status yang disuntikkan"""
+
+    def __init__(self, frames, statuses=(), delay=0.02):
+        self.frames = frames
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                symbols = parse_qs(urlparse(self.path).query)['symbols'][0].split(',')
+                with stub.lock:
+                    stub.requests.append(symbols)
+                    status = stub.statuses.pop(0) if stub.statuses else 200
+                time.sleep(stub.delay)
+                if status != 200:
+                    self.send_response(status)
+                    self.send_header('Retry-After', '0.05')
+                    self.end_headers()
+                    return
+                body = {
+                    'frames': {s: stub.frames[s].to_json(orient='split') for s in symbols if s in stub.frames},
+                    'errors': {s: 'possibly delisted; no price data found' for s in symbols if s not in stub.frames},
+                }
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write(json.dumps(body).encode())
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/history"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubHttpProvider:
+    def __init__(self, url):
+        self.url = url
+
+    def fetch(self, symbols, period='3mo', interval='1d', start=None):
+        response = requests.get(self.url, params={'symbols': ','.join(symbols)}, timeout=5)
+        if response.status_code == 429:
+            raise RateLimitError(retry_after=float(response.headers['Retry-After']))
+        if response.status_code >= 500:
+            raise RetryableFetchError(f"HTTP {response.status_code}")
+        frames = response.json()['frames']
+        return {symbol: pd.read_json(io.StringIO(frame), orient='split') for symbol, frame in frames.items()}
+
+
+def fetcher(provider, **kwargs):
+    kwargs.setdefault('bucket', TokenBucket(rate=100))
+    return ConcurrentFetcher(provider, max_workers=4, backoff=0.01, **kwargs)
+
+
+def test_stub_server_with_delays_and_429s(ohlcv):
+    symbols = list(ohlcv) + ['GONE.JK']
+    with StubServer(ohlcv, statuses=[429, 429, 503]) as server:
+        pipeline = fetcher(StubHttpProvider(server.url), chunk_size=3)
+        data = pipeline.fetch(symbols)
+
+    assert set(data) == set(ohlcv)
+    for symbol, hist in data.items():
+        assert hist['Close'].tolist() == ohlcv[symbol]['Close'].tolist()
+    # Satu request per batch + satu ulangan per status yang disuntikkan
+    assert len(server.requests) == 3 + 3
+    assert all(len(batch) <= 3 for batch in server.requests)
+    # Simbol delisted tidak diulang sendiri, hanya ikut batch yang terkena 429 / 503
+    assert sum('GONE.JK' in batch for batch in server.requests) <= 4
+    assert pipeline.bucket.rate < pipeline.bucket.max_rate
+    assert sorted(s for result in pipeline.results for s in result.symbols) == sorted(symbols)
+    assert all(result.error is None for result in pipeline.results)
+
+
+class ScriptedProvider:
+    """Provider yang menjalankan daftar respons (callable) berurutan per panggilan"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def fetch(self, symbols, period='3mo', interval='1d', start=None):
+        self.calls.append(list(symbols))
+        return self.responses.pop(0)(symbols)
+
+
+def test_permanent_errors_are_not_retried():
+    def fail(symbols):
+        raise ValueError('No data found, symbol may be delisted')
+
+    provider = ScriptedProvider(fail)
+    pipeline = fetcher(provider)
+    assert pipeline.fetch(['GONE.JK']) == {}
+    assert provider.calls == [['GONE.JK']]
+    assert pipeline.results[0].attempts == 1
+    assert isinstance(pipeline.results[0].error, ValueError)
+
+
+def test_partial_rate_limit_retries_only_throttled_symbols(ohlcv):
+    a, b, c = list(ohlcv)[:3]
+
+    def partial(symbols):
+        raise RateLimitError(symbols=[b], data={a: ohlcv[a], c: ohlcv[c]})
+
+    provider = ScriptedProvider(partial, lambda symbols: {s: ohlcv[s] for s in symbols})
+    pipeline = fetcher(provider, chunk_size=3)
+    assert set(pipeline.fetch([a, b, c])) == {a, b, c}
+    assert provider.calls == [[a, b, c], [b]]
+    assert pipeline.bucket.rate < pipeline.bucket.max_rate
+
+
+def test_chunk_latency_includes_retries_and_backoff(ohlcv):
+    a, b = list(ohlcv)[:2]
+
+    def throttled(symbols):
+        time.sleep(0.02)
+        raise RateLimitError(retry_after=0.05)
+
+    provider = ScriptedProvider(throttled, lambda symbols: {s: ohlcv[s] for s in symbols})
+    pipeline = fetcher(provider, chunk_size=2)
+    pipeline.fetch([a, b])
+
+    [result] = pipeline.results
+    assert result.attempts == 2 and result.symbols == [a, b]
+    # Request pertama + tunggu Retry-After sebelum percobaan kedua
+    assert result.latency >= 0.07
+
+    metrics = RunMetrics('test')
+    metrics.collect_provider(pipeline)
+    assert metrics.report()['fetch_chunks'] == [
+        {'symbols': 2, 'first_symbol': a, 'latency_seconds': result.latency, 'attempts': 2}
+    ]
+    assert 'stocks_fetch_chunk_latency_seconds{job="test",chunk="0"' in metrics.prometheus()
+
+
+def test_retries_stop_after_max_retries():
+    def throttled(symbols):
+        raise RateLimitError()
+
+    provider = ScriptedProvider(*[throttled] * 3)
+    pipeline = fetcher(provider, max_retries=2)
+    assert pipeline.fetch(['A.JK']) == {}
+    assert len(provider.calls) == 3
+    assert isinstance(pipeline.results[0].error, RateLimitError)
+
+
+def test_yahoo_provider_reports_throttled_symbols_per_batch(ohlcv, monkeypatch):
+    a, b, c, d = list(ohlcv)[:4]
+
+    def download(batch, **kwargs):
+        # yf.download hanya mencatat error per ticker, tidak melemparnya
+        logger = logging.getLogger('yfinance')
+        logger.error(f"['{c}']: YFRateLimitError('Too Many Requests. Rate limited. Try after a while.')")
+        logger.error(f"['{d}']: possibly delisted; no price data found")
+        return pd.concat({s: ohlcv[s] for s in (a, b)}, axis=1)
+
+    monkeypatch.setattr(data_provider, '_yfinance', lambda: types.SimpleNamespace(download=download))
+
+    with pytest.raises(RateLimitError) as raised:
+        YahooDataProvider(raise_errors=True).fetch([a, b, c, d])
+    assert raised.value.symbols == [c]
+    assert set(raised.value.data) == {a, b}
+
+    # Tanpa raise_errors (jalur lama) hasil parsial langsung dikembalikan
+    assert set(YahooDataProvider().fetch([a, b, c, d])) == {a, b}
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+from indicator_panel import IndicatorPanel
+
+
+def series_fields(hist):
+    """Field aturan bar terakhir lewat jalur per-Series (indicators.py per simbol)"""
+    close, high, low, volume = hist['Close'], hist['High'], hist['Low'], hist['Volume']
+    macd, macd_signal, _ = indicators.macd(close)
+    bb_upper, _, bb_lower = indicators.bollinger_bands(close)
+    stoch_k, stoch_d = indicators.stochastic(high, low, close)
+    columns = {
+        'price': close,
+        'rsi': indicators.rsi(close),
+        'macd': macd,
+        'macd_signal': macd_signal,
+        'stoch_k': stoch_k,
+        'stoch_d': stoch_d,
+        'ma_20': indicators.sma(close, 20),
+        'ma_50': indicators.sma(close, 50),
+        'ma_200': indicators.sma(close, 200),
+        'bb_upper': bb_upper,
+        'bb_lower': bb_lower,
+        'volume': volume,
+        'avg_volume': indicators.sma(volume, 20),
+        'atr': indicators.atr(high, low, close),
+    }
+    return pd.DataFrame(columns)
+
+
+def assert_parity(data, panel):
+    latest = panel.latest_fields()
+    for symbol, hist in data.items():
+        expected = series_fields(hist)
+        pd.testing.assert_series_equal(latest.loc[symbol], expected.iloc[-1], check_names=False)
+        # Seluruh bar simbol, bukan hanya bar terakhir
+        for name, panel_values in panel.fields(expected.columns).items():
+            np.testing.assert_allclose(panel_values[symbol].loc[hist.index], expected[name], rtol=1e-9)
+
+
+def test_panel_matches_per_series(ohlcv):
+    assert_parity(ohlcv, IndicatorPanel(ohlcv))
+
+
+@pytest.mark.parametrize('dropped', [[-5], [-5, -120, -121], [-1]])
+def test_panel_matches_per_series_with_missing_bars(ohlcv, dropped):
+    data = dict(ohlcv)
+    symbol = next(iter(data))
+    hist = data[symbol]
+    data[symbol] = hist.drop(hist.index[dropped])
+
+    panel = IndicatorPanel(data)
+    assert_parity(data, panel)
+    # Tanggal yang tidak dimiliki simbol tetap NaN di panel gabungan
+    assert panel.sma(20)[symbol].loc[hist.index[dropped]].isna().all()
+
+
+def test_panel_with_ragged_history_lengths(ohlcv):
+    data = {symbol: hist.iloc[i * 20:] for i, (symbol, hist) in enumerate(ohlcv.items())}
+    assert_parity(data, IndicatorPanel(data))
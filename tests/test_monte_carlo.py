@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from monte_carlo import PortfolioSimulator, bar_ratios
+
+
+def single_bar_ratios(open_, high, low, close):
+    """Histori satu tanggal: setiap bar hasil bootstrap sama persis"""
+    return {field: np.array([[value]]) for field, value in
+            (('Open', open_), ('High', high), ('Low', low), ('Close', close))}
+
+
+def test_take_profit_before_stop_loss():
+    simulator = PortfolioSimulator(hold=3)
+    ratios = single_bar_ratios(1.0, 1.06, 0.97, 1.01)
+    is_tp, is_sl, value = simulator.simulate_batch(
+        np.random.default_rng(0), ratios, np.array([100.0]), np.array([105.0]), np.array([96.0]), 4)
+    assert is_tp.all() and not is_sl.any()
+    # Exit di TP pada bar pertama, sisanya dipegang sebagai kas
+    assert value == pytest.approx(np.full((4, 3), 1.05))
+
+
+def test_stop_loss_wins_ties_and_gaps_fill_at_open():
+    simulator = PortfolioSimulator(hold=3)
+    tie = single_bar_ratios(1.0, 1.06, 0.97, 1.01)
+    is_tp, is_sl, value = simulator.simulate_batch(
+        np.random.default_rng(0), tie, np.array([100.0]), np.array([105.0]), np.array([98.0]), 2)
+    assert is_sl.all() and not is_tp.any()
+    assert value == pytest.approx(np.full((2, 3), 0.98))
+
+    gap = single_bar_ratios(0.90, 0.95, 0.85, 0.92)
+    _, is_sl, value = simulator.simulate_batch(
+        np.random.default_rng(0), gap, np.array([100.0]), np.array([110.0]), np.array([95.0]), 2)
+    assert is_sl.all() and value == pytest.approx(np.full((2, 3), 0.90))
+
+
+def reference_batch(rng, ratios, entry, take_profit, stop_loss, size, hold):
+    """Path per path dengan loop biasa, memakai undian hari yang sama"""
+    days = rng.integers(0, len(ratios['Close']), size=(size, hold))
+    is_tp = np.zeros((size, len(entry)), dtype=bool)
+    is_sl = np.zeros((size, len(entry)), dtype=bool)
+    value = np.zeros((size, hold))
+    for p in range(size):
+        for s in range(len(entry)):
+            prev, exit_price, exited = entry[s], None, False
+            for b, day in enumerate(days[p]):
+                bar = {field: prev * ratios[field][day, s] for field in ratios}
+                if not exited and bar['Low'] <= stop_loss[s]:
+                    exit_price, exited, is_sl[p, s] = min(stop_loss[s], bar['Open']), True, True
+                elif not exited and bar['High'] >= take_profit[s]:
+                    exit_price, exited, is_tp[p, s] = max(take_profit[s], bar['Open']), True, True
+                elif not exited and b == hold - 1:
+                    exit_price = bar['Close']
+                price = exit_price if exited else bar['Close']
+                value[p, b] += price / entry[s] / len(entry)
+                prev = bar['Close']
+    return is_tp, is_sl, value
+
+
+def test_batch_matches_path_by_path_loop(ohlcv):
+    symbols = list(ohlcv)[:3]
+    ratios = bar_ratios(ohlcv, symbols)
+    entry = np.array([ohlcv[s]['Close'].iloc[-1] for s in symbols])
+    take_profit, stop_loss = entry * 1.05, entry * 0.96
+    simulator = PortfolioSimulator(hold=10)
+
+    actual = simulator.simulate_batch(np.random.default_rng(7), ratios, entry, take_profit, stop_loss, 40)
+    expected = reference_batch(np.random.default_rng(7), ratios, entry, take_profit, stop_loss, 40, 10)
+    for got, want in zip(actual, expected):
+        np.testing.assert_allclose(got, want, rtol=1e-12)
+
+
+def test_value_at_risk_from_seeded_paths():
+    index = pd.date_range('2024-01-01', periods=5, freq='B')
+    close = [100.0, 102.0, 99.96, 101.9592, 99.920016]  # +2% / -2% bergantian
+    frames = {'A.JK': pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close}, index=index)}
+    results = [{'symbol': 'A.JK', 'buy_price': 100.0, 'take_profit': 1e9, 'stop_loss': 1e-9}]
+    simulator = PortfolioSimulator(paths=200, hold=4, seed=3, var_level=0.9)
+
+    annotated, summary = simulator.simulate(results, frames)
+
+    ratios = bar_ratios(frames, ['A.JK'])['Close'][:, 0]
+    days = np.random.default_rng(3).integers(0, len(ratios), size=(200, 4))
+    returns = (np.prod(ratios[days], axis=1) - 1) * 100
+    tail = np.percentile(returns, 10)
+    assert summary['var_pct'] == pytest.approx(-tail)
+    assert summary['cvar_pct'] == pytest.approx(-returns[returns <= tail].mean())
+    assert summary['expected_return_pct'] == pytest.approx(returns.mean())
+    assert annotated[0]['prob_tp'] == annotated[0]['prob_sl'] == 0
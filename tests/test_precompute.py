@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+import scanner
+import trading_bot
+from data_provider import FakeDataProvider
+from precompute import PrecomputedIndicators
+from prefilter import Prefilter
+
+
+def assert_same_results(actual, expected):
+    # Ekor snapshot yang lebih pendek dari jendela run (bot, 1y) menyisakan selisih EMA ~(25/27)^260
+    assert [result['symbol'] for result in actual] == [result['symbol'] for result in expected]
+    for got, want in zip(actual, expected):
+        assert got.keys() == want.keys()
+        for field, value in want.items():
+            if isinstance(value, float) and not math.isnan(value):
+                assert got[field] == pytest.approx(value, rel=1e-7, abs=1e-9), (want['symbol'], field)
+            elif isinstance(value, float):
+                assert math.isnan(got[field]), (want['symbol'], field)
+            else:
+                assert got[field] == value, (want['symbol'], field)
+
+
+@pytest.mark.parametrize('module, factory, new_bars', [
+    (scanner, lambda **kw: scanner.IndonesiaStockScreener(prefilter=Prefilter(0, 0, False), **kw), 0),
+    (scanner, lambda **kw: scanner.IndonesiaStockScreener(prefilter=Prefilter(0, 0, False), **kw), 2),
+    (trading_bot, lambda **kw: trading_bot.IndonesiaStockTradingBot(**kw), 2),
+])
+def test_delta_run_matches_full_run(tmp_path, ohlcv, module, factory, new_bars):
+    symbols = list(ohlcv)
+    period = module.PERIODS['1d']
+    nightly = {symbol: hist.iloc[:len(hist) - new_bars] for symbol, hist in ohlcv.items()}
+
+    precomputed = PrecomputedIndicators('job', '1d', period, directory=str(tmp_path))
+    precomputed.build(FakeDataProvider(nightly).fetch(symbols, period=period))
+    precomputed.save()
+    loaded = PrecomputedIndicators('job', '1d', period, directory=str(tmp_path))
+    assert loaded.load()
+
+    def run(**kwargs):
+        job = factory(provider=FakeDataProvider(ohlcv), stock_list=symbols, keep_state=True, **kwargs)
+        results = job.screen_stocks(min_score=-10) if module is scanner else job.run_analysis()
+        # Indikator terakhir semua simbol, termasuk yang tidak menghasilkan sinyal
+        snapshots = [{'symbol': symbol, **job.snapshots[symbol]} for symbol in symbols]
+        return results, snapshots
+
+    full_results, full_snapshots = run()
+    delta_results, delta_snapshots = run(precomputed=loaded)
+    assert loaded.stats['delta'] == len(symbols)
+    assert_same_results(delta_snapshots, full_snapshots)
+    assert_same_results(delta_results, full_results)
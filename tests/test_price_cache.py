@@ -0,0 +1,42 @@
+import pandas as pd
+
+from data_provider import FakeDataProvider
+from price_cache import CachedDataProvider, PriceCache
+
+
+def cached_provider(tmp_path, frames):
+    return CachedDataProvider(FakeDataProvider(frames), PriceCache(str(tmp_path / 'ohlcv.sqlite')))
+
+
+def test_incremental_refresh_appends_new_bars(tmp_path, ohlcv):
+    history = {symbol: hist.iloc[:-3] for symbol, hist in ohlcv.items()}
+    provider = cached_provider(tmp_path, history)
+    provider.fetch(list(ohlcv), period='1y')
+
+    provider.provider.frames = ohlcv
+    data = provider.fetch(list(ohlcv), period='1y')
+
+    # Refresh kedua hanya mengambil bar sejak bar kedua terakhir di cache
+    assert all(start is not None for _, _, _, start in provider.provider.calls[1:])
+    assert provider.stats['readjusted'] == 0
+    for symbol, hist in data.items():
+        pd.testing.assert_frame_equal(hist, ohlcv[symbol].iloc[-len(hist):], check_freq=False, check_names=False, check_index_type=False)
+
+
+def test_split_adjusted_history_is_downloaded_again(tmp_path, ohlcv):
+    symbol = next(iter(ohlcv))
+    provider = cached_provider(tmp_path, {s: hist.iloc[:-3] for s, hist in ohlcv.items()})
+    provider.fetch(list(ohlcv), period='1y')
+
+    # Split 1:5 tiga bar sebelum akhir: Yahoo menyesuaikan seluruh bar sebelumnya
+    adjusted = ohlcv[symbol].copy()
+    before = adjusted.index < adjusted.index[-3]
+    adjusted.loc[before, ['Open', 'High', 'Low', 'Close']] /= 5
+    adjusted.loc[before, 'Volume'] *= 5
+    provider.provider.frames = {**ohlcv, symbol: adjusted}
+    data = provider.fetch(list(ohlcv), period='1y')
+
+    assert provider.stats['readjusted'] == 1
+    pd.testing.assert_frame_equal(data[symbol], adjusted.iloc[-len(data[symbol]):], check_freq=False, check_names=False, check_index_type=False)
+    stored = provider.cache.load(symbol)
+    assert (stored['Close'].to_numpy() == adjusted['Close'].iloc[-len(stored):].to_numpy()).all()
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from correlation import CorrelationClusters
+from data_provider import FakeDataProvider
+from scanner import IndonesiaStockScreener
+from trading_bot import IndonesiaStockTradingBot
+
+
+@pytest.fixture
+def results():
+    rng = random.Random(7)
+    return [
+        {'symbol': f"S{i:03d}.JK", 'net_score': rng.randint(-3, 6), 'potential_profit': rng.randint(0, 20)}
+        for i in range(200)
+    ]
+
+
+@pytest.fixture
+def clusters(tmp_path, results):
+    clusters = CorrelationClusters('test', max_per_cluster=2, directory=str(tmp_path))
+    clusters.labels = {result['symbol']: f"C{i % 7}" for i, result in enumerate(results)}
+    return clusters
+
+
+@pytest.mark.parametrize('runner_class', [IndonesiaStockScreener, IndonesiaStockTradingBot])
+@pytest.mark.parametrize('top_k', [None, 1, 5, 14, 30])
+def test_heap_cap_matches_full_sort(runner_class, results, clusters, top_k):
+    runner = runner_class(provider=FakeDataProvider(), stock_list=[r['symbol'] for r in results])
+    expected = clusters.cap(runner.rank_results(results))[:top_k]
+    assert clusters.cap(runner.iter_ranked(results), top_k) == expected
+    assert list(runner.iter_ranked(results)) == runner.rank_results(results)
+    assert runner.rank_results(results, top_k) == runner.rank_results(results)[:top_k]
+
+
+@pytest.mark.parametrize('runner_class', [IndonesiaStockScreener, IndonesiaStockTradingBot])
+def test_prefilter_is_opt_in(runner_class):
+    runner = runner_class(provider=FakeDataProvider())
+    assert runner.prefilter.stages == []
@@ -0,0 +1,34 @@
+from precompute import PrecomputedIndicators
+from result_cache import ResultCache
+from scanner import IndonesiaStockScreener
+from trading_bot import IndonesiaStockTradingBot
+
+
+def test_entry_is_reused_only_for_the_same_window(tmp_path, ohlcv):
+    symbol, hist = next(iter(ohlcv.items()))
+    cache = ResultCache('test', directory=str(tmp_path))
+    cache.put(symbol, hist, 'params', {'net_score': 3})
+    cache.save()
+
+    cache = ResultCache('test', directory=str(tmp_path))
+    cached, stale = cache.split({symbol: hist}, 'params')
+    assert cached == {symbol: {'net_score': 3}} and not stale
+
+    # Histori lama disesuaikan ulang (dividen), bar terakhir tetap sama
+    adjusted = hist.copy()
+    adjusted.iloc[:-10, adjusted.columns.get_loc('Close')] *= 0.98
+    cached, stale = cache.split({symbol: adjusted}, 'params')
+    assert not cached and list(stale) == [symbol]
+
+    cached, stale = cache.split({symbol: hist}, 'other-params')
+    assert not cached
+
+
+def test_result_key_separates_delta_and_full_runs(tmp_path, ohlcv):
+    for job in (IndonesiaStockScreener, IndonesiaStockTradingBot):
+        full = job(stock_list=list(ohlcv)).result_key()
+        precomputed = PrecomputedIndicators('test', directory=str(tmp_path))
+        precomputed.build(ohlcv)
+        precomputed.save()
+        delta = job(stock_list=list(ohlcv), precomputed=precomputed).result_key()
+        assert delta != full
@@ -0,0 +1,150 @@
+import math
+
+import pandas as pd
+import pytest
+
+from data_provider import FakeDataProvider
+from indicator_panel import IndicatorPanel
+from rule_engine import RuleSet, compile_expression
+from scanner import IndonesiaStockScreener
+from trading_bot import IndonesiaStockTradingBot
+
+
+def baseline_swing(s):
+    """Kriteria swing sebelum rules/swing.json (if-blok scanner.py lama)"""
+    price_above_ma20 = s['price'] > s['ma_20']
+    ma20_above_ma50 = s['ma_20'] > s['ma_50'] if not math.isnan(s['ma_50']) else False
+    volume_spike = False if s['avg_volume'] == 0 else s['volume'] > s['avg_volume'] * 1.5
+    bb_position = 'middle'
+    if s['price'] > s['bb_upper']:
+        bb_position = 'above_upper'
+    elif s['price'] < s['bb_lower']:
+        bb_position = 'below_lower'
+
+    bullish, bearish, details = 0, 0, []
+    if 30 < s['rsi'] < 70 and s['rsi'] > 50:
+        bullish += 1
+        details.append("RSI bullish (>50)")
+    if s['macd'] > s['macd_signal']:
+        bullish += 1
+        details.append("MACD bullish crossover")
+    if price_above_ma20 and ma20_above_ma50:
+        bullish += 1
+        details.append("Price above MA20 & MA20>MA50")
+    if s['stoch_k'] > s['stoch_d'] and s['stoch_k'] < 80:
+        bullish += 1
+        details.append("Stochastic bullish")
+    if volume_spike:
+        bullish += 1
+        details.append("Volume spike detected")
+    if s['rsi'] > 70:
+        bearish += 1
+        details.append("RSI overbought (>70)")
+    if s['rsi'] < 30:
+        details.append("RSI oversold (<30) - potential reversal")
+    if s['macd'] < s['macd_signal']:
+        bearish += 1
+        details.append("MACD bearish")
+    if not price_above_ma20:
+        bearish += 1
+        details.append("Price below MA20")
+
+    return {
+        **{field: s[field] for field in ('price', 'rsi', 'macd', 'macd_signal', 'stoch_k', 'stoch_d', 'ma_20')},
+        'ma_50': None if math.isnan(s['ma_50']) else s['ma_50'],
+        'bb_position': bb_position,
+        'volume_spike': volume_spike,
+        'bullish_signals': bullish,
+        'bearish_signals': bearish,
+        'net_score': bullish - bearish,
+        'signal_details': details,
+    }
+
+
+def baseline_trend(s):
+    if s['ma_50'] > s['ma_200'] and s['price'] > s['ma_50']:
+        return 'bullish'
+    if s['ma_50'] < s['ma_200'] and s['price'] < s['ma_50']:
+        return 'bearish'
+    return 'neutral'
+
+
+def baseline_buy(s):
+    conditions = [s['rsi'] < 30, s['macd'] > s['macd_signal'], s['price'] <= s['bb_lower'] * 1.02]
+    return (True, s['price']) if sum(conditions) >= 2 else (False, None)
+
+
+@pytest.fixture
+def snapshots(ohlcv):
+    """Nilai indikator terkini di banyak titik histori, plus kasus batas buatan"""
+    frames = [
+        IndicatorPanel({symbol: hist.iloc[:end] for symbol, hist in ohlcv.items()}).latest_fields()
+        for end in range(30, 301, 30)
+    ]
+    frame = pd.concat(frames, ignore_index=True)
+    base = frame.iloc[-1].to_dict()
+    edges = [
+        {**base, 'ma_50': math.nan, 'ma_200': math.nan},
+        {**base, 'rsi': math.nan, 'macd': math.nan},
+        {**base, 'avg_volume': 0.0},
+        {**base, 'rsi': 30.0, 'price': base['bb_upper']},
+        {**base, 'rsi': 70.0, 'stoch_k': 80.0, 'stoch_d': 10.0},
+        {**base, 'rsi': 20.0, 'price': base['bb_lower'] * 1.02, 'macd': 0.0, 'macd_signal': 0.0},
+    ]
+    frame = pd.concat([frame, pd.DataFrame(edges)], ignore_index=True)
+    frame.index = [f"S{i:03d}.JK" for i in range(len(frame))]
+    return frame
+
+
+def comparable(results):
+    """NaN diganti None agar hasil bisa dibandingkan dengan =="""
+    return [
+        {key: None if isinstance(value, float) and math.isnan(value) else value for key, value in result.items()}
+        for result in results
+    ]
+
+
+def test_swing_rules_match_baseline(snapshots):
+    screener = IndonesiaStockScreener(provider=FakeDataProvider())
+    expected = [baseline_swing(row) for row in snapshots.to_dict('records')]
+
+    assert comparable(screener.evaluate_swing_frame(snapshots).values()) == comparable(expected)
+    assert comparable(screener.evaluate_swing_criteria(row) for row in snapshots.to_dict('records')) == \
+        comparable(expected)
+
+
+def test_trend_and_buy_rules_match_baseline(snapshots):
+    bot = IndonesiaStockTradingBot(provider=FakeDataProvider())
+    rows = snapshots.to_dict('records')
+
+    assert [bot.evaluate_trend(row) for row in rows] == [baseline_trend(row) for row in rows]
+    assert [bot.evaluate_buy_signal(row) for row in rows] == [baseline_buy(row) for row in rows]
+    analyses = bot.analyze_frame(snapshots)
+    for key, row in zip(snapshots.index, rows):
+        signal, price = baseline_buy(row)
+        assert (analyses[key] is not None) == signal
+        if signal:
+            assert analyses[key]['trend'] == baseline_trend(row) and analyses[key]['buy_price'] == price
+
+
+def test_expressions_follow_python_semantics():
+    function, names = compile_expression("1 < x <= 3 and not y > 2 or z / 2 == -1")
+    assert names == {'x', 'y', 'z'}
+    env = {'x': [0, 2, 3, math.nan], 'y': [0, 0, 5, 0], 'z': [0, 0, 0, -2]}
+    expected = [(1 < x <= 3 and not y > 2) or z / 2 == -1 for x, y, z in zip(*env.values())]
+    assert function({key: pd.Series(value).to_numpy() for key, value in env.items()}).tolist() == expected
+
+    with pytest.raises(ValueError, match="tidak didukung"):
+        compile_expression("abs(x) > 1")
+    with pytest.raises(ValueError, match="tidak valid"):
+        compile_expression("x >")
+
+
+@pytest.mark.parametrize('rule, message', [
+    ({'when': 'x > 1'}, 'detail'),
+    ({'detail': 'Tanpa kondisi'}, 'when'),
+    ({'when': 'x > 1', 'side': 'long', 'detail': 'Sisi salah'}, 'Sisi aturan'),
+])
+def test_malformed_rules_raise_value_error(rule, message):
+    with pytest.raises(ValueError, match=message):
+        RuleSet({'rules': [rule]})
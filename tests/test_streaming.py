@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from indicator_panel import IndicatorPanel
+from streaming import IndicatorStateStore, StreamingIndicators
+from synthetic import generate_ohlcv
+
+
+@pytest.fixture
+def history():
+    symbol, hist = next(iter(generate_ohlcv(1, 400).items()))
+    return symbol, hist
+
+
+def assert_snapshot_parity(symbol, hist, state):
+    expected = IndicatorPanel({symbol: hist}).snapshot()[symbol]
+    actual = state.snapshot()
+    assert actual.keys() == expected.keys()
+    for name in expected:
+        np.testing.assert_allclose(actual[name], expected[name], rtol=1e-9, err_msg=name)
+
+
+def test_streaming_matches_panel(history):
+    symbol, hist = history
+    assert_snapshot_parity(symbol, hist, StreamingIndicators.from_history(hist))
+
+
+@pytest.mark.parametrize('column', ['Volume', 'High', 'Low', 'Close'])
+def test_streaming_recovers_after_nan(history, column):
+    symbol, hist = history
+    hist = hist.copy()
+    hist.iloc[100, hist.columns.get_loc(column)] = np.nan
+    assert_snapshot_parity(symbol, hist, StreamingIndicators.from_history(hist))
+
+
+@pytest.mark.parametrize('column, field', [('Volume', 'avg_volume'), ('High', 'stoch_k')])
+def test_nan_inside_window_matches_panel(history, column, field):
+    symbol, hist = history
+    hist = hist.copy()
+    hist.iloc[-5, hist.columns.get_loc(column)] = np.nan
+    state = StreamingIndicators.from_history(hist)
+    assert np.isnan(state.snapshot()[field])
+    assert_snapshot_parity(symbol, hist, state)
+
+
+def test_state_survives_store_roundtrip_with_nan(history, tmp_path):
+    symbol, hist = history
+    hist = hist.copy()
+    hist.iloc[390, hist.columns.get_loc('Volume')] = np.nan
+    store = IndicatorStateStore(str(tmp_path / 'state.json'))
+    store.save({symbol: StreamingIndicators.from_history(hist.iloc[:395])})
+
+    state = store.load()[symbol].update_from(hist)
+    assert_snapshot_parity(symbol, hist, state)
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+import requests
+
+import telegram_delivery
+from telegram_delivery import TelegramClient, split_message, write_outbox
+
+
+def response(status, body=None):
+    res = requests.Response()
+    res.status_code = status
+    res._content = json.dumps(body or {}).encode()
+    return res
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """TelegramClient dengan POST yang diskenariokan per panggilan, tanpa jaringan"""
+    client = TelegramClient('token', backoff=0, max_retries=2)
+    client.script = []
+    client.posts = []
+    sleeps = []
+
+    def post(url, data=None, files=None, timeout=None):
+        client.posts.append((url.rsplit('/', 1)[-1], dict(data)))
+        outcome = client.script.pop(0) if client.script else response(200)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(client.session, 'post', post)
+    monkeypatch.setattr(telegram_delivery.time, 'sleep', sleeps.append)
+    client.sleeps = sleeps
+    yield client
+    client.close()
+
+
+def test_split_message_keeps_paragraphs_and_lines_whole():
+    paragraphs = [f"<b>Saham {i}</b>\n" + "\n".join(f"baris {i}.{j}" for j in range(5)) for i in range(40)]
+    text = "\n\n".join(paragraphs)
+
+    chunks = split_message(text, limit=200)
+
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert "\n\n".join(chunks) == text
+    # Tiap tag pembuka ditutup di chunk yang sama
+    assert all(chunk.count('<b>') == chunk.count('</b>') for chunk in chunks)
+
+
+def test_split_message_splits_long_paragraph_by_line_and_cuts_long_line():
+    assert split_message("pendek") == ["pendek"]
+    paragraph = "\n".join(["a" * 60] * 3)
+    assert split_message(paragraph, limit=130) == ["a" * 60 + "\n" + "a" * 60, "a" * 60]
+    assert split_message("x" * 25, limit=10) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_send_message_posts_each_chunk(client):
+    text = "\n\n".join(["p" * 3000] * 3)
+    assert client.send_message('1', text, parse_mode='HTML') is None
+    assert [len(data['text']) for _, data in client.posts] == [3000, 3000, 3000]
+    assert all(data['parse_mode'] == 'HTML' for _, data in client.posts)
+
+
+def test_post_retries_429_and_5xx_with_retry_after(client):
+    client.script = [response(429, {'parameters': {'retry_after': 7}}), response(502)]
+    assert client.send_message('1', 'halo') is None
+    assert len(client.posts) == 3
+    assert client.sleeps[0] >= 7
+
+
+def test_post_does_not_retry_client_errors(client):
+    client.script = [response(400, {'description': 'Bad Request'})]
+    error = client.send_message('1', 'halo')
+    assert error.startswith('HTTP 400') and len(client.posts) == 1
+
+
+def test_post_gives_up_after_max_retries(client):
+    client.script = [requests.ConnectionError('putus')] * 3
+    assert client.send_message('1', 'halo').startswith('ConnectionError')
+    assert len(client.posts) == 3 and len(client.sleeps) == 2
+
+
+def test_deliver_reports_per_chat_and_sends_document(client):
+    errors = client.deliver(['1', '2'], 'laporan', document=('hasil.csv', b'a,b\n', 'Hasil'))
+    assert errors == {'1': None, '2': None}
+    assert sorted(method for method, _ in client.posts) == ['sendDocument', 'sendDocument',
+                                                             'sendMessage', 'sendMessage']
+
+
+def test_write_outbox_records_document_hash(tmp_path):
+    path = tmp_path / 'outbox' / 'telegram.jsonl'
+    write_outbox(str(path), ['1'], 'halo', document=('hasil.csv', b'a,b\n', 'Hasil'))
+    entry = json.loads(path.read_text())
+    assert entry['message'] == 'halo'
+    assert entry['document']['size'] == 4 and entry['document']['caption'] == 'Hasil'
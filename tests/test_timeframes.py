@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from data_provider import FakeDataProvider
+from price_cache import PriceCache
+from timeframes import TimeframeProvider, resample_bars
+
+
+@pytest.fixture
+def timeframes(tmp_path, ohlcv):
+    cache = PriceCache(str(tmp_path / 'ohlcv.sqlite'))
+    yield TimeframeProvider(FakeDataProvider(ohlcv), cache)
+    cache.close()
+
+
+def assert_bars_equal(actual, expected):
+    pd.testing.assert_frame_equal(actual, expected, check_freq=False, check_index_type=False, check_names=False)
+
+
+def test_incremental_resample_matches_full_resample(timeframes, ohlcv):
+    symbol = next(iter(ohlcv))
+    hist = ohlcv[symbol]
+    # Bar dasar masuk satu per satu, termasuk di tengah minggu
+    for end in (len(hist) - 7, len(hist) - 3, len(hist) - 2, len(hist)):
+        bars = timeframes.resample(symbol, hist.iloc[:end], '1wk')
+        assert_bars_equal(bars, resample_bars(hist.iloc[:end], 'week'))
+    assert_bars_equal(timeframes.cache.load(symbol, '1wk'), resample_bars(hist, 'week'))
+
+
+def test_resample_rebuilds_after_split(timeframes, ohlcv):
+    symbol = next(iter(ohlcv))
+    hist = ohlcv[symbol]
+    timeframes.resample(symbol, hist.iloc[:-3], '1wk')
+
+    # Split 1:2 setelah run sebelumnya: histori dasar diunduh ulang dengan harga lama disesuaikan
+    adjusted = hist.copy()
+    adjusted[['Open', 'High', 'Low', 'Close']] /= 2
+    adjusted['Volume'] *= 2
+
+    expected = resample_bars(adjusted, 'week')
+    assert_bars_equal(timeframes.resample(symbol, adjusted, '1wk'), expected)
+    assert_bars_equal(timeframes.cache.load(symbol, '1wk'), expected)
@@ -0,0 +1,121 @@
+import pandas as pd
+
+from fetch_pipeline import iter_provider
+from price_cache import OVERLAP_BARS, CachedDataProvider, PriceCache, adjusted_since
+
+# Timeframe -> (interval dasar yang diunduh / disimpan, aturan resample)
+TIMEFRAMES = {
+    '1h': ('1h', None),
+    '4h': ('1h', 'session'),
+    '1d': ('1d', None),
+    '1wk': ('1d', 'week'),
+}
+
+# Istirahat siang IDX: sesi 1 berakhir 12:00 (Jumat 11:30), sesi 2 mulai 13:30 (Jumat 14:00)
+IDX_LUNCH_BREAK_HOUR = 12
+
+OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def _group_keys(index, rule):
+    day = index.normalize()
+    if rule == 'session':
+        # Bar "4H" IDX = satu bar per sesi perdagangan (pagi / siang)
+        return day + pd.to_timedelta((index.hour >= IDX_LUNCH_BREAK_HOUR).astype(int), unit='h')
+    if rule == 'week':
+        return day - pd.to_timedelta(index.dayofweek, unit='D')
+    raise ValueError(f"Aturan resample tidak dikenal: {rule}")
+
+
+def resample_bars(hist, rule):
+    """Menggabungkan bar dasar menjadi bar sesi / mingguan
+
+    Setiap bar diberi timestamp bar dasar pertamanya, sehingga label bar
+    terakhir tidak berubah ketika bar dasar baru masuk ke kelompok yang sama.
+    """
+    if hist.empty:
+        return hist
+    keys = _group_keys(hist.index, rule)
+    bars = hist.groupby(keys).agg(OHLCV_AGG)
+    first = pd.Series(hist.index, index=hist.index).groupby(keys).first()
+    bars.index = pd.DatetimeIndex(first, name=hist.index.name)
+    return bars[bars['Close'].notna()]
+
+
+def readjusted(cached, hist, rule):
+    """True bila bar resample terakhir di cache tidak sama lagi dengan resample ulang `hist`
+
+    Terjadi bila histori dasar disesuaikan ulang (split / dividen) dan
+    diunduh ulang penuh; hanya bar yang kelompoknya tercakup `hist` dibandingkan.
+    """
+    stored = cached.iloc[-OVERLAP_BARS:]
+    stored = stored[stored.index >= hist.index[0]]
+    if stored.empty:
+        return False
+    return adjusted_since(stored, resample_bars(hist[hist.index >= stored.index[0]], rule))
+
+
+class TimeframeProvider:
+    """Provider untuk timeframe 1h / 4h (sesi IDX) / 1d / 1wk
+
+    Hanya interval dasar (1h, 1d) yang diunduh dan disimpan; bar 4h dan
+    mingguan di-resample dari sana dan ikut disimpan di cache. Saat ada bar
+    dasar baru, hanya bar resample terakhir (yang mungkin belum lengkap) dan
+    sesudahnya yang dibangun ulang, kecuali bar cache yang tumpang tindih
+    berubah (split / dividen): semua bar resample simbol itu dibangun ulang.
+    """
+
+    def __init__(self, provider=None, cache=None):
+        self.provider = provider or CachedDataProvider()
+        self.cache = cache or getattr(self.provider, 'cache', None) or PriceCache()
+
+    def iter_fetch(self, symbols, period='3mo', interval='1d', start=None):
+        if interval not in TIMEFRAMES:
+            raise ValueError(f"Timeframe tidak didukung: {interval} (pilih {', '.join(TIMEFRAMES)})")
+        base, rule = TIMEFRAMES[interval]
+
+        chunks = iter_provider(self.provider, symbols, period=period, interval=base, start=start)
+        if rule is None:
+            yield from chunks
+            return
+        for data in chunks:
+            yield {symbol: self.resample(symbol, hist, interval) for symbol, hist in data.items()}
+
+    def resample(self, symbol, hist, interval):
+        """Resample inkremental: bar cache dipakai ulang sampai bar terakhirnya"""
+        _, rule = TIMEFRAMES[interval]
+        if hist.empty:
+            return hist
+
+        cached = self.cache.load(symbol, interval)
+        if cached is not None and readjusted(cached, hist, rule):
+            # Bar resample lama memakai harga sebelum penyesuaian: dibangun ulang dari `hist`
+            self.cache.drop(symbol, interval)
+            cached = None
+        if cached is None or cached.index[0] > hist.index[0]:
+            bars = resample_bars(hist, rule)
+            self.cache.store(symbol, bars, interval, covered_from=_first_ns(bars))
+        else:
+            cut = cached.index[-1]
+            fresh = resample_bars(hist[hist.index >= cut], rule)
+            self.cache.store(symbol, fresh, interval, covered_from=_first_ns(cached))
+            bars = pd.concat([cached[cached.index < cut], fresh])
+
+        return bars[bars.index >= hist.index[0]]
+
+    def fetch(self, symbols, period='3mo', interval='1d', start=None):
+        """Sama seperti iter_fetch, tapi hasilnya digabung jadi satu dict"""
+        results = {}
+        for data in self.iter_fetch(symbols, period=period, interval=interval, start=start):
+            results.update(data)
+        return results
+
+
+def _first_ns(bars):
+    first = bars.index[0]
+    return (first.tz_convert('UTC') if first.tz is not None else first).value
+
+
+def job_name(job, interval):
+    """Nama job per timeframe (cache hasil, arsip, metrics); 1d memakai nama lama"""
+    return job if interval == '1d' else f"{job}-{interval}"
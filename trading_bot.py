@@ -1,107 +1,158 @@
+import heapq
 import os
-import time
 import warnings
 from datetime import datetime
 
 import numpy as np
-import pandas as pd
-import requests
-import yfinance as yf
 from dotenv import load_dotenv
 
+import indicators
+import rule_engine
+from correlation import MAX_PER_CLUSTER, CorrelationClusters
+from data_provider import filter_min_bars
+from fetch_pipeline import iter_provider
+from indicator_panel import IndicatorPanel
+from instrumentation import RunMetrics
+from monte_carlo import MC_PATHS, PortfolioSimulator
+from precompute import PREOPEN_DELTA, load_precomputed
+from prefilter import Prefilter
+from replay import provider_from_env
+from result_cache import ResultCache, params_key
+from rule_engine import load_rules
+from signal_archive import NOTIFY_MODE, SignalArchive, diff_results, has_changes
+from telegram_delivery import send_telegram
+from timeframes import TimeframeProvider, job_name
+from universe import load_universe
+
 warnings.filterwarnings('ignore')
 load_dotenv()
 
 # Ambil env dari GitHub Secrets
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+# Jumlah hasil teratas yang disimpan (0 = semua)
+RESULT_TOP_K = int(os.getenv("RESULT_TOP_K", "0")) or None
+
+# Tahap harga / likuiditas prefilter untuk bot; default mati agar semua simbol watchlist dianalisis
+BOT_PREFILTER = os.getenv("BOT_PREFILTER", "").lower() in ("1", "true", "yes")
+
+# Timeframe analisis: 1h, 4h (per sesi IDX), 1d atau 1wk
+TIMEFRAME = os.getenv("TIMEFRAME", "1d")
+# Panjang histori per timeframe agar indikator terpanjang punya cukup bar
+PERIODS = {'1h': '6mo', '4h': '1y', '1d': '1y', '1wk': '5y'}
+
+# Perubahan yang dianggap signifikan untuk notifikasi mode diff (relatif)
+SIGNAL_DIFF_FIELDS = {'trend': None, 'buy_price': 0.02, 'take_profit': 0.02, 'stop_loss': 0.02}
 
 class IndonesiaStockTradingBot:
-    def __init__(self):
-        # Daftar saham blue chip dan populer Indonesia (sama seperti scanner.py)
-        self.stock_list = [
-            # Perbankan (Banks)
-            'BBCA.JK', 'BBRI.JK', 'BMRI.JK', 'BNLI.JK',  # BBCA, BBRI, BMRI, Permata Bank
-            # Konsumer (Consumer)
-            'ASII.JK', 'UNVR.JK', 'ICBP.JK', 'GOTO.JK',  # Astra, Unilever, Indofood, GoTo
-            # Telekomunikasi (Telecom)
-            'TLKM.JK', 'EXCL.JK', 'ISAT.JK',  # Telkom, XL Axiata, Indosat
-            # Pertambangan & Energi (Mining & Energy)
-            'ADRO.JK', 'PTBA.JK', 'ITMG.JK', 'BYAN.JK', 'BREN.JK', 'MBMA.JK',  # Adaro, Bukit Asam, Indo Tambang, Bayan Resources, Barito Renewables, Merdeka Battery
-            # Infrastruktur (Infrastructure)
-            'JSMR.JK', # 'WSKT.JK', 'WIKA.JK',  # Jasa Marga, Waskita, Wijaya Karya
-            # Rokok (Tobacco)
-            'GGRM.JK', 'HMSP.JK', 'WIIM.JK',  # Gudang Garam, HM Sampoerna, WIKA International
-            # Semen (Cement)
-            'SMGR.JK', 'INTP.JK',  # Semen Indonesia, Indocement
-            # Peternakan & Agribisnis (Agri & Livestock)
-            'CPIN.JK', 'JPFA.JK', 'JARR.JK',  # Charoen Pokphand, Japfa, Jhonlin Agro Raya
-            # Media, Teknologi & Properti (Media, Tech & Property)
-            'MNCN.JK', 'SCMA.JK', 'EMTK.JK', 'COIN.JK', 'PANI.JK',  # MNCN, SCMA, Elang Mahkota, Indokripto, Pantai Indah Kapuk
-            # Logam (Metals)
-            'ANTM.JK', 'TINS.JK', 'MDKA.JK'   # Aneka Tambang, Timah, Merdeka Copper
-            # Personal preference
-            'CDIA.JK', 'BRMS.JK', 'BRPT.JK', 'PGAS.JK', 'CUAN.JK', 'BREN.JK', 'PTRO.JK', 'GZCO.JK'  # Chandra Asri, Baramulti, Barito Pacific, Perusahaan Gas Negara, Cuanza, Barito Renewables, Petrosea
-        ]
-
-    def get_stock_data(self, symbol, period='1y'):
+    def __init__(self, provider=None, stock_list=None, metrics=None, result_cache=None,
+                 interval='1d', prefilter=None, keep_state=False, clusters=None, simulator=None,
+                 trend_rules=None, buy_rules=None, precomputed=None):
+        self.interval = interval
+        self.job = job_name('trading_bot', interval)
+        self.provider = provider or TimeframeProvider()
+        self.metrics = metrics or RunMetrics(self.job)
+        # Opsional: ResultCache untuk melewati simbol yang datanya belum berubah
+        self.result_cache = result_cache
+        # Opsional (BOT_PREFILTER=1): tahap murah harga / likuiditas sebelum indikator
+        # lengkap; tanpa filter MA20 karena sinyal beli justru mencari saham oversold
+        self.prefilter = prefilter or (
+            Prefilter(above_ma20=False) if BOT_PREFILTER else Prefilter(min_price=0, min_value=0, above_ma20=False)
+        )
+        # Opsional: CorrelationClusters untuk membatasi pick dari saham yang bergerak bersama
+        self.clusters = clusters
+        # Opsional: PortfolioSimulator untuk risiko gabungan rekomendasi teratas
+        self.simulator = simulator
+        self.simulation = None
+        # Opsional: PrecomputedIndicators (snapshot semalam) untuk run delta pra-pembukaan
+        self.precomputed = precomputed
+        # Aturan tren dan sinyal beli (rules/trend.json, rules/buy_signal.json)
+        self.trend_rules = trend_rules or load_rules('trend')
+        self.buy_rules = buy_rules or load_rules('buy_signal')
+        # Daftar saham blue chip dan populer Indonesia (lihat universe/trading_bot.txt)
+        self.stock_list = stock_list or load_universe('trading_bot')
+        # Mode daemon: histori harga dan snapshot indikator run terakhir disimpan di memori
+        self.keep_state = keep_state
+        self.history = {}
+        self.snapshots = {}
+
+    def get_stock_data(self, symbol, period=None):
         """Mengambil data saham dari Yahoo Finance"""
+        return self.get_stocks_data([symbol], period).get(symbol)
+
+    def get_stocks_data(self, symbols, period=None):
+        """Mengambil data banyak saham sekaligus dalam request batch"""
+        data = {}
+        for chunk in self.iter_stocks_data(symbols, period):
+            data.update(chunk)
+        return data
+
+    def iter_stocks_data(self, symbols, period=None):
+        """Menghasilkan data saham per kelompok begitu unduhannya selesai"""
+        period = period or PERIODS[self.interval]
         try:
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period=period, interval="1d")
-            if len(hist) < 100:  # Minimal data untuk kalkulasi indikator
-                return None
-            return hist
+            if self.precomputed:
+                chunks = self.precomputed.iter_fetch(self.provider, symbols, period=period, interval=self.interval)
+            else:
+                chunks = iter_provider(self.provider, symbols, period=period, interval=self.interval)
+            for data in self.metrics.timed('fetch', chunks):
+                self.metrics.record_bars(data)
+                yield filter_min_bars(data, 100)  # Minimal data untuk kalkulasi indikator
         except Exception as e:
-            print(f"Error fetching {symbol}: {str(e)}")
-            return None
+            self.metrics.error(e)
+            print(f"Error fetching data: {str(e)}")
 
     def calculate_rsi(self, prices, window=14):
         """Menghitung RSI (Relative Strength Index)"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        return indicators.rsi(prices, window)
 
     def calculate_macd(self, prices, fast=12, slow=26, signal=9):
         """Menghitung MACD"""
-        exp1 = prices.ewm(span=fast).mean()
-        exp2 = prices.ewm(span=slow).mean()
-        macd = exp1 - exp2
-        signal_line = macd.ewm(span=signal).mean()
+        macd, signal_line, _ = indicators.macd(prices, fast, slow, signal)
         return macd, signal_line
 
     def calculate_bollinger_bands(self, prices, window=20, num_std=2):
         """Menghitung Bollinger Bands"""
-        rolling_mean = prices.rolling(window=window).mean()
-        rolling_std = prices.rolling(window=window).std()
-        upper_band = rolling_mean + (rolling_std * num_std)
-        lower_band = rolling_mean - (rolling_std * num_std)
-        return upper_band, rolling_mean, lower_band
+        return indicators.bollinger_bands(prices, window, num_std)
 
     def calculate_atr(self, high, low, close, window=14):
         """Menghitung Average True Range (ATR) untuk stop loss"""
-        tr1 = high - low
-        tr2 = (high - close.shift(1)).abs()
-        tr3 = (low - close.shift(1)).abs()
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=window).mean()
-        return atr
+        return indicators.atr(high, low, close, window)
+
+    def build_snapshot(self, data):
+        """Nilai indikator terkini untuk satu saham"""
+        close = data['Close']
+        rsi = self.calculate_rsi(close)
+        macd, macd_signal = self.calculate_macd(close)
+        bb_upper, bb_middle, bb_lower = self.calculate_bollinger_bands(close)
+        atr = self.calculate_atr(data['High'], data['Low'], close)
+
+        return {
+            'price': close.iloc[-1],
+            'rsi': rsi.iloc[-1],
+            'macd': macd.iloc[-1],
+            'macd_signal': macd_signal.iloc[-1],
+            'bb_lower': bb_lower.iloc[-1],
+            'ma_50': indicators.sma(close, 50).iloc[-1],
+            'ma_200': indicators.sma(close, 200).iloc[-1],
+            'atr': atr.iloc[-1],
+        }
 
     def determine_trend(self, data):
         """Menentukan tren bullish atau bearish"""
         close = data['Close']
-        ma_50 = close.rolling(window=50).mean()
-        ma_200 = close.rolling(window=200).mean()
+        ma_50 = indicators.sma(close, 50)
+        ma_200 = indicators.sma(close, 200)
 
-        if ma_50.iloc[-1] > ma_200.iloc[-1] and close.iloc[-1] > ma_50.iloc[-1]:
-            return 'bullish'
-        elif ma_50.iloc[-1] < ma_200.iloc[-1] and close.iloc[-1] < ma_50.iloc[-1]:
-            return 'bearish'
-        else:
-            return 'neutral'
+        return self.evaluate_trend({
+            'price': close.iloc[-1],
+            'ma_50': ma_50.iloc[-1],
+            'ma_200': ma_200.iloc[-1],
+        })
+
+    def evaluate_trend(self, snapshot):
+        """Menentukan tren dari nilai MA50/MA200 terkini"""
+        return self.trend_rules.evaluate_snapshot(snapshot)['labels']['trend'].tolist()[0]
 
     def get_buy_signal(self, data):
         """Mendapatkan sinyal beli berdasarkan indikator"""
@@ -110,20 +161,18 @@ class IndonesiaStockTradingBot:
         macd, macd_signal = self.calculate_macd(close)
         bb_upper, bb_middle, bb_lower = self.calculate_bollinger_bands(close)
 
-        current_price = close.iloc[-1]
-        current_rsi = rsi.iloc[-1]
-        current_macd = macd.iloc[-1]
-        current_macd_signal = macd_signal.iloc[-1]
-
-        # Kondisi untuk beli: RSI oversold, MACD bullish crossover, price near lower BB
-        buy_conditions = [
-            current_rsi < 30,  # Oversold
-            current_macd > current_macd_signal,  # MACD bullish
-            current_price <= bb_lower.iloc[-1] * 1.02  # Near lower band
-        ]
-
-        if sum(buy_conditions) >= 2:  # Minimal 2 kondisi terpenuhi
-            return True, current_price
+        return self.evaluate_buy_signal({
+            'price': close.iloc[-1],
+            'rsi': rsi.iloc[-1],
+            'macd': macd.iloc[-1],
+            'macd_signal': macd_signal.iloc[-1],
+            'bb_lower': bb_lower.iloc[-1],
+        })
+
+    def evaluate_buy_signal(self, snapshot):
+        """Menilai sinyal beli dari nilai indikator terkini"""
+        if self.buy_rules.evaluate_snapshot(snapshot)['entry'][0]:
+            return True, snapshot['price']
         return False, None
 
     def calculate_tp_sl(self, buy_price, trend, atr, volatility_factor=1.5):
@@ -146,23 +195,39 @@ class IndonesiaStockTradingBot:
 
         return take_profit, stop_loss
 
-    def analyze_stock(self, symbol):
+    def analyze_stock(self, symbol, data=None, snapshot=None):
         """Menganalisis saham untuk rekomendasi trading"""
-        data = self.get_stock_data(symbol)
-        if data is None:
+        if snapshot is None:
+            if data is None:
+                data = self.get_stock_data(symbol)
+            if data is None:
+                return None
+            snapshot = self.build_snapshot(data)
+
+        signal, buy_price = self.evaluate_buy_signal(snapshot)
+        if not signal:
             return None
+        return self.build_analysis(symbol, self.evaluate_trend(snapshot), buy_price, snapshot['atr'])
 
-        trend = self.determine_trend(data)
-        buy_signal, buy_price = self.get_buy_signal(data)
+    def analyze_frame(self, frame):
+        """Menganalisis semua simbol sekaligus (satu baris per simbol, nilai indikator terkini)
 
-        if not buy_signal:
-            return None
+        Tren dan sinyal beli dievaluasi sebagai array untuk seluruh baris;
+        TP/SL hanya dihitung untuk simbol dengan sinyal beli. Simbol tanpa
+        sinyal bernilai None.
+        """
+        trends = self.trend_rules.evaluate_frame(frame)['labels']['trend'].tolist()
+        entries = self.buy_rules.evaluate_frame(frame)['entry']
+        prices, atrs = frame['price'].tolist(), frame['atr'].tolist()
 
-        # Hitung ATR untuk TP/SL
-        atr = self.calculate_atr(data['High'], data['Low'], data['Close'])
-        current_atr = atr.iloc[-1]
+        analyses = dict.fromkeys(frame.index)
+        for i in np.flatnonzero(entries):
+            analyses[frame.index[i]] = self.build_analysis(frame.index[i], trends[i], prices[i], atrs[i])
+        return analyses
 
-        take_profit, stop_loss = self.calculate_tp_sl(buy_price, trend, current_atr)
+    def build_analysis(self, symbol, trend, buy_price, atr):
+        """Baris hasil untuk saham dengan sinyal beli, termasuk TP/SL dari ATR"""
+        take_profit, stop_loss = self.calculate_tp_sl(buy_price, trend, atr)
 
         return {
             'symbol': symbol,
@@ -171,32 +236,122 @@ class IndonesiaStockTradingBot:
             'buy_price': buy_price,
             'take_profit': take_profit,
             'stop_loss': stop_loss,
-            'atr': current_atr,
+            'atr': atr,
             'potential_profit': (take_profit - buy_price) / buy_price * 100,
             'risk': (buy_price - stop_loss) / buy_price * 100
         }
 
-    def run_analysis(self):
+    def run_analysis(self, top_k=None):
         """Menjalankan analisis untuk semua saham"""
         results = []
+        self.prefilter.reset()
 
         print("Memulai analisis trading bot...")
         print("=" * 50)
 
-        for symbol in self.stock_list:
-            print(f"Analyzing {symbol}...")
-
-            analysis = self.analyze_stock(symbol)
-            if analysis:
-                results.append(analysis)
-
-            time.sleep(0.1)  # Rate limiting
-
-        # Sort by potential profit
-        results = sorted(results, key=lambda x: x['potential_profit'], reverse=True)
-
+        key = self.result_key() if self.result_cache else None
+        history, all_snapshots = {}, {}
+        closes, frames = {}, {}
+
+        # Analisis berjalan per kelompok data yang sudah selesai diunduh
+        with self.metrics.profile('run_analysis'):
+            for stock_data in self.iter_stocks_data(self.stock_list):
+                if self.clusters:
+                    closes.update({symbol: self.clusters.tail(hist) for symbol, hist in stock_data.items()})
+                if self.simulator:
+                    frames.update({symbol: self.simulator.tail(hist) for symbol, hist in stock_data.items()})
+                stock_data = self.prefilter.apply(stock_data)
+
+                # Simbol yang bar terakhirnya belum berubah memakai hasil run sebelumnya
+                analyses = {}
+                if self.result_cache:
+                    analyses, stock_data = self.result_cache.split(stock_data, key)
+                    self.metrics.count('result_cache_hits', len(analyses))
+
+                # Semua indikator dihitung sekaligus untuk seluruh simbol dalam kelompok
+                with self.metrics.stage('indicators'):
+                    latest = self.latest_fields(stock_data) if stock_data else None
+                if self.keep_state:
+                    history.update(stock_data)
+                    all_snapshots.update(latest.to_dict('index') if latest is not None else {})
+
+                with self.metrics.stage('scoring'):
+                    scored = self.analyze_frame(latest) if latest is not None else {}
+                    self.metrics.count('symbols_analyzed', len(scored))
+
+                    for symbol, analysis in scored.items():
+                        print(f"Analyzing {symbol}...")
+                        analyses[symbol] = analysis
+                        if self.result_cache:
+                            self.result_cache.put(symbol, stock_data[symbol], key, analysis)
+
+                    results.extend(analysis for analysis in analyses.values() if analysis)
+
+        if self.result_cache:
+            self.result_cache.save()
+        if self.keep_state:
+            # Diganti sekaligus agar pembaca di thread lain tidak melihat state setengah jadi
+            self.history, self.snapshots = history, all_snapshots
+
+        self.prefilter.report(self.metrics)
+        if self.precomputed:
+            self.precomputed.report(self.metrics)
+        if self.clusters and closes:
+            with self.metrics.stage('correlation'):
+                self.clusters.update(closes)
+            with self.metrics.stage('scoring'):
+                # Pick yang dipindah ke belakang tidak boleh mengisi top_k; heap hanya mengurutkan
+                # hasil sampai top_k pick terkumpul
+                results = self.clusters.cap(self.iter_ranked(results), top_k)
+        else:
+            with self.metrics.stage('scoring'):
+                results = self.rank_results(results, top_k)
+
+        simulation = None
+        if self.simulator and results:
+            with self.metrics.stage('simulation'):
+                results, simulation = self.simulator.simulate(results, frames)
+        self.simulation = simulation
+        self.metrics.count('signals', len(results))
         return results
 
+    def latest_fields(self, stock_data):
+        """Nilai indikator terkini per simbol; dari snapshot semalam + bar baru bila tersedia"""
+        if self.precomputed:
+            return self.precomputed.latest_fields(stock_data)
+        return IndicatorPanel(stock_data).latest_fields()
+
+    def result_key(self):
+        """Kunci parameter + aturan untuk cache hasil analisis"""
+        cls = type(self)
+        return params_key(
+            {'job': self.job, 'period': PERIODS[self.interval], 'min_bars': 100,
+             'rules': [self.trend_rules.config, self.buy_rules.config],
+             'precomputed': self.precomputed.identity() if self.precomputed else None},
+            indicators, IndicatorPanel, rule_engine, cls.analyze_frame, cls.build_analysis, cls.calculate_tp_sl,
+        )
+
+    def rank_key(self):
+        """Kunci urutan hasil: potensi profit, lalu urutan stock_list agar hasil dengan profit sama tetap stabil"""
+        position = {symbol: i for i, symbol in enumerate(self.stock_list)}
+        return lambda x: (-x['potential_profit'], position.get(x['symbol'], len(position)))
+
+    def rank_results(self, results, top_k=None):
+        """Mengurutkan hasil berdasarkan potensi profit (opsional: hanya `top_k` teratas)"""
+        key = self.rank_key()
+        if top_k is not None:
+            # Heap berukuran top_k: O(n log k), tanpa mengurutkan semua hasil
+            return heapq.nsmallest(top_k, results, key=key)
+        return sorted(results, key=key)
+
+    def iter_ranked(self, results):
+        """Hasil satu per satu dalam urutan rank_results; heap O(n), tiap hasil yang diambil O(log n)"""
+        key = self.rank_key()
+        heap = [(key(x), i, x) for i, x in enumerate(results)]
+        heapq.heapify(heap)
+        while heap:
+            yield heapq.heappop(heap)[2]
+
     def display_results(self, results):
         """Menampilkan hasil analisis"""
         if not results:
@@ -204,7 +359,7 @@ class IndonesiaStockTradingBot:
             return
 
         print("\n" + "=" * 80)
-        print("HASIL ANALISIS TRADING BOT")
+        print(f"HASIL ANALISIS TRADING BOT{self.timeframe_label().upper()}")
         print("=" * 80)
 
         for i, stock in enumerate(results, 1):
@@ -214,47 +369,127 @@ class IndonesiaStockTradingBot:
             print(f"   Take Profit: Rp {stock['take_profit']:,.0f} (+{stock['potential_profit']:.1f}%)")
             print(f"   Stop Loss: Rp {stock['stop_loss']:,.0f} (-{stock['risk']:.1f}%)")
             print(f"   ATR: {stock['atr']:.2f}")
+            if 'prob_tp' in stock:
+                print(f"   Peluang TP/SL lebih dulu: {stock['prob_tp']:.0f}% / {stock['prob_sl']:.0f}%")
+
+        if self.simulation:
+            self.simulator.report(self.simulation)
+
+    def timeframe_label(self):
+        return "" if self.interval == '1d' else f" ({self.interval})"
 
-    def compose_message(self, results):
+    def compose_message(self, results, limit=5):
         """Menyusun pesan untuk dikirim ke Telegram"""
         if not results:
             return "⚠️ Tidak ada rekomendasi trading hari ini."
 
-        message = "📊 *Rekomendasi Trading Bot Indonesia Stocks*\n\n"
-        for stock in results[:5]:  # Top 5 saja
+        message = f"📊 *Rekomendasi Trading Bot Indonesia Stocks{self.timeframe_label()}*\n\n"
+        for stock in results[:limit]:
             message += (
                 f"• `{stock['symbol']}` ({stock['company']}) | Tren: *{stock['trend'].capitalize()}*\n"
                 f"   - Beli: *Rp {stock['buy_price']:,.0f}*\n"
                 f"   - TP: *Rp {stock['take_profit']:,.0f}* (+{stock['potential_profit']:.1f}%)\n"
+                f"   - SL: *Rp {stock['stop_loss']:,.0f}* (-{stock['risk']:.1f}%)\n"
+            )
+            if 'prob_tp' in stock:
+                message += f"   - Peluang TP/SL: {stock['prob_tp']:.0f}% / {stock['prob_sl']:.0f}%\n"
+            message += "\n"
+        if self.simulation:
+            message += self.compose_simulation(self.simulation)
+        message += "⚠️ *Disclaimer:* Ini bukan saran keuangan. Lakukan riset sendiri. Gunakan stop loss!"
+        return message.strip()
+
+    def compose_simulation(self, summary):
+        """Ringkasan risiko portofolio untuk pesan Telegram"""
+        pct = summary['percentiles']
+        return (
+            f"🎲 *Portofolio {len(summary['symbols'])} saham* "
+            f"({summary['paths']:,} simulasi, {summary['hold']} bar)\n"
+            f"   - TP +{summary['take_profit_pct']:.1f}% lebih dulu: *{summary['prob_tp']:.0f}%* | "
+            f"SL -{summary['stop_loss_pct']:.1f}%: *{summary['prob_sl']:.0f}%*\n"
+            f"   - Return median {pct[50]:+.1f}% (P5 {pct[5]:+.1f}%, P95 {pct[95]:+.1f}%)\n"
+            f"   - VaR {summary['var_level'] * 100:.0f}%: *{summary['var_pct']:.1f}%*\n\n"
+        )
+
+    def compose_diff_message(self, diff):
+        """Menyusun pesan Telegram yang hanya berisi perubahan dari run sebelumnya"""
+        if not has_changes(diff):
+            return None
+
+        def fmt(field, value):
+            return value.capitalize() if field == 'trend' else f"Rp {value:,.0f}"
+
+        labels = {'trend': 'Tren', 'buy_price': 'Beli', 'take_profit': 'TP', 'stop_loss': 'SL'}
+        message = f"🔔 *Perubahan Rekomendasi Trading Bot{self.timeframe_label()}*\n\n"
+        for stock in diff['new']:
+            message += (
+                f"🆕 `{stock['symbol']}` | Tren: *{stock['trend'].capitalize()}*\n"
+                f"   - Beli: *Rp {stock['buy_price']:,.0f}*\n"
+                f"   - TP: *Rp {stock['take_profit']:,.0f}* (+{stock['potential_profit']:.1f}%)\n"
                 f"   - SL: *Rp {stock['stop_loss']:,.0f}* (-{stock['risk']:.1f}%)\n\n"
             )
+        for stock in diff['dropped']:
+            message += f"❌ `{stock['symbol']}` tidak ada sinyal beli lagi\n\n"
+        for stock, changes in diff['changed']:
+            message += f"🔄 `{stock['symbol']}` | " + ', '.join(
+                f"{labels[field]}: {fmt(field, old)} → {fmt(field, new)}"
+                for field, (old, new) in changes.items()
+            ) + "\n\n"
         message += "⚠️ *Disclaimer:* Ini bukan saran keuangan. Lakukan riset sendiri. Gunakan stop loss!"
         return message.strip()
 
 def main():
     # Inisialisasi bot
-    bot = IndonesiaStockTradingBot()
+    bot = IndonesiaStockTradingBot(
+        interval=TIMEFRAME, result_cache=ResultCache(job_name('trading_bot', TIMEFRAME)),
+        provider=provider_from_env(),
+        clusters=CorrelationClusters(job_name('trading_bot', TIMEFRAME)) if MAX_PER_CLUSTER else None,
+        simulator=PortfolioSimulator() if MC_PATHS else None,
+        precomputed=(load_precomputed(job_name('trading_bot', TIMEFRAME), TIMEFRAME, PERIODS[TIMEFRAME])
+                     if PREOPEN_DELTA else None),
+    )
 
     # Jalankan analisis
-    results = bot.run_analysis()
+    results = bot.run_analysis(top_k=RESULT_TOP_K)
+    publish(bot, results)
+
+
+def publish(bot, results):
+    """Mengarsipkan hasil, mengirim laporan ke Telegram dan menulis laporan run"""
+    # Arsipkan hasil dan bandingkan dengan run sebelumnya
+    archive = SignalArchive()
+    try:
+        previous = archive.latest_run(bot.job)
+        archive.record(bot.job, results, score_field='potential_profit', price_field='buy_price')
+    finally:
+        archive.close()
+
+    diff = None
+    if NOTIFY_MODE == 'diff' and previous is not None:
+        diff = diff_results(previous, results, SIGNAL_DIFF_FIELDS)
+
+    send_report(bot, results, diff=diff)
 
+    # Laporan run (JSON + textfile Prometheus)
+    paths = bot.metrics.write(provider=bot.provider)
+    print(f"Laporan run disimpan ke: {paths['json']}")
+
+
+def send_report(bot, results, diff=None):
+    """Menampilkan hasil dan mengirim ke Telegram
+
+    Bila `diff` diberikan (mode diff), hanya perubahan yang dikirim.
+    """
     # Tampilkan hasil
     bot.display_results(results)
 
     # Kirim ke Telegram
-    message = bot.compose_message(results)
-    url = f"https://api.telegram.org/bot{TOKEN}/sendMessage"
-    payload = {
-        "chat_id": CHAT_ID,
-        "text": message,
-        "parse_mode": "Markdown"
-    }
-
-    try:
-        res = requests.post(url, data=payload)
-        print("✔️ Terkirim ke Telegram!" if res.status_code == 200 else f"❌ Gagal: {res.text}")
-    except Exception as e:
-        print(f"Error sending to Telegram: {e}")
+    with bot.metrics.stage('delivery'):
+        message = bot.compose_diff_message(diff) if diff is not None else bot.compose_message(results)
+        if message is None:
+            print("Tidak ada perubahan sinyal sejak run sebelumnya, notifikasi tidak dikirim.")
+        else:
+            send_telegram(TOKEN, CHAT_ID, message, parse_mode="Markdown", metrics=bot.metrics)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
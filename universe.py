@@ -0,0 +1,42 @@
+import csv
+import os
+
+UNIVERSE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'universe')
+# Sektor per simbol (symbol,sector); simbol tanpa '.JK' otomatis ditambah
+SECTORS_PATH = os.path.join(UNIVERSE_DIR, 'sectors.csv')
+
+
+def universe_path(name):
+    """Path file universe; nama tanpa path dicari di folder universe/"""
+    if os.path.sep in name or os.path.exists(name):
+        return name
+    return os.path.join(UNIVERSE_DIR, name if name.endswith('.txt') else f"{name}.txt")
+
+
+def load_universe(name):
+    """Membaca daftar simbol dari file (satu per baris, '#' untuk komentar)"""
+    symbols = []
+    with open(universe_path(name)) as f:
+        for line in f:
+            symbol = line.split('#', 1)[0].strip()
+            if symbol:
+                symbols.append(normalize_symbol(symbol))
+    return list(dict.fromkeys(symbols))
+
+
+def normalize_symbol(symbol):
+    symbol = symbol.strip().upper()
+    return symbol if '.' in symbol else f"{symbol}.JK"
+
+
+def load_sectors(path=SECTORS_PATH):
+    """Membaca pemetaan simbol -> sektor dari CSV"""
+    with open(path, newline='') as f:
+        return {normalize_symbol(row['symbol']): row['sector'].strip() for row in csv.DictReader(f)}
+
+
+def shard(symbols, num_shards, index):
+    """Membagi universe secara round-robin; shard ke-`index` dari `num_shards`"""
+    if not 0 <= index < num_shards:
+        raise ValueError(f"Shard {index} di luar rentang 0..{num_shards - 1}")
+    return symbols[index::num_shards]